@@ -0,0 +1,129 @@
+import os
+import re
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from typing import Dict, Optional
+from app.services.export_service import ExportJobManager, EXPORT_FORMATS, get_export_manager
+
+router = APIRouter()
+
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+class ExportRequest(BaseModel):
+    region: Optional[str] = None
+    year: Optional[int] = None
+    direction: Optional[str] = None
+    winner: Optional[bool] = None
+    format: str = "csv"
+
+
+class ExportJobResponse(BaseModel):
+    job_id: str
+    status: str
+    format: str
+    filters: Dict
+    rows: int
+    total: Optional[int] = None
+    progress: float
+    size: Optional[int] = None
+    error: Optional[str] = None
+    download_url: Optional[str] = None
+
+
+def job_response(job: Dict) -> ExportJobResponse:
+    download_url = f"/api/v1/exports/{job['job_id']}/download" if job["status"] == "done" else None
+    fields = {key: value for key, value in job.items() if key in ExportJobResponse.model_fields}
+    return ExportJobResponse(**fields, download_url=download_url)
+
+
+def _iter_file(path: str, start: int, length: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+@router.post("/exports", response_model=ExportJobResponse, status_code=202)
+def create_export(
+    request: ExportRequest,
+    manager: ExportJobManager = Depends(get_export_manager)
+):
+    """
+    Поставить выгрузку проектов в очередь
+
+    Повторный запрос с теми же фильтрами и форматом возвращает ту же задачу
+    (или готовый файл из кэша).
+    """
+    if request.format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Формат должен быть одним из: {', '.join(EXPORT_FORMATS)}")
+    job = manager.submit(request.model_dump(exclude={"format"}), request.format)
+    return job_response(job)
+
+
+@router.get("/exports/{job_id}", response_model=ExportJobResponse)
+def get_export(job_id: str, manager: ExportJobManager = Depends(get_export_manager)):
+    """Статус и прогресс выгрузки"""
+    job = manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Выгрузка не найдена")
+    return job_response(job)
+
+
+@router.get("/exports/{job_id}/download")
+def download_export(
+    job_id: str,
+    request: Request,
+    manager: ExportJobManager = Depends(get_export_manager)
+):
+    """
+    Скачать готовую выгрузку
+
+    Поддерживается заголовок Range (bytes=start-end), чтобы прерванную
+    загрузку большого файла можно было продолжить.
+    """
+    job = manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Выгрузка не найдена")
+    path = manager.file_path(job)
+    if job["status"] != "done" or not os.path.exists(path):
+        raise HTTPException(status_code=409, detail=f"Выгрузка еще не готова: {job['status']}")
+
+    size = os.path.getsize(path)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="socfinder_projects_{job_id[:8]}.{job["format"]}"',
+    }
+    media_type = EXPORT_FORMATS[job["format"]]
+
+    range_header = request.headers.get("range")
+    if not range_header:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_iter_file(path, 0, size), media_type=media_type, headers=headers)
+
+    match = RANGE_RE.match(range_header.strip())
+    if not match or match.groups() == ("", ""):
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # bytes=-N: последние N байт
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or start > end:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+
+    length = end - start + 1
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(_iter_file(path, start, length), status_code=206,
+                             media_type=media_type, headers=headers)
@@ -0,0 +1,104 @@
+import time
+from typing import Dict, Optional
+from fastapi import APIRouter
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import inspect, text
+from app.core import caching
+from app.core.database import async_engine, engine
+from app.core.warmup import warmup
+from app.services import columnar_snapshot, facet_service
+
+router = APIRouter(tags=["health"])
+
+# Таблица с версией восстановленного дампа (data/scripts/db_dump.py)
+VERSION_TABLE = "db_snapshot_version"
+
+
+def pool_status(pool) -> Dict:
+    """Состояние пула соединений: занято, свободно, переполнение"""
+    if not hasattr(pool, "checkedout"):
+        return {"class": type(pool).__name__}
+    size = pool.size()
+    limit = size + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    return {
+        "size": size,
+        "checked_in": pool.checkedin(),
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "exhausted": pool._max_overflow >= 0 and checked_out >= limit,
+    }
+
+
+def snapshot_version(connection) -> Optional[Dict]:
+    """Версия данных, из которой восстановлена база"""
+    if not inspect(connection).has_table(VERSION_TABLE):
+        return None
+    row = connection.execute(text(f"SELECT version, restored_at FROM {VERSION_TABLE}")).first()
+    if row is None:
+        return None
+    return {"version": row.version, "restored_at": row.restored_at}
+
+
+def columnar_status(current_version: str) -> Dict:
+    """Колоночный снимок и куб фасетов: собраны ли и для какой версии данных"""
+    result = {"enabled": columnar_snapshot.COLUMNAR_SNAPSHOT, "data_version": current_version}
+    for name, cache in (("snapshot", columnar_snapshot.snapshot_cache), ("cube", facet_service.cube_cache)):
+        state = cache.state()
+        state["stale"] = state["built"] and state["data_version"] != current_version
+        result[name] = state
+    return result
+
+
+@router.get("/health")
+def health_check():
+    """Liveness: процесс жив; пока база восстанавливается — warming"""
+    state = warmup.state()
+    if state["status"] == "ready":
+        state["status"] = "healthy"
+    return state
+
+
+@router.get("/health/ready")
+def readiness_check():
+    """
+    Readiness: можно ли направлять запросы на этот воркер
+
+    Возвращает 503, если база недоступна, пул соединений (синхронный
+    или асинхронный, pool и async_pool) исчерпан
+    или данные еще восстанавливаются из дампа. В columnar — собраны ли
+    колоночный снимок и куб фасетов и для какой версии данных (строятся
+    лениво, на готовность не влияют).
+    """
+    problems = []
+    result = {"warmup": warmup.state(), "pool": pool_status(engine.pool)}
+    if async_engine is not None:
+        result["async_pool"] = pool_status(async_engine.pool)
+        if result["async_pool"].get("exhausted"):
+            problems.append("async pool exhausted")
+
+    if result["warmup"]["status"] != "ready":
+        problems.append(f"warmup: {result['warmup']['status']}")
+
+    # На исчерпанном пуле проверка сама встала бы в очередь на pool_timeout
+    if result["pool"].get("exhausted"):
+        problems.append("pool exhausted")
+    else:
+        try:
+            started = time.perf_counter()
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                latency = time.perf_counter() - started
+                result["snapshot"] = snapshot_version(connection)
+            result["database"] = {"status": "ok", "latency_ms": round(latency * 1000, 2)}
+            result["columnar"] = columnar_status(caching.data_version.get())
+        except Exception as e:
+            result["database"] = {"status": "error", "error": str(e)}
+            problems.append("database unavailable")
+
+    result["status"] = "not_ready" if problems else "ready"
+    if problems:
+        result["problems"] = problems
+    return JSONResponse(jsonable_encoder(result), status_code=503 if problems else 200)
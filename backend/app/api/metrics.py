@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Метрики в формате Prometheus: длительность запросов и SQL по маршрутам"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from typing import List, Optional
-from ..core.database import get_db
+from ..core.database import get_async_db
+from ..core.serialization import rows_response
 from ..models.project import Project
 from pydantic import BaseModel
 
@@ -19,7 +20,7 @@ class ProblemResponse(BaseModel):
 async def get_problems(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить список всех проблем с информацией о проектах.
@@ -34,30 +35,21 @@ async def get_problems(
     """
     try:
         # SQL запрос для получения проблем с названиями проектов
-        problems = db.execute(text("""
+        problems = await db.execute(text("""
             SELECT 
                 p.id,
                 p.grant_id,
                 p.problem_text,
                 pr.name as project_name,
-                p.created_at
+                CAST(p.created_at AS TEXT) as created_at
             FROM problems p
             LEFT JOIN projects pr ON p.grant_id = pr.req_num
             ORDER BY p.created_at DESC
             LIMIT :limit OFFSET :skip
         """), {"limit": limit, "skip": skip})
         
-        result = []
-        for row in problems:
-            result.append(ProblemResponse(
-                id=row.id,
-                grant_id=row.grant_id,
-                problem_text=row.problem_text,
-                project_name=row.project_name,
-                created_at=str(row.created_at) if row.created_at else None
-            ))
-        
-        return result
+        # created_at уже строка (CAST в запросе) — строки кодируются в JSON напрямую
+        return rows_response(list(problems.keys()), problems)
         
     except Exception as e:
         raise HTTPException(
@@ -66,7 +58,7 @@ async def get_problems(
         )
 
 @router.get("/api/problems/count")
-async def get_problems_count(db: Session = Depends(get_db)):
+async def get_problems_count(db: AsyncSession = Depends(get_async_db)):
     """
     Получить общее количество проблем.
     
@@ -77,7 +69,7 @@ async def get_problems_count(db: Session = Depends(get_db)):
         Общее количество проблем
     """
     try:
-        result = db.execute(text("SELECT COUNT(*) as count FROM problems"))
+        result = await db.execute(text("SELECT COUNT(*) as count FROM problems"))
         count = result.fetchone().count
         return {"count": count}
         
@@ -90,7 +82,7 @@ async def get_problems_count(db: Session = Depends(get_db)):
 @router.get("/api/problems/by-grant/{grant_id}")
 async def get_problems_by_grant(
     grant_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить проблемы для конкретного гранта.
@@ -103,30 +95,20 @@ async def get_problems_by_grant(
         Список проблем для указанного гранта
     """
     try:
-        problems = db.execute(text("""
+        problems = await db.execute(text("""
             SELECT 
                 p.id,
                 p.grant_id,
                 p.problem_text,
                 pr.name as project_name,
-                p.created_at
+                CAST(p.created_at AS TEXT) as created_at
             FROM problems p
             LEFT JOIN projects pr ON p.grant_id = pr.req_num
             WHERE p.grant_id = :grant_id
             ORDER BY p.created_at DESC
         """), {"grant_id": grant_id})
         
-        result = []
-        for row in problems:
-            result.append(ProblemResponse(
-                id=row.id,
-                grant_id=row.grant_id,
-                problem_text=row.problem_text,
-                project_name=row.project_name,
-                created_at=str(row.created_at) if row.created_at else None
-            ))
-        
-        return result
+        return rows_response(list(problems.keys()), problems)
         
     except Exception as e:
         raise HTTPException(
@@ -137,7 +119,7 @@ async def get_problems_by_grant(
 @router.get("/api/problems/search")
 async def search_problems(
     query: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Поиск проблем по тексту.
@@ -151,13 +133,13 @@ async def search_problems(
     """
     try:
         search_pattern = f"%{query}%"
-        problems = db.execute(text("""
+        problems = await db.execute(text("""
             SELECT 
                 p.id,
                 p.grant_id,
                 p.problem_text,
                 pr.name as project_name,
-                p.created_at
+                CAST(p.created_at AS TEXT) as created_at
             FROM problems p
             LEFT JOIN projects pr ON p.grant_id = pr.req_num
             WHERE p.problem_text ILIKE :search_pattern
@@ -165,17 +147,7 @@ async def search_problems(
             LIMIT 50
         """), {"search_pattern": search_pattern})
         
-        result = []
-        for row in problems:
-            result.append(ProblemResponse(
-                id=row.id,
-                grant_id=row.grant_id,
-                problem_text=row.problem_text,
-                project_name=row.project_name,
-                created_at=str(row.created_at) if row.created_at else None
-            ))
-        
-        return result
+        return rows_response(list(problems.keys()), problems)
         
     except Exception as e:
         raise HTTPException(
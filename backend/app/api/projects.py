@@ -1,11 +1,18 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 from pydantic import field_validator
 from datetime import date
 from app.core.database import get_db
+from app.core.caching import conditional_get
+from app.core.serialization import FastJSONResponse
 from app.models.project import Project
-from app.services.project_service import ProjectService
+from app.services.facet_service import FacetService
+from app.services.project_service import (
+    ProjectService, ANALYTICS_COLUMNS, SORTABLE_FIELDS, active_filters, sort_field
+)
+from app.services.arrow_export import ARROW_FORMATS, PYARROW_AVAILABLE, arrow_schema, iter_arrow_export
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -76,6 +83,10 @@ class ProjectTableResponse(BaseModel):
     class Config:
         from_attributes = True
 
+FIELDS_DESCRIPTION = "Поля через запятую (id добавляется всегда); по умолчанию — все поля ответа"
+
+# Списки отдаются FastJSONResponse: response_model описывает схему в OpenAPI, а строки
+# из базы кодируются без Pydantic; при fields= в ответе только запрошенные поля
 @router.get("/projects", response_model=List[ProjectResponse])
 def get_projects(
     region: Optional[str] = None,
@@ -84,17 +95,19 @@ def get_projects(
     winner: Optional[bool] = None,
     limit: int = Query(default=100, le=10000),
     offset: int = Query(default=0, ge=0),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     service = ProjectService(db)
-    return service.get_projects(
+    return FastJSONResponse(service.get_projects(
         region=region,
         year=year, 
         direction=direction,
         winner=winner,
         limit=limit,
-        offset=offset
-    )
+        offset=offset,
+        fields=fields
+    ))
 
 @router.get("/projects/table", response_model=List[ProjectTableResponse])
 def get_projects_table(
@@ -104,12 +117,15 @@ def get_projects_table(
     winner: Optional[bool] = None,
     limit: int = Query(default=100, le=10000),
     offset: int = Query(default=0, ge=0),
-    sort_by: str = Query(default="id", description="Поле для сортировки"),
+    sort_by: str = Query(default="id", description="Поле для сортировки: " + ", ".join(SORTABLE_FIELDS)),
     sort_order: str = Query(default="asc", description="Порядок сортировки: asc/desc"),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
+    """Сочетание фильтров без индекса для sort_by сортируется по id; примененное поле — в X-Sort-By"""
     service = ProjectService(db)
-    return service.get_projects_table(
+    applied = sort_field(sort_by, active_filters(region, year, direction, winner))
+    return FastJSONResponse(service.get_projects_table(
         region=region,
         year=year,
         direction=direction,
@@ -117,19 +133,83 @@ def get_projects_table(
         limit=limit,
         offset=offset,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        fields=fields
+    ), headers={"X-Sort-By": applied})
+
+class ProjectCountResponse(BaseModel):
+    count: int
+    exact: bool
+
+@router.get("/projects/count", response_model=ProjectCountResponse, dependencies=[Depends(conditional_get)])
+def count_projects(
+    region: Optional[str] = None,
+    year: Optional[int] = None,
+    direction: Optional[str] = None,
+    winner: Optional[bool] = None,
+    exact: bool = Query(default=False, description="Точный COUNT(*) даже для широких фильтров"),
+    db: Session = Depends(get_db)
+):
+    """
+    Количество проектов для пагинации /projects/table (те же фильтры)
+    
+    Для широких фильтров возвращается оценка PostgreSQL (exact=false)
+    """
+    service = ProjectService(db)
+    return service.count_projects(
+        region=region,
+        year=year,
+        direction=direction,
+        winner=winner,
+        exact=exact
     )
 
+class FacetValue(BaseModel):
+    value: Union[bool, int, str, None]
+    count: int
+
+class FacetsResponse(BaseModel):
+    total: int
+    facets: Dict[str, List[FacetValue]]
+
+@router.get("/projects/facets", response_model=FacetsResponse, dependencies=[Depends(conditional_get)])
+def get_project_facets(
+    region: Optional[str] = None,
+    year: Optional[int] = None,
+    direction: Optional[str] = None,
+    winner: Optional[bool] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Количество проектов по значениям region, year, direction, contest и winner
+    
+    Фильтры те же, что у /projects/table; для каждого поля его собственный
+    фильтр не учитывается
+    """
+    service = FacetService(db)
+    return service.get_facets(region=region, year=year, direction=direction, winner=winner)
+
 @router.get("/projects/export")
 def export_projects(
     region: Optional[str] = None,
     year: Optional[int] = None,
     direction: Optional[str] = None,
     winner: Optional[bool] = None,
-    format: str = Query(default="csv", description="Формат экспорта: csv/excel"),
+    format: str = Query(default="csv", description="Формат экспорта: csv/excel/parquet/arrow"),
     db: Session = Depends(get_db)
 ):
     service = ProjectService(db)
+    if format in ARROW_FORMATS:
+        # Все поля проектов, пачками из курсора, со словарными region/direction/contest
+        if not PYARROW_AVAILABLE:
+            raise HTTPException(status_code=501, detail="Экспорт в Parquet/Arrow недоступен: не установлен pyarrow")
+        batches = service.iter_export_batches(region=region, year=year, direction=direction, winner=winner)
+        extension = "parquet" if format == "parquet" else "arrow"
+        return StreamingResponse(
+            iter_arrow_export(batches, arrow_schema(ANALYTICS_COLUMNS), format),
+            media_type=ARROW_FORMATS[format],
+            headers={"Content-Disposition": f'attachment; filename="socfinder_projects.{extension}"'}
+        )
     return service.export_projects(
         region=region,
         year=year,
@@ -138,12 +218,12 @@ def export_projects(
         format=format
     )
 
-@router.get("/projects/{project_id}", response_model=ProjectDetail)
+@router.get("/projects/{project_id}", response_model=ProjectDetail, dependencies=[Depends(conditional_get)])
 def get_project(project_id: int, db: Session = Depends(get_db)):
     service = ProjectService(db)
     return service.get_project_by_id(project_id)
 
-@router.get("/projects/by-grant/{grant_id}", response_model=ProjectDetail)
+@router.get("/projects/by-grant/{grant_id}", response_model=ProjectDetail, dependencies=[Depends(conditional_get)])
 def get_project_by_grant_id(grant_id: str, db: Session = Depends(get_db)):
     """
     Получить проект по grant_id (req_num)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
+from app.core.caching import conditional_get
 from app.services.region_service import RegionService
 from pydantic import BaseModel
 
@@ -12,7 +13,7 @@ class RegionResponse(BaseModel):
     projects_count: int
     coordinates: dict
 
-@router.get("/regions", response_model=List[RegionResponse])
+@router.get("/regions", response_model=List[RegionResponse], dependencies=[Depends(conditional_get)])
 def get_regions(db: Session = Depends(get_db)):
     service = RegionService(db)
     return service.get_regions_with_stats()
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from typing import List, Optional
 from pydantic import BaseModel
-from ..core.database import get_db
+from ..core.database import get_async_db
+from ..core.serialization import rows_response
 
 router = APIRouter()
 
@@ -20,7 +21,7 @@ class GrantIdsRequest(BaseModel):
 @router.post("/api/solutions/by-grants", response_model=List[SolutionResponse])
 async def get_solutions_by_grants(
     request: GrantIdsRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить решения для списка грантов.
@@ -40,30 +41,21 @@ async def get_solutions_by_grants(
         placeholders = ','.join([':grant_id_' + str(i) for i in range(len(request.grant_ids))])
         params = {f'grant_id_{i}': grant_id for i, grant_id in enumerate(request.grant_ids)}
         
-        solutions = db.execute(text(f"""
+        solutions = await db.execute(text(f"""
             SELECT 
                 s.id,
                 s.grant_id,
                 s.solution_text,
                 pr.name as project_name,
-                s.created_at
+                CAST(s.created_at AS TEXT) as created_at
             FROM solutions s
             LEFT JOIN projects pr ON s.grant_id = pr.req_num
             WHERE s.grant_id IN ({placeholders})
             ORDER BY s.grant_id, s.created_at DESC
         """), params)
         
-        result = []
-        for row in solutions:
-            result.append(SolutionResponse(
-                id=row.id,
-                grant_id=row.grant_id,
-                solution_text=row.solution_text,
-                project_name=row.project_name,
-                created_at=str(row.created_at) if row.created_at else None
-            ))
-        
-        return result
+        # created_at уже строка (CAST в запросе) — строки кодируются в JSON напрямую
+        return rows_response(list(solutions.keys()), solutions)
         
     except Exception as e:
         raise HTTPException(
@@ -75,7 +67,7 @@ async def get_solutions_by_grants(
 async def get_solutions(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить список всех решений с информацией о проектах.
@@ -89,30 +81,20 @@ async def get_solutions(
         Список решений с информацией о проектах
     """
     try:
-        solutions = db.execute(text("""
+        solutions = await db.execute(text("""
             SELECT 
                 s.id,
                 s.grant_id,
                 s.solution_text,
                 pr.name as project_name,
-                s.created_at
+                CAST(s.created_at AS TEXT) as created_at
             FROM solutions s
             LEFT JOIN projects pr ON s.grant_id = pr.req_num
             ORDER BY s.created_at DESC
             LIMIT :limit OFFSET :skip
         """), {"limit": limit, "skip": skip})
         
-        result = []
-        for row in solutions:
-            result.append(SolutionResponse(
-                id=row.id,
-                grant_id=row.grant_id,
-                solution_text=row.solution_text,
-                project_name=row.project_name,
-                created_at=str(row.created_at) if row.created_at else None
-            ))
-        
-        return result
+        return rows_response(list(solutions.keys()), solutions)
         
     except Exception as e:
         raise HTTPException(
@@ -121,7 +103,7 @@ async def get_solutions(
         )
 
 @router.get("/api/solutions/count")
-async def get_solutions_count(db: Session = Depends(get_db)):
+async def get_solutions_count(db: AsyncSession = Depends(get_async_db)):
     """
     Получить общее количество решений.
     
@@ -132,7 +114,7 @@ async def get_solutions_count(db: Session = Depends(get_db)):
         Общее количество решений
     """
     try:
-        result = db.execute(text("SELECT COUNT(*) as count FROM solutions"))
+        result = await db.execute(text("SELECT COUNT(*) as count FROM solutions"))
         count = result.fetchone().count
         return {"count": count}
         
@@ -145,7 +127,7 @@ async def get_solutions_count(db: Session = Depends(get_db)):
 @router.get("/api/solutions/by-grant/{grant_id}")
 async def get_solutions_by_grant(
     grant_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить решения для конкретного гранта.
@@ -158,30 +140,20 @@ async def get_solutions_by_grant(
         Список решений для указанного гранта
     """
     try:
-        solutions = db.execute(text("""
+        solutions = await db.execute(text("""
             SELECT 
                 s.id,
                 s.grant_id,
                 s.solution_text,
                 pr.name as project_name,
-                s.created_at
+                CAST(s.created_at AS TEXT) as created_at
             FROM solutions s
             LEFT JOIN projects pr ON s.grant_id = pr.req_num
             WHERE s.grant_id = :grant_id
             ORDER BY s.created_at DESC
         """), {"grant_id": grant_id})
         
-        result = []
-        for row in solutions:
-            result.append(SolutionResponse(
-                id=row.id,
-                grant_id=row.grant_id,
-                solution_text=row.solution_text,
-                project_name=row.project_name,
-                created_at=str(row.created_at) if row.created_at else None
-            ))
-        
-        return result
+        return rows_response(list(solutions.keys()), solutions)
         
     except Exception as e:
         raise HTTPException(
@@ -192,7 +164,7 @@ async def get_solutions_by_grant(
 @router.get("/api/solutions/search")
 async def search_solutions(
     query: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Поиск решений по тексту.
@@ -206,13 +178,13 @@ async def search_solutions(
     """
     try:
         search_pattern = f"%{query}%"
-        solutions = db.execute(text("""
+        solutions = await db.execute(text("""
             SELECT 
                 s.id,
                 s.grant_id,
                 s.solution_text,
                 pr.name as project_name,
-                s.created_at
+                CAST(s.created_at AS TEXT) as created_at
             FROM solutions s
             LEFT JOIN projects pr ON s.grant_id = pr.req_num
             WHERE s.solution_text ILIKE :search_pattern
@@ -220,17 +192,7 @@ async def search_solutions(
             LIMIT 50
         """), {"search_pattern": search_pattern})
         
-        result = []
-        for row in solutions:
-            result.append(SolutionResponse(
-                id=row.id,
-                grant_id=row.grant_id,
-                solution_text=row.solution_text,
-                project_name=row.project_name,
-                created_at=str(row.created_at) if row.created_at else None
-            ))
-        
-        return result
+        return rows_response(list(solutions.keys()), solutions)
         
     except Exception as e:
         raise HTTPException(
@@ -239,7 +201,7 @@ async def search_solutions(
         )
 
 @router.get("/api/solutions/stats")
-async def get_solutions_stats(db: Session = Depends(get_db)):
+async def get_solutions_stats(db: AsyncSession = Depends(get_async_db)):
     """
     Получить статистику по решениям.
     
@@ -251,20 +213,20 @@ async def get_solutions_stats(db: Session = Depends(get_db)):
     """
     try:
         # Общее количество решений
-        total_count = db.execute(text("SELECT COUNT(*) as count FROM solutions")).fetchone().count
+        total_count = (await db.execute(text("SELECT COUNT(*) as count FROM solutions"))).fetchone().count
         
         # Количество уникальных грантов с решениями
-        unique_grants = db.execute(text("SELECT COUNT(DISTINCT grant_id) as count FROM solutions")).fetchone().count
+        unique_grants = (await db.execute(text("SELECT COUNT(DISTINCT grant_id) as count FROM solutions"))).fetchone().count
         
         # Среднее количество решений на грант
-        avg_solutions = db.execute(text("""
+        avg_solutions = (await db.execute(text("""
             SELECT AVG(solution_count) as avg_count 
             FROM (
                 SELECT grant_id, COUNT(*) as solution_count 
                 FROM solutions 
                 GROUP BY grant_id
             ) as grant_solutions
-        """)).fetchone().avg_count
+        """))).fetchone().avg_count
         
         return {
             "total_solutions": total_count,
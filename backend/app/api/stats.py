@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.caching import conditional_get
 from app.services.stats_service import StatsService
 from pydantic import BaseModel
 from typing import List, Dict
@@ -26,17 +27,17 @@ class YearStats(BaseModel):
     winners_count: int
     total_money: float
 
-@router.get("/stats/overview", response_model=OverviewStats)
+@router.get("/stats/overview", response_model=OverviewStats, dependencies=[Depends(conditional_get)])
 def get_overview_stats(db: Session = Depends(get_db)):
     service = StatsService(db)
     return service.get_overview_stats()
 
-@router.get("/stats/by-region", response_model=List[RegionStats])
+@router.get("/stats/by-region", response_model=List[RegionStats], dependencies=[Depends(conditional_get)])
 def get_stats_by_region(db: Session = Depends(get_db)):
     service = StatsService(db)
     return service.get_stats_by_region()
 
-@router.get("/stats/by-year", response_model=List[YearStats])
+@router.get("/stats/by-year", response_model=List[YearStats], dependencies=[Depends(conditional_get)])
 def get_stats_by_year(db: Session = Depends(get_db)):
     service = StatsService(db)
     return service.get_stats_by_year()
@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import text
+from app.core.database import engine
+from app.core.data_version import READ_DATA_VERSION_SQL
+
+# Как долго процесс API доверяет прочитанной версии, прежде чем перечитать ее из базы
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "5"))
+# Сколько браузер и nginx могут отдавать ответ из кэша без перепроверки
+CACHE_MAX_AGE = int(os.getenv("CACHE_MAX_AGE", "60"))
+
+
+class DataVersion:
+    """Текущая версия данных с кэшем на DATA_VERSION_TTL секунд"""
+
+    def __init__(self, bind=engine, ttl: float = DATA_VERSION_TTL):
+        self.bind = bind
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.value: Optional[str] = None
+        self.expires = 0.0
+
+    def _read(self) -> str:
+        try:
+            with self.bind.connect() as conn:
+                row = conn.execute(text(READ_DATA_VERSION_SQL)).fetchone()
+        except Exception:
+            # Таблицы еще нет: данные ни разу не загружались через загрузчики
+            return "0"
+        if row is None:
+            return "0"
+        # Время обновления в токене: счетчик может начаться заново в другой базе
+        return f"{row.version}.{str(row.updated_at).replace(' ', 'T')}"
+
+    def get(self) -> str:
+        now = time.monotonic()
+        with self.lock:
+            if self.value is None or now >= self.expires:
+                self.value = self._read()
+                self.expires = now + self.ttl
+            return self.value
+
+    def invalidate(self):
+        with self.lock:
+            self.value = None
+
+
+data_version = DataVersion()
+
+
+class VersionedCache:
+    """
+    Кэш результатов, действующий до смены версии данных
+
+    Хранит не больше maxsize ключей (вытесняются самые старые); при новой
+    версии данных очищается целиком.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.version: Optional[str] = None
+        self.items: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        version = data_version.get()
+        with self.lock:
+            if version != self.version:
+                self.items.clear()
+                self.version = version
+            elif key in self.items:
+                self.items.move_to_end(key)
+                return self.items[key]
+        # Считаем без блокировки: параллельный запрос с тем же ключом посчитает то же самое
+        value = compute()
+        with self.lock:
+            if version == self.version:
+                self.items[key] = value
+                if len(self.items) > self.maxsize:
+                    self.items.popitem(last=False)
+        return value
+
+    def state(self) -> Dict:
+        """Есть ли в кэше значение и для какой версии данных оно собрано"""
+        with self.lock:
+            built = any(value is not None for value in self.items.values())
+            return {"built": built, "data_version": self.version if built else None}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Сравнение If-None-Match с ETag (слабое сравнение, как требует RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    weak = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == weak for tag in if_none_match.split(","))
+
+
+def conditional_get(request: Request, response: Response):
+    """
+    Зависимость для ресурсов только для чтения: ETag по версии данных и 304
+
+    Ответ меняется только вместе с данными или версией API, поэтому ETag не
+    зависит от тела и проверяется до выполнения обработчика.
+    """
+    etag = f'W/"{request.app.version}-{data_version.get()}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CACHE_MAX_AGE}"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
@@ -0,0 +1,214 @@
+import os
+import zlib
+from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from app.core.metrics import metrics
+
+# Brotli и zstd — опциональные зависимости; без них остается gzip
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Кодировки в порядке предпочтения сервера; пустая строка отключает сжатие
+COMPRESSION_ENCODINGS = os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip")
+# Ответы меньше порога отдаются как есть: заголовки сжатия дороже выигрыша
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))
+
+# Большие тела сжимаются в пуле потоков (zlib/brotli/zstd отпускают GIL), чтобы не занимать event loop
+THREADED_MIN_SIZE = 256 * 1024
+
+# Parquet, Arrow и Excel уже сжаты внутри формата
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+
+class GzipCompressor:
+    def __init__(self):
+        self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self):
+        self.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+COMPRESSORS = {"gzip": GzipCompressor}
+if BROTLI_AVAILABLE:
+    COMPRESSORS["br"] = BrotliCompressor
+if ZSTD_AVAILABLE:
+    COMPRESSORS["zstd"] = ZstdCompressor
+
+
+def available_encodings(setting: str = COMPRESSION_ENCODINGS) -> List[str]:
+    """Включенные в настройке кодировки, для которых установлена библиотека"""
+    return [name.strip() for name in setting.split(",") if name.strip() in COMPRESSORS]
+
+
+def negotiate_encoding(accept_encoding: Optional[str], encodings: List[str]) -> Optional[str]:
+    """
+    Выбор кодировки по Accept-Encoding
+
+    Побеждает наибольший q клиента, при равенстве — порядок encodings;
+    q=0 запрещает кодировку, * разрешает все остальные.
+    """
+    if not accept_encoding or not encodings:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    default = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for name in encodings:
+        weight = weights.get(name, default)
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+class CompressionMiddleware:
+    """
+    ASGI-middleware сжатия ответов (zstd, brotli, gzip)
+
+    Ответ целиком в одном сообщении сжимается, только если он не меньше
+    minimum_size; потоковые ответы (выгрузки) сжимаются по частям без
+    буферизации. В метрики попадает размер тел до и после сжатия.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, encodings: Optional[List[str]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings() if encodings is None else encodings
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await CompressionResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class CompressionResponder:
+    def __init__(self, app, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send = None
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+        self.raw_size = 0
+        self.compressed_size = 0
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Заголовки отправляются вместе с первой частью тела: до нее неизвестен размер
+            message["headers"] = list(message.get("headers", []))
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            # Диапазоны (206, Content-Range, Accept-Ranges) описывают несжатые байты — такие ответы не трогаем
+            self.passthrough = (
+                "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+                or message.get("status") == 206
+                or "content-range" in headers
+                or headers.get("accept-ranges", "").lower() == "bytes"
+            )
+            self.start_message = message
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            self.compressor = COMPRESSORS[self.encoding]()
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                if len(body) >= THREADED_MIN_SIZE:
+                    compressed = await run_in_threadpool(self.compress_all, body)
+                else:
+                    compressed = self.compress_all(body)
+                headers["Content-Length"] = str(len(compressed))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": compressed})
+                self.observe(len(body), len(compressed))
+                return
+            await self.send(self.start_message)
+
+        chunk = self.compressor.compress(body)
+        self.raw_size += len(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        self.compressed_size += len(chunk)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if not more_body:
+            self.observe(self.raw_size, self.compressed_size)
+
+    def compress_all(self, body: bytes) -> bytes:
+        return self.compressor.compress(body) + self.compressor.finish()
+
+    def observe(self, raw_size: int, compressed_size: int):
+        metrics.observe_compression(self.encoding, raw_size, compressed_size)
@@ -0,0 +1,28 @@
+"""
+Счетчик версии данных
+
+Загрузчики и сохранение результатов анализа увеличивают версию в той же
+транзакции, что меняет данные; API строит по ней ETag ответов только для
+чтения. Модуль без зависимостей, чтобы его могли импортировать скрипты
+из data/scripts (курсор DB-API: psycopg2 или sqlite3).
+"""
+
+DATA_VERSION_TABLE = "data_version"
+DATA_VERSION_DDL = f"""
+CREATE TABLE IF NOT EXISTS {DATA_VERSION_TABLE} (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version BIGINT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+BUMP_DATA_VERSION_SQL = f"""
+INSERT INTO {DATA_VERSION_TABLE} (id, version, updated_at) VALUES (1, 1, CURRENT_TIMESTAMP)
+ON CONFLICT (id) DO UPDATE SET version = {DATA_VERSION_TABLE}.version + 1, updated_at = CURRENT_TIMESTAMP
+"""
+READ_DATA_VERSION_SQL = f"SELECT version, updated_at FROM {DATA_VERSION_TABLE} WHERE id = 1"
+
+
+def bump_data_version(cursor):
+    """Увеличивает версию данных; вызывается в транзакции, которая меняет данные"""
+    cursor.execute(DATA_VERSION_DDL)
+    cursor.execute(BUMP_DATA_VERSION_SQL)
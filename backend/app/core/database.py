@@ -1,18 +1,67 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 import os
 
 # Database URL из переменной окружения
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./socfinder.db")
 
+# Соединений PostgreSQL на воркер всего: синхронный и асинхронный пулы делят это число
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+# Из них — асинхронному пулу (маршруты проблем и решений)
+ASYNC_POOL_SIZE = int(os.getenv("ASYNC_POOL_SIZE", "5"))
+if not 0 < ASYNC_POOL_SIZE < DB_POOL_SIZE:
+    raise ValueError(f"ASYNC_POOL_SIZE должен быть от 1 до {DB_POOL_SIZE - 1} (DB_POOL_SIZE={DB_POOL_SIZE})")
+
+# Асинхронные драйверы для тех же баз
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str) -> str:
+    """URL с асинхронным драйвером: postgresql:// -> postgresql+asyncpg://"""
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    if dialect not in ASYNC_DRIVERS:
+        raise ValueError(f"Нет асинхронного драйвера для {dialect}")
+    # Параметр host=/путь/к/сокету asyncpg понимает так же, как psycopg2
+    return f"{ASYNC_DRIVERS[dialect]}://{rest}"
+
+
+def create_async_db_engine(url: str):
+    """Асинхронный движок с собственным пулом на ASYNC_POOL_SIZE соединений"""
+    if url.startswith("postgresql"):
+        return create_async_engine(
+            async_database_url(url),
+            pool_size=ASYNC_POOL_SIZE,
+            max_overflow=0,
+            pool_pre_ping=True,
+            pool_recycle=300
+        )
+    return create_async_engine(async_database_url(url))
+
+
+# Асинхронный движок для маршрутов, которые не должны блокировать event loop
+# (проблемы и решения); без asyncpg/aiosqlite остальной API продолжает работать
+try:
+    async_engine = create_async_db_engine(DATABASE_URL)
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+    ASYNC_AVAILABLE = True
+except (ImportError, ValueError):
+    async_engine = None
+    AsyncSessionLocal = None
+    ASYNC_AVAILABLE = False
+
 # Настройки подключения в зависимости от типа БД
 if "sqlite" in DATABASE_URL:
     engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 elif "postgresql" in DATABASE_URL:
+    # Без асинхронного драйвера все соединения воркера остаются синхронному пулу
     engine = create_engine(
         DATABASE_URL,
-        pool_size=20,
+        pool_size=DB_POOL_SIZE - ASYNC_POOL_SIZE if ASYNC_AVAILABLE else DB_POOL_SIZE,
         max_overflow=0,
         pool_pre_ping=True,
         pool_recycle=300
@@ -31,4 +80,8 @@ def get_db():
     finally:
         db.close()
 
-
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Асинхронный доступ к базе недоступен: установите asyncpg/aiosqlite")
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,214 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+# Запросы дольше порога пишутся в лог вместе с планом EXPLAIN
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+
+# Границы корзин гистограммы длительности запросов (как в prometheus_client)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+class RequestStats:
+    """SQL-статистика одного HTTP-запроса"""
+
+    __slots__ = ("sql_count", "sql_seconds", "rows")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class Metrics:
+    """
+    Метрики API в памяти процесса, отдаются в текстовом формате Prometheus
+
+    Для каждого маршрута: гистограмма длительности, число SQL-запросов,
+    суммарное время SQL и количество прочитанных строк.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        # (method, route, status) -> [счетчики корзин..., +Inf], сумма
+        self.latency: Dict[Tuple[str, str, str], Tuple[List[int], List[float]]] = {}
+        # route -> [sql_count, sql_seconds, rows]
+        self.sql: Dict[str, List[float]] = {}
+        self.slow_queries = 0
+        # encoding -> [байт до сжатия, байт после]
+        self.compression: Dict[str, List[int]] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        key = (method, route, str(status))
+        with self.lock:
+            counts, total = self.latency.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect_left(self.buckets, seconds)] += 1
+            total[0] += seconds
+            sql = self.sql.setdefault(route, [0, 0.0, 0])
+            sql[0] += stats.sql_count
+            sql[1] += stats.sql_seconds
+            sql[2] += stats.rows
+
+    def observe_compression(self, encoding: str, raw_size: int, compressed_size: int):
+        with self.lock:
+            sizes = self.compression.setdefault(encoding, [0, 0])
+            sizes[0] += raw_size
+            sizes[1] += compressed_size
+
+    def render(self) -> str:
+        """Метрики в текстовом формате Prometheus 0.0.4"""
+        lines = [
+            "# HELP socfinder_http_request_duration_seconds Длительность HTTP-запросов",
+            "# TYPE socfinder_http_request_duration_seconds histogram",
+        ]
+        with self.lock:
+            for (method, route, status), (counts, total) in sorted(self.latency.items()):
+                labels = f'method="{method}",route="{route}",status="{status}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f'socfinder_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                cumulative += counts[-1]
+                lines.append(f'socfinder_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+                lines.append(f"socfinder_http_request_duration_seconds_sum{{{labels}}} {total[0]}")
+                lines.append(f"socfinder_http_request_duration_seconds_count{{{labels}}} {cumulative}")
+
+            for name, idx, help_text in (
+                ("socfinder_sql_queries_total", 0, "Количество SQL-запросов"),
+                ("socfinder_sql_duration_seconds_total", 1, "Суммарное время SQL-запросов"),
+                ("socfinder_sql_rows_total", 2, "Количество строк, прочитанных из базы"),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for route, values in sorted(self.sql.items()):
+                    lines.append(f'{name}{{route="{route}"}} {values[idx]}')
+
+            lines.append("# HELP socfinder_sql_slow_queries_total Запросы дольше SLOW_QUERY_MS")
+            lines.append("# TYPE socfinder_sql_slow_queries_total counter")
+            lines.append(f"socfinder_sql_slow_queries_total {self.slow_queries}")
+
+            lines.append("# HELP socfinder_http_response_bytes_total Размер тел сжатых ответов до и после сжатия")
+            lines.append("# TYPE socfinder_http_response_bytes_total counter")
+            for encoding, (raw_size, compressed_size) in sorted(self.compression.items()):
+                lines.append(f'socfinder_http_response_bytes_total{{encoding="{encoding}",stage="raw"}} {raw_size}')
+                lines.append(f'socfinder_http_response_bytes_total{{encoding="{encoding}",stage="compressed"}} {compressed_size}')
+            lines.append("# HELP socfinder_http_compression_ratio Степень сжатия ответов (до / после)")
+            lines.append("# TYPE socfinder_http_compression_ratio gauge")
+            for encoding, (raw_size, compressed_size) in sorted(self.compression.items()):
+                ratio = raw_size / compressed_size if compressed_size else 0.0
+                lines.append(f'socfinder_http_compression_ratio{{encoding="{encoding}"}} {ratio:.2f}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def _explain(conn, cursor, statement: str, parameters) -> str:
+    """План запроса; ошибка EXPLAIN не должна ломать транзакцию запроса"""
+    dialect = conn.dialect.name
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    # Курсор из пула, а не cursor.connection: у async-адаптеров его нет
+    explain_cursor = conn.connection.cursor()
+    try:
+        if dialect == "postgresql":
+            explain_cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            plan = "\n".join(" ".join(str(col) for col in row) for row in explain_cursor.fetchall())
+        except Exception as e:
+            if dialect == "postgresql":
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return f"EXPLAIN не выполнен: {e}"
+        if dialect == "postgresql":
+            explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    finally:
+        explain_cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_seconds += elapsed
+        # Для SELECT psycopg2 сообщает число строк, SQLite — -1
+        if cursor.rowcount and cursor.rowcount > 0:
+            stats.rows += cursor.rowcount
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        with metrics.lock:
+            metrics.slow_queries += 1
+        plan = None
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            plan = _explain(conn, cursor, statement, parameters)
+        slow_query_logger.warning(
+            f"🐢 Медленный запрос {elapsed * 1000:.1f} мс:\n{statement}\n"
+            f"Параметры: {parameters}\nПлан:\n{plan}"
+        )
+
+
+def instrument_engine(engine):
+    """Подключает учет SQL-запросов к движку SQLAlchemy"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class TimingMiddleware:
+    """
+    ASGI-middleware: время запроса, SQL-статистика и заголовок Server-Timing
+
+    Заголовок отражает время до начала ответа; в метрики попадает полное
+    время, включая потоковую отдачу тела (выгрузки).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - started
+                server_timing = (
+                    f'app;dur={elapsed * 1000:.1f}, '
+                    f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.sql_count} queries, {stats.rows} rows"'
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", server_timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            # Шаблон пути (/api/v1/projects/{project_id}), а не сам путь — иначе метрик будет по числу id
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            metrics.observe(scope["method"], route_path, status, time.perf_counter() - started, stats)
@@ -0,0 +1,49 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, Sequence
+from fastapi.responses import Response
+
+# Быстрая сериализация списков (orjson), без него — стандартный json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _default(value: Any):
+    """Типы, которые не умеет кодировать сериализатор сам"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+
+def dumps(content: Any) -> bytes:
+    """JSON в байтах: orjson, если установлен, иначе json из стандартной библиотеки"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON-ответ без валидации response_model
+
+    FastAPI отдает Response как есть, поэтому response_model маршрута остается
+    только для схемы OpenAPI, а строки из базы кодируются сразу в байты, без
+    создания Pydantic-модели на каждую строку. Поля и типы строк должны
+    совпадать со схемой — это обеспечивает сам SQL-запрос.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def rows_response(keys: Sequence[str], rows: Iterable[Sequence[Any]]) -> FastJSONResponse:
+    """Ответ со списком объектов из кортежей строк результата"""
+    return FastJSONResponse([dict(zip(keys, row)) for row in rows])
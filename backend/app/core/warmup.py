@@ -0,0 +1,72 @@
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# STARTUP_RESTORE=background — при старте API в фоне восстановить базу из дампа,
+# если версия данных в базе отстает от дампа (restore_from_full_dump.py --if-stale)
+STARTUP_RESTORE = os.getenv("STARTUP_RESTORE", "off")
+RESTORE_SCRIPT = os.getenv("RESTORE_SCRIPT", "data/scripts/restore_from_full_dump.py")
+
+
+class Warmup:
+    """Состояние фонового восстановления базы при старте"""
+
+    def __init__(self, command: Optional[List[str]] = None):
+        self.command = command or [sys.executable, RESTORE_SCRIPT, "--if-stale"]
+        self.status = "ready"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Запускает восстановление в отдельном потоке, API сразу принимает запросы"""
+        if self._thread is not None:
+            return
+        self.status = "warming"
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="startup-restore", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            result = subprocess.run(self.command, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip()
+                                   else f"код возврата {result.returncode}")
+            self.status = "ready"
+            logger.info(f"✅ База готова за {time.time() - self.started_at:.1f} сек")
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            logger.error(f"❌ Ошибка восстановления базы при старте: {e}")
+        finally:
+            self.finished_at = time.time()
+
+    def wait(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def state(self) -> Dict:
+        state = {"status": self.status}
+        if self.started_at is not None:
+            end = self.finished_at or time.time()
+            state["restore_seconds"] = round(end - self.started_at, 1)
+        if self.error:
+            state["error"] = self.error
+        return state
+
+
+warmup = Warmup()
+
+
+def start_warmup():
+    """Запуск фонового восстановления, если оно включено"""
+    if STARTUP_RESTORE == "background":
+        warmup.start()
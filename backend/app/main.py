@@ -1,6 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import projects, regions, stats, problems, solutions
+from app.api import projects, regions, stats, problems, solutions, exports, health, metrics
+from app.core.database import engine, async_engine
+from app.core.metrics import TimingMiddleware, instrument_engine
+from app.core.compression import CompressionMiddleware
+from app.core.warmup import start_warmup
+from app.services.columnar_snapshot import start_preload
 
 app = FastAPI(title="SocFinder API", version="1.0.0")
 
@@ -11,21 +16,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Sort-By"],
 )
 
+# Сжатие ответов (zstd/br/gzip по Accept-Encoding); подключено до TimingMiddleware,
+# поэтому время сжатия входит во время запроса
+app.add_middleware(CompressionMiddleware)
+
+# Время запросов и SQL-статистика: заголовок Server-Timing и /metrics
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+app.add_middleware(TimingMiddleware)
+
 # Подключение роутеров
 app.include_router(projects.router, prefix="/api/v1")
 app.include_router(regions.router, prefix="/api/v1")
 app.include_router(stats.router, prefix="/api/v1")
+app.include_router(exports.router, prefix="/api/v1")
 app.include_router(problems.router)
 app.include_router(solutions.router)
+app.include_router(health.router)
+app.include_router(metrics.router)
+
+@app.on_event("startup")
+def on_startup():
+    start_warmup()
+    start_preload()
 
 @app.get("/")
 def read_root():
     return {"message": "SocFinder API is running"}
-
-@app.get("/health")
-def health_check():
-    return {"status": "healthy"}
-
-
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, BigInteger, Date, Float, Text, Numeric
+from sqlalchemy import Column, Integer, String, Boolean, BigInteger, Date, Float, Text, Numeric, Index
 from sqlalchemy.types import JSON
 from app.core.database import Base
 
@@ -6,15 +6,15 @@ class Project(Base):
     __tablename__ = "projects"
 
     # Основные поля (1-4)
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
     contest = Column(String)
-    year = Column(Integer, index=True)
-    direction = Column(String, index=True)
+    year = Column(Integer)
+    direction = Column(String)
     
     # Даты и регион (5-6)
     date_req = Column(Date)
-    region = Column(String, index=True)
+    region = Column(String)
     
     # Организация (7-9)
     org = Column(String, index=True)
@@ -26,7 +26,7 @@ class Project(Base):
     implem_end = Column(Date)
     
     # Статус и рейтинг (12-13)
-    winner = Column(Boolean, index=True)
+    winner = Column(Boolean)
     rate = Column(Float)
     
     # Финансы (14-16)
@@ -56,4 +56,20 @@ class Project(Base):
     # Дополнительные поля
     coordinates = Column(JSON)  # {lat, lng} - вычисляемое поле
 
+    # Индексы сортировок /projects/table (SORT_FILTERS в project_service): ведущие колонки —
+    # фильтры, затем поле сортировки и id для стабильного порядка. Они же обслуживают фильтры
+    # по region, year, direction и winner, поэтому отдельных индексов на эти колонки нет.
+    # Обратный порядок (desc) читается теми же индексами обратным сканированием.
+    __table_args__ = (
+        Index("ix_projects_name_id", "name", "id"),
+        Index("ix_projects_year_id", "year", "id"),
+        Index("ix_projects_region_id", "region", "id"),
+        Index("ix_projects_direction_id", "direction", "id"),
+        Index("ix_projects_winner_id", "winner", "id"),
+        Index("ix_projects_money_id", "money_req_grant", "id"),
+        Index("ix_projects_region_year_id", "region", "year", "id"),
+        Index("ix_projects_winner_money_id", "winner", "money_req_grant", "id"),
+        Index("ix_projects_year_money_id", "year", "money_req_grant", "id"),
+    )
+
 
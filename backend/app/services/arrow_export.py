@@ -0,0 +1,147 @@
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Форматы для аналитиков: Parquet и Arrow IPC (Feather v2, читается pd.read_feather)
+ARROW_FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+# Колонки с небольшим числом различных значений пишутся словарем
+DICTIONARY_COLUMNS = {"region", "direction", "contest"}
+
+
+def arrow_type(column) -> "pa.DataType":
+    """Тип Arrow для колонки SQLAlchemy"""
+    from sqlalchemy import Boolean, Date, Float, Integer, Numeric
+
+    if column.name in DICTIONARY_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, (Float, Numeric)):
+        return pa.float64()
+    if isinstance(column.type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+def arrow_schema(columns: Sequence) -> "pa.Schema":
+    """Схема Arrow для списка колонок SQLAlchemy"""
+    return pa.schema([pa.field(column.name, arrow_type(column)) for column in columns])
+
+
+class DictionaryEncoder:
+    """
+    Словарное кодирование колонки, общее для всех пачек
+
+    Словарь только растет, поэтому словарь каждой следующей пачки — продолжение
+    предыдущего, и писатель Arrow IPC может отправлять только дельты.
+    """
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, values: Iterable) -> "pa.DictionaryArray":
+        indices = []
+        for value in values:
+            if value is None:
+                indices.append(None)
+                continue
+            position = self.index.get(value)
+            if position is None:
+                position = self.index[value] = len(self.values)
+                self.values.append(value)
+            indices.append(position)
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, type=pa.int32()), pa.array(self.values, type=pa.string())
+        )
+
+
+def record_batch(rows: List[Sequence], schema: "pa.Schema",
+                 encoders: Dict[str, DictionaryEncoder]) -> "pa.RecordBatch":
+    """Пачка строк из базы (кортежи в порядке схемы) в RecordBatch"""
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    arrays = []
+    for idx, field in enumerate(schema):
+        values = columns[idx]
+        if field.name in encoders:
+            arrays.append(encoders[field.name].encode(values))
+        elif pa.types.is_floating(field.type):
+            # Numeric приходит как Decimal
+            arrays.append(pa.array([None if v is None else float(v) for v in values], type=field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    """Файлоподобный приемник, из которого записанные байты забираются по частям"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_arrow_export(batches: Iterable[List[Sequence]], schema: "pa.Schema",
+                      format: str) -> Iterator[bytes]:
+    """
+    Пишет пачки строк в Parquet или Arrow IPC и отдает байты по мере записи
+
+    В памяти держится одна пачка строк и ее закодированный вид, поэтому
+    результат можно сразу отдавать клиенту через StreamingResponse.
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow не установлен")
+
+    sink = _ChunkSink()
+    output = pa.PythonFile(sink, mode="w")
+    if format == "parquet":
+        writer = pq.ParquetWriter(output, schema, compression="zstd")
+    else:
+        options = pa.ipc.IpcWriteOptions(compression="zstd", emit_dictionary_deltas=True)
+        writer = pa.ipc.new_file(output, schema, options=options)
+
+    encoders = {field.name: DictionaryEncoder() for field in schema if field.name in DICTIONARY_COLUMNS}
+    for rows in batches:
+        if not rows:
+            continue
+        writer.write_batch(record_batch(rows, schema, encoders))
+        data = sink.take()
+        if data:
+            yield data
+
+    writer.close()
+    data = sink.take()
+    if data:
+        yield data
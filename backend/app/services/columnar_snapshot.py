@@ -0,0 +1,154 @@
+import os
+import logging
+import threading
+import numpy as np
+from sqlalchemy import Float, func, select, type_coerce
+from app.core.caching import VersionedCache
+from app.models.project import Project
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Снимок включен по умолчанию; COLUMNAR_SNAPSHOT=0 — статистика снова считается SQL-запросами
+COLUMNAR_SNAPSHOT = os.getenv("COLUMNAR_SNAPSHOT", "1") == "1"
+
+# Колонки с небольшим числом значений хранятся кодами словаря, числовые — float64 (NaN вместо NULL)
+CATEGORICAL_COLUMNS = ("region", "year", "direction", "contest", "winner")
+NUMERIC_COLUMNS = ("money_req_grant", "rate")
+
+# Снимок один на базу и перечитывается при новой версии данных
+snapshot_cache = VersionedCache(maxsize=1)
+_load_lock = threading.Lock()
+
+
+def _sort_key(value: Any) -> Tuple:
+    # None в конце, как NULL при ORDER BY в PostgreSQL
+    return (value is None, value if value is not None else 0)
+
+
+def encode(values: List[Any]) -> Tuple[List[Any], np.ndarray]:
+    """Словарное кодирование: отсортированные значения и массив их кодов"""
+    dictionary = sorted(set(values), key=_sort_key)
+    index = {value: code for code, value in enumerate(dictionary)}
+    codes = np.fromiter((index[value] for value in values), dtype=np.int32, count=len(values))
+    return dictionary, codes
+
+
+class ProjectColumns:
+    """
+    Колоночный снимок таблицы projects в памяти процесса
+
+    Для region, year, direction, contest и winner — словарь значений и массив
+    кодов int32, для money_req_grant и rate — float64. Группировки считаются
+    np.bincount по кодам, без обращения к базе.
+    """
+
+    def __init__(self, columns: Dict[str, List[Any]], organizations_count: int):
+        self.size = len(columns["region"])
+        self.values: Dict[str, List[Any]] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        for name in CATEGORICAL_COLUMNS:
+            self.values[name], self.codes[name] = encode(columns[name])
+        self.numbers: Dict[str, np.ndarray] = {
+            name: np.array([np.nan if value is None else value for value in columns[name]], dtype=np.float64)
+            for name in NUMERIC_COLUMNS
+        }
+        self.organizations_count = organizations_count
+        # Общие для всех группировок маски и суммы считаются один раз при загрузке
+        self.winners = self._winners_mask()
+        self.winner_money = np.nan_to_num(self.numbers["money_req_grant"][self.winners])
+
+    @classmethod
+    def from_db(cls, bind) -> "ProjectColumns":
+        query = select(
+            *[getattr(Project, name) for name in CATEGORICAL_COLUMNS],
+            *[type_coerce(getattr(Project, name), Float) for name in NUMERIC_COLUMNS]
+        )
+        with bind.connect() as conn:
+            rows = conn.execute(query).all()
+            organizations_count = conn.execute(select(func.count(func.distinct(Project.org)))).scalar()
+        names = CATEGORICAL_COLUMNS + NUMERIC_COLUMNS
+        columns = {name: [row[position] for row in rows] for position, name in enumerate(names)}
+        return cls(columns, organizations_count or 0)
+
+    def code_of(self, name: str, value: Any) -> Optional[int]:
+        try:
+            return self.values[name].index(value)
+        except ValueError:
+            return None
+
+    def _winners_mask(self) -> np.ndarray:
+        code = self.code_of("winner", True)
+        if code is None:
+            return np.zeros(self.size, dtype=bool)
+        return self.codes["winner"] == code
+
+    def group_by(self, name: str) -> List[Dict]:
+        """Количество проектов, победителей и сумма заявок победителей по значениям колонки"""
+        codes = self.codes[name]
+        size = len(self.values[name])
+        winner_codes = codes[self.winners]
+        projects_count = np.bincount(codes, minlength=size)
+        winners_count = np.bincount(winner_codes, minlength=size)
+        total_money = np.bincount(winner_codes, weights=self.winner_money, minlength=size)
+        return [
+            {
+                name: value,
+                "projects_count": int(projects_count[code]),
+                "winners_count": int(winners_count[code]),
+                "total_money": float(total_money[code])
+            }
+            for code, value in enumerate(self.values[name])
+            if projects_count[code]
+        ]
+
+    def overview(self) -> Dict:
+        regions = self.values["region"]
+        return {
+            "total_projects": self.size,
+            "total_winners": int(self.winners.sum()),
+            "total_money": float(self.winner_money.sum()),
+            "regions_count": len(regions) - (None in regions),
+            "organizations_count": self.organizations_count
+        }
+
+
+def get_project_columns(db) -> Optional[ProjectColumns]:
+    """
+    Снимок для базы сессии или None, если снимок выключен или не загрузился
+
+    Загрузка идет отдельным соединением, чтобы ошибка не ломала транзакцию
+    сессии: вызывающий код в этом случае считает по SQL.
+    """
+    if not COLUMNAR_SNAPSHOT:
+        return None
+    bind = db.get_bind()
+
+    def load():
+        try:
+            columns = ProjectColumns.from_db(bind)
+        except Exception as e:
+            logger.warning(f"⚠️ Колоночный снимок projects не загружен: {e}")
+            return None
+        logger.info(f"📊 Колоночный снимок projects: {columns.size} строк")
+        return columns
+
+    # Загрузки последовательны: первые запросы после новой версии данных ждут одну загрузку
+    with _load_lock:
+        return snapshot_cache.get(str(bind.url), load)
+
+
+def start_preload():
+    """Загружает снимок в фоне при старте, чтобы первый запрос статистики не ждал"""
+    if not COLUMNAR_SNAPSHOT:
+        return
+    from app.core.database import SessionLocal
+
+    def preload():
+        db = SessionLocal()
+        try:
+            get_project_columns(db)
+        finally:
+            db.close()
+
+    threading.Thread(target=preload, name="columnar-preload", daemon=True).start()
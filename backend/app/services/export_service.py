@@ -0,0 +1,318 @@
+import os
+import csv
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core import caching
+from app.core.database import SessionLocal
+from app.models.project import Project
+from app.services.arrow_export import ARROW_FORMATS, PYARROW_AVAILABLE, arrow_schema, iter_arrow_export
+from app.services.project_service import (
+    ProjectService, ANALYTICS_COLUMNS, EXPORT_FIELDS, EXPORT_HEADERS, export_values, select_fields
+)
+
+logger = logging.getLogger(__name__)
+
+# Каталог готовых выгрузок (в контейнере backend — /app/exports/jobs)
+EXPORTS_DIR = os.getenv("EXPORTS_DIR", "exports")
+EXPORT_JOBS_DIR = os.path.join(EXPORTS_DIR, "jobs")
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+# Сколько секунд готовый файл считается актуальным для тех же фильтров
+EXPORT_CACHE_TTL = int(os.getenv("EXPORT_CACHE_TTL", "3600"))
+EXPORT_BATCH_SIZE = 2000
+# Строк данных на лист xlsx: предел Excel 1 048 576 строк минус заголовок
+XLSX_MAX_ROWS = 1048575
+# Задача в статусе running без обновлений дольше этого считается потерянной
+# (например, процесс uvicorn был перезапущен)
+EXPORT_STALE_SECONDS = 120
+
+EXPORT_FORMATS = {
+    # charset Starlette добавляет к text/* сам
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+if PYARROW_AVAILABLE:
+    EXPORT_FORMATS.update(ARROW_FORMATS)
+
+EXPORT_FILTERS = ("region", "year", "direction", "winner")
+
+
+def export_key(filters: Dict, format: str, data_version: str) -> str:
+    """Идентификатор выгрузки: хэш фильтров, формата и версии данных"""
+    payload = {key: filters.get(key) for key in EXPORT_FILTERS}
+    payload["format"] = format
+    # После новой загрузки данных те же фильтры дают новую выгрузку, а не файл из кэша
+    payload["data_version"] = data_version
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class ExportJobManager:
+    """
+    Фоновые выгрузки проектов
+
+    Задачи выполняются в пуле потоков, поэтому запрос на выгрузку сразу
+    возвращает идентификатор и не занимает воркер uvicorn. Состояние задачи
+    хранится в JSON-файле рядом с результатом, так что его видят все
+    процессы uvicorn. Идентификатор задачи — хэш фильтров и версии данных,
+    поэтому повторный запрос с теми же фильтрами получает готовый файл из
+    кэша. Задачу забирает тот процесс, который первым создал файл .part
+    (O_EXCL), поэтому одинаковые запросы к разным процессам не запускают
+    выгрузку дважды.
+
+    Строки читаются из курсора пачками кортежей только нужных колонок, без
+    ORM-объектов; xlsx при превышении предела Excel продолжается на
+    следующем листе.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        jobs_dir: str = EXPORT_JOBS_DIR,
+        workers: int = EXPORT_WORKERS,
+        cache_ttl: int = EXPORT_CACHE_TTL,
+        version: Optional[Callable[[], str]] = None,
+        xlsx_max_rows: int = XLSX_MAX_ROWS
+    ):
+        self.session_factory = session_factory
+        self.version = version or (lambda: caching.data_version.get())
+        self.jobs_dir = jobs_dir
+        self.cache_ttl = cache_ttl
+        self.xlsx_max_rows = xlsx_max_rows
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+        self._lock = threading.Lock()
+        self._active = set()
+
+    def _meta_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def file_path(self, job: Dict) -> str:
+        """Путь к файлу результата задачи"""
+        return os.path.join(self.jobs_dir, f"{job['job_id']}.{job['format']}")
+
+    def _claim(self, job_id: str, part_path: str) -> bool:
+        """
+        Забирает задачу атомарным созданием файла .part
+
+        Существующий .part без живой задачи (процесс упал посреди выгрузки)
+        удаляется, и попытка повторяется один раз.
+        """
+        for _ in range(2):
+            try:
+                os.close(os.open(part_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                if self._is_claimed(job_id, part_path):
+                    return False
+                try:
+                    os.remove(part_path)
+                except FileNotFoundError:
+                    pass
+        return False
+
+    def _is_claimed(self, job_id: str, part_path: str) -> bool:
+        """Задачу выполняет другой поток или процесс: свежий .part или свежий прогресс"""
+        try:
+            if time.time() - os.path.getmtime(part_path) < EXPORT_STALE_SECONDS:
+                return True
+        except FileNotFoundError:
+            return False
+        job = self.get_job(job_id)
+        return bool(
+            job and job["status"] in ("queued", "running")
+            and time.time() - job["updated_at"] < EXPORT_STALE_SECONDS
+        )
+
+    def _save(self, job: Dict):
+        job["updated_at"] = time.time()
+        tmp_path = self._meta_path(job["job_id"]) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, self._meta_path(job["job_id"]))
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Состояние задачи или None"""
+        path = self._meta_path(job_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _is_reusable(self, job: Dict) -> bool:
+        """Можно ли вернуть существующую задачу вместо новой"""
+        if job["status"] in ("queued", "running"):
+            fresh = time.time() - job["updated_at"] < EXPORT_STALE_SECONDS
+            return job["job_id"] in self._active or fresh
+        if job["status"] == "done":
+            expired = time.time() - job["finished_at"] > self.cache_ttl
+            return not expired and os.path.exists(self.file_path(job))
+        return False
+
+    def submit(self, filters: Dict, format: str) -> Dict:
+        """
+        Ставит выгрузку в очередь или возвращает уже существующую
+
+        Args:
+            filters: region, year, direction, winner
+            format: csv/xlsx/parquet/arrow
+
+        Returns:
+            Состояние задачи
+        """
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Неподдерживаемый формат: {format}")
+
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        version = self.version()
+        job_id = export_key(filters, format, version)
+
+        with self._lock:
+            job = self.get_job(job_id)
+            if job and self._is_reusable(job):
+                return job
+
+            job = {
+                "job_id": job_id,
+                "status": "queued",
+                "format": format,
+                "filters": {key: filters.get(key) for key in EXPORT_FILTERS},
+                "data_version": version,
+                "rows": 0,
+                "total": None,
+                "progress": 0.0,
+                "size": None,
+                "error": None,
+                "created_at": time.time(),
+                "finished_at": None,
+            }
+            part_path = self.file_path(job) + ".part"
+            if not self._claim(job_id, part_path):
+                # Ту же выгрузку уже выполняет другой процесс uvicorn
+                return self.get_job(job_id) or job
+            self._save(job)
+            self._active.add(job_id)
+
+        self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: Dict):
+        """Выполняет выгрузку в фоновом потоке"""
+        started = time.time()
+        final_path = self.file_path(job)
+        tmp_path = final_path + ".part"
+        db = self.session_factory()
+        try:
+            job["status"] = "running"
+            count = ProjectService.apply_filters(select(func.count()).select_from(Project), **job["filters"])
+            job["total"] = db.execute(count).scalar_one()
+            self._save(job)
+
+            arrow = job["format"] in ARROW_FORMATS
+            # Для Parquet/Arrow все поля, как у /projects/export; иначе только колонки таблицы
+            columns = ANALYTICS_COLUMNS if arrow else select_fields(None, EXPORT_FIELDS)
+            batches = ProjectService(db).iter_export_batches(
+                **job["filters"], batch_size=EXPORT_BATCH_SIZE, columns=columns
+            )
+            if arrow:
+                self._write_arrow(job, batches, tmp_path)
+            elif job["format"] == "xlsx":
+                self._write_xlsx(job, batches, tmp_path)
+            else:
+                self._write_csv(job, batches, tmp_path)
+
+            os.replace(tmp_path, final_path)
+            job.update(
+                status="done",
+                progress=1.0,
+                size=os.path.getsize(final_path),
+                finished_at=time.time()
+            )
+            self._save(job)
+            logger.info(f"Выгрузка {job['job_id']} готова: {job['rows']} строк за {time.time() - started:.1f} сек")
+        except Exception as e:
+            logger.exception(f"Ошибка выгрузки {job['job_id']}")
+            job.update(status="failed", error=str(e), finished_at=time.time())
+            self._save(job)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            db.close()
+            with self._lock:
+                self._active.discard(job["job_id"])
+
+    def _progress(self, job: Dict, rows: int):
+        job["rows"] = rows
+        job["progress"] = round(rows / job["total"], 4) if job["total"] else 0.0
+        self._save(job)
+
+    def _write_csv(self, job: Dict, batches, path: str):
+        # utf-8-sig, чтобы Excel сразу открывал кириллицу
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_HEADERS)
+            rows = 0
+            for batch in batches:
+                writer.writerows(export_values(row) for row in batch)
+                rows += len(batch)
+                self._progress(job, rows)
+            self._progress(job, rows)
+
+    def _write_xlsx(self, job: Dict, batches, path: str):
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheets = 1
+        sheet = workbook.create_sheet(title="Проекты")
+        sheet.append(EXPORT_HEADERS)
+        rows = sheet_rows = 0
+        for batch in batches:
+            for row in batch:
+                if sheet_rows == self.xlsx_max_rows:
+                    # Лист заполнен до предела Excel — продолжаем на следующем
+                    sheets += 1
+                    sheet = workbook.create_sheet(title=f"Проекты {sheets}")
+                    sheet.append(EXPORT_HEADERS)
+                    sheet_rows = 0
+                sheet.append(export_values(row))
+                sheet_rows += 1
+            rows += len(batch)
+            self._progress(job, rows)
+        self._progress(job, rows)
+        with open(path, "wb") as f:
+            workbook.save(f)
+
+    def _write_arrow(self, job: Dict, batches, path: str):
+        rows = 0
+
+        def counted():
+            nonlocal rows
+            for batch in batches:
+                yield batch
+                rows += len(batch)
+                self._progress(job, rows)
+
+        with open(path, "wb") as f:
+            for chunk in iter_arrow_export(counted(), arrow_schema(ANALYTICS_COLUMNS), job["format"]):
+                f.write(chunk)
+        self._progress(job, rows)
+
+
+_manager: Optional[ExportJobManager] = None
+
+
+def get_export_manager() -> ExportJobManager:
+    """Общий менеджер выгрузок процесса (зависимость FastAPI)"""
+    global _manager
+    if _manager is None:
+        _manager = ExportJobManager()
+    return _manager
@@ -0,0 +1,131 @@
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from app.core.caching import VersionedCache
+from app.models.project import Project
+from app.services.columnar_snapshot import ProjectColumns, encode, get_project_columns
+from typing import Any, Dict, List, Optional, Tuple
+
+# Измерения куба; фильтры списков проектов — подмножество этих полей
+FACET_DIMENSIONS = ("region", "year", "direction", "contest", "winner")
+
+# Куб один на процесс и перестраивается при новой версии данных
+cube_cache = VersionedCache(maxsize=1)
+
+
+class CountCube:
+    """
+    Число проектов по сочетаниям region × year × direction × contest × winner
+
+    Каждая непустая ячейка — строка массивов: коды значений по измерениям и
+    число проектов. Фасеты считаются np.bincount по ячейкам, а не по проектам,
+    поэтому время не зависит от размера таблицы.
+    """
+
+    def __init__(self, values: Dict[str, List[Any]], codes: Dict[str, np.ndarray], counts: np.ndarray):
+        self.values = values
+        self.index = {
+            dimension: {value: code for code, value in enumerate(dimension_values)}
+            for dimension, dimension_values in values.items()
+        }
+        self.codes = codes
+        self.counts = counts
+
+    @classmethod
+    def from_cells(cls, cells: List[Tuple]) -> "CountCube":
+        """Куб из строк (region, year, direction, contest, winner, count)"""
+        values, codes = {}, {}
+        for position, dimension in enumerate(FACET_DIMENSIONS):
+            values[dimension], codes[dimension] = encode([cell[position] for cell in cells])
+        counts = np.fromiter((cell[-1] for cell in cells), dtype=np.int64, count=len(cells))
+        return cls(values, codes, counts)
+
+    @classmethod
+    def from_db(cls, db: Session) -> "CountCube":
+        columns = [getattr(Project, dimension) for dimension in FACET_DIMENSIONS]
+        cells = db.query(*columns, func.count(Project.id)).group_by(*columns).all()
+        return cls.from_cells([tuple(cell) for cell in cells])
+
+    @classmethod
+    def from_columns(cls, columns: ProjectColumns) -> "CountCube":
+        """Куб из колоночного снимка: группировка по составному ключу из кодов"""
+        keys = np.zeros(columns.size, dtype=np.int64)
+        for dimension in FACET_DIMENSIONS:
+            keys = keys * len(columns.values[dimension]) + columns.codes[dimension]
+        cells, counts = np.unique(keys, return_counts=True)
+        codes = {}
+        for dimension in reversed(FACET_DIMENSIONS):
+            size = len(columns.values[dimension])
+            codes[dimension] = (cells % size).astype(np.int32)
+            cells = cells // size
+        values = {dimension: columns.values[dimension] for dimension in FACET_DIMENSIONS}
+        return cls(values, codes, counts.astype(np.int64))
+
+    def _mask(self, dimension: str, value: Any) -> np.ndarray:
+        code = self.index[dimension].get(value)
+        if code is None:
+            return np.zeros(len(self.counts), dtype=bool)
+        return self.codes[dimension] == code
+
+    def facets(self, filters: Dict[str, Any]) -> Dict:
+        """
+        Количество проектов по значениям каждого измерения при заданных фильтрах
+
+        Для измерения его собственный фильтр не применяется: в списке регионов
+        видно, сколько проектов дал бы выбор другого региона.
+        """
+        masks = {dimension: self._mask(dimension, value) for dimension, value in filters.items()}
+        everything = np.ones(len(self.counts), dtype=bool)
+
+        total_mask = everything.copy()
+        for mask in masks.values():
+            total_mask &= mask
+
+        facets = {}
+        for dimension in FACET_DIMENSIONS:
+            mask = everything.copy()
+            for other, other_mask in masks.items():
+                if other != dimension:
+                    mask &= other_mask
+            counts = np.bincount(
+                self.codes[dimension][mask],
+                weights=self.counts[mask],
+                minlength=len(self.values[dimension])
+            ).astype(np.int64)
+            facets[dimension] = [
+                {"value": value, "count": int(count)}
+                for value, count in zip(self.values[dimension], counts)
+                if count
+            ]
+        return {"total": int(self.counts[total_mask].sum()), "facets": facets}
+
+
+class FacetService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_cube(self) -> CountCube:
+        columns = get_project_columns(self.db)
+        if columns is not None:
+            # Снимок сам перечитывается при новой версии данных, куб строится по нему
+            return cube_cache.get(columns, lambda: CountCube.from_columns(columns))
+        return cube_cache.get("cube", lambda: CountCube.from_db(self.db))
+
+    def get_facets(
+        self,
+        region: Optional[str] = None,
+        year: Optional[int] = None,
+        direction: Optional[str] = None,
+        winner: Optional[bool] = None
+    ) -> Dict:
+        """Фасеты при фильтрах get_projects_table (пустые строки и 0 не фильтруют)"""
+        filters = {}
+        if region:
+            filters["region"] = region
+        if year:
+            filters["year"] = year
+        if direction:
+            filters["direction"] = direction
+        if winner is not None:
+            filters["winner"] = winner
+        return self.get_cube().facets(filters)
@@ -1,24 +1,159 @@
+import os
+import json
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import Float, Numeric, and_, false, func, select, text, type_coerce
+from app.core.caching import VersionedCache
 from app.models.project import Project
-from typing import Optional, List
+from typing import Dict, Iterator, Optional, List
 from fastapi import HTTPException
 
+# Колонки выгрузки проектов (CSV/Excel)
+EXPORT_HEADERS = ["ID", "Название", "Организация", "Регион", "Год", "Направление", "Сумма", "Статус", "Конкурс"]
+EXPORT_FIELDS = ("id", "name", "org", "region", "year", "direction", "money_req_grant", "winner", "contest")
+
+
+# Поля ответов списков (ProjectResponse / ProjectTableResponse) — только их и читаем из базы
+LIST_FIELDS = ("id", "name", "contest", "year", "direction", "region", "org", "winner", "money_req_grant", "coordinates")
+TABLE_FIELDS = ("id", "name", "org", "region", "year", "direction", "money_req_grant", "winner", "contest")
+
+# Значения вместо NULL в списках: подставляются в SELECT (COALESCE), строки отдаются как есть
+LIST_DEFAULTS = {"winner": false(), "name": "", "region": "", "org": ""}
+
+# Сортировки /projects/table и наборы фильтров, с которыми страница читается одним индексом
+# модели Project без сортировки результата: фильтры — ведущие колонки индекса, затем поле и id.
+# Прочие сочетания фильтров сортируются по id: индекс (фильтр, id) или первичный ключ и Filter
+SORT_FILTERS = {
+    "id": ((), ("region",), ("year",), ("direction",), ("winner",), ("region", "year")),
+    "name": ((),),
+    "region": ((), ("region",), ("region", "year")),
+    "year": ((), ("year",), ("region",), ("region", "year")),
+    "money_req_grant": ((), ("winner",), ("year",)),
+}
+SORTABLE_FIELDS = tuple(SORT_FILTERS)
+
+
+# Если планировщик ожидает больше строк, /projects/count отдает его оценку вместо COUNT(*)
+COUNT_ESTIMATE_THRESHOLD = int(os.getenv("COUNT_ESTIMATE_THRESHOLD", "20000"))
+
+# Счетчики по ключу фильтров; сбрасываются при новой версии данных
+count_cache = VersionedCache()
+
+
+# Колонки полной выгрузки для аналитиков (Parquet/Arrow): все поля, кроме вычисляемых
+ANALYTICS_COLUMNS = [column for column in Project.__table__.columns if column.name != "coordinates"]
+
+
+def export_values(row: tuple) -> list:
+    """Строка выгрузки из кортежа колонок EXPORT_FIELDS в порядке EXPORT_HEADERS"""
+    project_id, name, org, region, year, direction, money, winner, contest = row
+    return [
+        project_id,
+        name or "",
+        org or "",
+        region or "",
+        year or "",
+        direction or "",
+        money or 0,
+        "Победитель" if winner else "Не прошел",
+        contest or ""
+    ]
+
+
+def export_row(project: Project) -> list:
+    """Строка выгрузки для проекта в порядке EXPORT_HEADERS"""
+    return export_values(tuple(getattr(project, name) for name in EXPORT_FIELDS))
+
+
+def select_fields(fields: Optional[str], allowed: tuple) -> list:
+    """
+    Колонки для выборки по параметру fields=name,region,...
+
+    Без параметра возвращаются все поля ответа; id добавляется всегда.
+    """
+    if not fields:
+        names = list(allowed)
+    else:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Неизвестные поля: {', '.join(unknown)}. Доступны: {', '.join(allowed)}"
+            )
+        if "id" not in names:
+            names.insert(0, "id")
+        names = list(dict.fromkeys(names))
+    columns = []
+    for name in names:
+        column = Project.__table__.c[name]
+        # Суммы сразу float, а не Decimal: ответ кодируется в JSON без пост-обработки
+        if isinstance(column.type, Numeric):
+            column = type_coerce(column, Float).label(name)
+        elif name in LIST_DEFAULTS:
+            column = func.coalesce(column, LIST_DEFAULTS[name]).label(name)
+        columns.append(column)
+    return columns
+
+
+def sort_field(sort_by: str, filters: tuple = ()) -> str:
+    """
+    Поле, по которому на самом деле сортируется таблица проектов
+
+    Поле не из SORT_FILTERS отклоняется (400). Если с этими фильтрами поле
+    не читается индексом, сортировка идет по id — страница все равно
+    отдается из индекса, без сортировки всех отобранных строк.
+    """
+    if sort_by not in SORT_FILTERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Сортировка по полю {sort_by} недоступна. Доступны: {', '.join(SORTABLE_FIELDS)}"
+        )
+    if set(filters) in [set(combination) for combination in SORT_FILTERS[sort_by]]:
+        return sort_by
+    return "id"
+
+
+def sort_columns(sort_by: str, sort_order: str = "asc", filters: tuple = ()) -> list:
+    """
+    ORDER BY для таблицы проектов: поле из sort_field и id при равенстве
+
+    id идет в том же направлении, что и поле, поэтому asc и desc
+    читаются одним индексом — прямым или обратным сканированием.
+    """
+    sort_by = sort_field(sort_by, filters)
+    names = [sort_by] if sort_by == "id" else [sort_by, "id"]
+    descending = sort_order.lower() == "desc"
+    return [
+        Project.__table__.c[name].desc() if descending else Project.__table__.c[name].asc()
+        for name in names
+    ]
+
+
+def active_filters(
+    region: Optional[str] = None,
+    year: Optional[int] = None,
+    direction: Optional[str] = None,
+    winner: Optional[bool] = None
+) -> tuple:
+    """Имена фильтров, которые применит apply_filters (пустые строки и 0 не фильтруют)"""
+    values = {"region": region, "year": year, "direction": direction}
+    names = tuple(name for name, value in values.items() if value)
+    return names + ("winner",) if winner is not None else names
+
+
 class ProjectService:
     def __init__(self, db: Session):
         self.db = db
     
-    def get_projects(
-        self,
+    @staticmethod
+    def apply_filters(
+        query,
         region: Optional[str] = None,
         year: Optional[int] = None,
         direction: Optional[str] = None,
-        winner: Optional[bool] = None,
-        limit: int = 100,
-        offset: int = 0
-    ) -> List[Project]:
-        query = self.db.query(Project)
-        
+        winner: Optional[bool] = None
+    ):
+        """Применяет стандартные фильтры списка проектов к запросу"""
         filters = []
         if region:
             filters.append(Project.region == region)
@@ -31,23 +166,65 @@ class ProjectService:
         
         if filters:
             query = query.filter(and_(*filters))
-        
-        # Получаем результаты и обрабатываем None значения
-        results = query.offset(offset).limit(limit).all()
-        
-        # Исправляем None значения в winner поле для каждого проекта
-        for project in results:
-            if project.winner is None:
-                project.winner = False
-            # Исправляем другие None значения
-            if project.name is None:
-                project.name = ""
-            if project.region is None:
-                project.region = ""
-            if project.org is None:
-                project.org = ""
-        
-        return results
+        return query
+    
+    def get_projects(
+        self,
+        region: Optional[str] = None,
+        year: Optional[int] = None,
+        direction: Optional[str] = None,
+        winner: Optional[bool] = None,
+        limit: int = 100,
+        offset: int = 0,
+        fields: Optional[str] = None
+    ) -> List[dict]:
+        """Строки списка проектов: только запрошенные колонки, без ORM-объектов"""
+        columns = select_fields(fields, LIST_FIELDS)
+        query = self.apply_filters(select(*columns), region, year, direction, winner)
+        return [dict(row) for row in self.db.execute(query.offset(offset).limit(limit)).mappings()]
+    
+    def count_projects(
+        self,
+        region: Optional[str] = None,
+        year: Optional[int] = None,
+        direction: Optional[str] = None,
+        winner: Optional[bool] = None,
+        exact: bool = False
+    ) -> Dict:
+        """
+        Количество проектов под фильтрами get_projects_table
+
+        Для узких фильтров — точный COUNT(*); для широких (оценка планировщика
+        не меньше COUNT_ESTIMATE_THRESHOLD) — оценка PostgreSQL, если не
+        запрошен exact. Результат кэшируется до смены версии данных.
+        """
+        key = (region, year, direction, winner, exact)
+        return count_cache.get(key, lambda: self._count_projects(region, year, direction, winner, exact))
+
+    def _count_projects(self, region, year, direction, winner, exact: bool) -> Dict:
+        if not exact and self.db.get_bind().dialect.name == "postgresql":
+            estimate = self.estimate_projects(region, year, direction, winner)
+            if estimate is not None and estimate >= COUNT_ESTIMATE_THRESHOLD:
+                return {"count": estimate, "exact": False}
+        query = self.apply_filters(select(func.count()).select_from(Project), region, year, direction, winner)
+        return {"count": self.db.execute(query).scalar_one(), "exact": True}
+
+    def estimate_projects(self, region, year, direction, winner) -> Optional[int]:
+        """Оценка числа строк: reltuples без фильтров, иначе Plan Rows из EXPLAIN"""
+        if not (region or year or direction or winner is not None):
+            reltuples = self.db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'projects'::regclass")
+            ).scalar()
+            # -1: таблицу еще ни разу не анализировали
+            return reltuples if reltuples and reltuples > 0 else None
+        query = self.apply_filters(select(Project.id), region, year, direction, winner)
+        compiled = query.compile(dialect=self.db.get_bind().dialect)
+        plan = self.db.connection().exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
     
     def get_project_by_id(self, project_id: int) -> Project:
         project = self.db.query(Project).filter(Project.id == project_id).first()
@@ -70,46 +247,16 @@ class ProjectService:
         limit: int = 100,
         offset: int = 0,
         sort_by: str = "id",
-        sort_order: str = "asc"
-    ) -> List[Project]:
-        query = self.db.query(Project)
-        
-        filters = []
-        if region:
-            filters.append(Project.region == region)
-        if year:
-            filters.append(Project.year == year)
-        if direction:
-            filters.append(Project.direction == direction)
-        if winner is not None:
-            filters.append(Project.winner == winner)
-        
-        if filters:
-            query = query.filter(and_(*filters))
-        
-        # Сортировка
-        if hasattr(Project, sort_by):
-            sort_column = getattr(Project, sort_by)
-            if sort_order.lower() == "desc":
-                query = query.order_by(sort_column.desc())
-            else:
-                query = query.order_by(sort_column.asc())
-        
-        # Получаем результаты и обрабатываем None значения
-        results = query.offset(offset).limit(limit).all()
+        sort_order: str = "asc",
+        fields: Optional[str] = None
+    ) -> List[dict]:
+        """Строки таблицы проектов: только запрошенные колонки, без ORM-объектов"""
+        columns = select_fields(fields, TABLE_FIELDS)
+        query = self.apply_filters(select(*columns), region, year, direction, winner)
         
-        # Исправляем None значения
-        for project in results:
-            if project.winner is None:
-                project.winner = False
-            if project.name is None:
-                project.name = ""
-            if project.region is None:
-                project.region = ""
-            if project.org is None:
-                project.org = ""
-        
-        return results
+        filters = active_filters(region, year, direction, winner)
+        query = query.order_by(*sort_columns(sort_by, sort_order, filters))
+        return [dict(row) for row in self.db.execute(query.offset(offset).limit(limit)).mappings()]
     
     def export_projects(
         self,
@@ -119,44 +266,32 @@ class ProjectService:
         winner: Optional[bool] = None,
         format: str = "csv"
     ) -> dict:
-        query = self.db.query(Project)
-        
-        filters = []
-        if region:
-            filters.append(Project.region == region)
-        if year:
-            filters.append(Project.year == year)
-        if direction:
-            filters.append(Project.direction == direction)
-        if winner is not None:
-            filters.append(Project.winner == winner)
-        
-        if filters:
-            query = query.filter(and_(*filters))
-        
+        query = self.apply_filters(self.db.query(Project), region, year, direction, winner)
         projects = query.all()
         
         # Формируем CSV данные
-        csv_data = []
-        headers = ["ID", "Название", "Организация", "Регион", "Год", "Направление", "Сумма", "Статус", "Конкурс"]
-        
-        for project in projects:
-            row = [
-                project.id,
-                project.name or "",
-                project.org or "",
-                project.region or "",
-                project.year or "",
-                project.direction or "",
-                project.money_req_grant or 0,
-                "Победитель" if project.winner else "Не прошел",
-                project.contest or ""
-            ]
-            csv_data.append(row)
+        csv_data = [export_row(project) for project in projects]
         
         return {
             "format": format,
             "count": len(projects),
-            "headers": headers,
+            "headers": EXPORT_HEADERS,
             "data": csv_data
         }
+    
+    def iter_export_batches(
+        self,
+        region: Optional[str] = None,
+        year: Optional[int] = None,
+        direction: Optional[str] = None,
+        winner: Optional[bool] = None,
+        batch_size: int = 10000,
+        columns: Optional[list] = None
+    ) -> Iterator[List[tuple]]:
+        """Отфильтрованные проекты пачками кортежей колонок columns (по умолчанию ANALYTICS_COLUMNS)"""
+        query = self.apply_filters(select(*(columns or ANALYTICS_COLUMNS)), region, year, direction, winner)
+        result = self.db.execute(
+            query.order_by(Project.id).execution_options(yield_per=batch_size)
+        )
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.models.project import Project
+from app.services.columnar_snapshot import get_project_columns
 from typing import List
 
 class StatsService:
@@ -9,6 +10,10 @@ class StatsService:
     
     def get_overview_stats(self) -> dict:
         """Общая статистика по проектам"""
+        columns = get_project_columns(self.db)
+        if columns is not None:
+            return columns.overview()
+        
         total_projects = self.db.query(func.count(Project.id)).scalar()
         total_winners = self.db.query(func.count(Project.id)).filter(Project.winner == True).scalar()
         total_money = self.db.query(func.sum(Project.money_req_grant)).filter(Project.winner == True).scalar() or 0
@@ -25,6 +30,10 @@ class StatsService:
     
     def get_stats_by_region(self) -> List[dict]:
         """Статистика по регионам"""
+        columns = get_project_columns(self.db)
+        if columns is not None:
+            return [row for row in columns.group_by("region") if row["region"] is not None]
+        
         stats = (
             self.db.query(
                 Project.region,
@@ -49,6 +58,10 @@ class StatsService:
     
     def get_stats_by_year(self) -> List[dict]:
         """Статистика по годам"""
+        columns = get_project_columns(self.db)
+        if columns is not None:
+            return columns.group_by("year")
+        
         stats = (
             self.db.query(
                 Project.year,
@@ -0,0 +1,33 @@
+import os
+import random
+import sys
+
+from fastapi.routing import APIRoute
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "scripts")))
+
+from bench_api import ROUTES, Fixtures  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def sample_fixtures() -> Fixtures:
+    fixtures = Fixtures()
+    fixtures.project_ids = [1]
+    fixtures.req_nums = ["REQ-1"]
+    fixtures.analyzed_grants = ["REQ-1"]
+    fixtures.regions = ["Москва"]
+    fixtures.export_job = "job"
+    return fixtures
+
+
+def test_bench_routes_cover_every_api_route():
+    """Каждый маршрут API попадает в нагрузочный бенчмарк: новый маршрут без замера — ошибка"""
+    rng, fixtures = random.Random(0), sample_fixtures()
+    requests = [(method, make_request(rng, fixtures)[0].split("?")[0]) for _, method, make_request in ROUTES]
+    missing = [
+        f"{method} {route.path}"
+        for route in app.routes if isinstance(route, APIRoute)
+        for method in route.methods
+        if not any(method == bench_method and route.path_regex.match(path) for bench_method, path in requests)
+    ]
+    assert not missing, missing
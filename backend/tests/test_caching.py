@@ -0,0 +1,65 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.core.database import Base, get_db
+from app.core.caching import DataVersion, etag_matches
+from app.core.data_version import bump_data_version
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def version_engine(tmp_path, monkeypatch):
+    """Отдельная SQLite-база; версия данных перечитывается на каждый запрос"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'version.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr("app.core.caching.data_version", DataVersion(bind=engine, ttl=0))
+    app.dependency_overrides[get_db] = override_get_db
+    yield engine
+    app.dependency_overrides.pop(get_db, None)
+
+
+def bump(engine):
+    conn = engine.raw_connection()
+    try:
+        bump_data_version(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_conditional_get_returns_304_until_data_changes(version_engine):
+    bump(version_engine)
+    response = client.get("/api/v1/stats/by-year")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+    assert "max-age" in response.headers["cache-control"]
+
+    cached = client.get("/api/v1/stats/by-year", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    bump(version_engine)
+    fresh = client.get("/api/v1/stats/by-year", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+
+
+def test_etag_matches_weak_comparison():
+    assert etag_matches('"a", W/"1.0.0-3"', 'W/"1.0.0-3"')
+    assert etag_matches("*", 'W/"1.0.0-3"')
+    assert not etag_matches('W/"1.0.0-2"', 'W/"1.0.0-3"')
+    assert not etag_matches(None, 'W/"1.0.0-3"')
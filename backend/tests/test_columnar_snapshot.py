@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.project import Project
+from app.services.stats_service import StatsService
+from app.services.facet_service import CountCube
+from app.services.columnar_snapshot import get_project_columns
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'columns.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    for i in range(40):
+        session.add(Project(
+            name=f"Проект {i}",
+            org=f"Организация {i % 7}",
+            region=None if i == 0 else ("Москва" if i % 3 else "Тестовый регион"),
+            year=2020 + i % 4,
+            direction="Культура" if i % 2 else "Спорт",
+            contest=f"Конкурс {i % 4}",
+            winner=None if i == 1 else i % 5 == 0,
+            money_req_grant=None if i == 2 else 1000 * i,
+            rate=i / 10
+        ))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_snapshot_stats_match_sql(db, monkeypatch):
+    service = StatsService(db)
+    from_snapshot = (service.get_overview_stats(), service.get_stats_by_region(), service.get_stats_by_year())
+
+    monkeypatch.setattr("app.services.columnar_snapshot.COLUMNAR_SNAPSHOT", False)
+    overview, by_region, by_year = service.get_overview_stats(), service.get_stats_by_region(), service.get_stats_by_year()
+
+    assert from_snapshot[0] == overview
+    assert sorted(from_snapshot[1], key=lambda row: row["region"]) == sorted(by_region, key=lambda row: row["region"])
+    assert from_snapshot[2] == by_year
+
+
+def test_cube_from_snapshot_matches_cube_from_sql(db):
+    from_columns = CountCube.from_columns(get_project_columns(db))
+    from_sql = CountCube.from_db(db)
+    filters = {"region": "Москва", "winner": False}
+    assert from_columns.facets(filters) == from_sql.facets(filters)
@@ -0,0 +1,46 @@
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+
+client = TestClient(app)
+
+
+def test_negotiate_encoding_respects_quality_and_server_order():
+    encodings = ["zstd", "br", "gzip"]
+    assert negotiate_encoding("gzip, deflate, br", encodings) == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5", encodings) == "gzip"
+    assert negotiate_encoding("br;q=0, gzip", encodings) == "gzip"
+    assert negotiate_encoding("*", ["gzip"]) == "gzip"
+    assert negotiate_encoding("identity", encodings) is None
+    assert negotiate_encoding(None, encodings) is None
+
+
+def test_large_json_is_gzipped_and_small_is_not():
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json()["info"]["title"] == "SocFinder API"
+
+    small = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    plain = client.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+
+def test_streaming_response_is_compressed_in_chunks():
+    streaming_app = FastAPI()
+    streaming_app.add_middleware(CompressionMiddleware, encodings=["gzip"])
+    lines = [f"строка {i};Проект для жителей региона\n".encode() for i in range(2000)]
+
+    @streaming_app.get("/stream")
+    def stream():
+        return StreamingResponse(iter(lines), media_type="text/csv")
+
+    response = TestClient(streaming_app).get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    # httpx распаковывает тело сам
+    assert response.content == b"".join(lines)
@@ -0,0 +1,221 @@
+import io
+import os
+import time
+import pytest
+import pandas as pd
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.core.database import Base, get_db
+from app.models.project import Project
+from app.services.export_service import ExportJobManager, export_key, get_export_manager
+from app.core.compression import COMPRESSION_MIN_SIZE
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Менеджер выгрузок на отдельной тестовой базе"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'exports.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = TestingSessionLocal()
+    for i in range(30):
+        db.add(Project(
+            req_num=f"TEST-{i:03d}",
+            name=f"Проект {i}",
+            region="Тестовый регион" if i % 2 else "Другой регион",
+            year=2024,
+            winner=i % 3 == 0,
+            money_req_grant=1000 * i
+        ))
+    db.commit()
+    db.close()
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    manager = ExportJobManager(session_factory=TestingSessionLocal, jobs_dir=str(tmp_path / "jobs"))
+    app.dependency_overrides[get_export_manager] = lambda: manager
+    app.dependency_overrides[get_db] = override_get_db
+    yield manager
+    app.dependency_overrides.pop(get_export_manager, None)
+    app.dependency_overrides.pop(get_db, None)
+
+
+def wait_done(job_id: str) -> dict:
+    for _ in range(100):
+        job = client.get(f"/api/v1/exports/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("Выгрузка не завершилась")
+
+
+def test_export_job_lifecycle(manager):
+    """Задача выгрузки: постановка, прогресс, скачивание"""
+    response = client.post("/api/v1/exports", json={"region": "Тестовый регион", "format": "csv"})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    job = wait_done(job_id)
+    assert job["status"] == "done"
+    assert job["rows"] == 15
+    assert job["progress"] == 1.0
+
+    download = client.get(job["download_url"])
+    assert download.status_code == 200
+    assert download.headers["accept-ranges"] == "bytes"
+    lines = download.content.decode("utf-8-sig").strip().splitlines()
+    assert len(lines) == 16
+    assert lines[0].startswith("ID,Название")
+
+
+def test_export_cached_by_filters(manager):
+    """Повторный запрос с теми же фильтрами возвращает готовую выгрузку"""
+    first = client.post("/api/v1/exports", json={"year": 2024, "format": "xlsx"}).json()
+    wait_done(first["job_id"])
+
+    second = client.post("/api/v1/exports", json={"year": 2024, "format": "xlsx"}).json()
+    assert second["job_id"] == first["job_id"]
+    assert second["status"] == "done"
+
+    other = client.post("/api/v1/exports", json={"year": 2023, "format": "xlsx"}).json()
+    assert other["job_id"] != first["job_id"]
+
+
+def test_export_download_range(manager):
+    """Скачивание части файла по заголовку Range"""
+    job_id = client.post("/api/v1/exports", json={"format": "csv"}).json()["job_id"]
+    job = wait_done(job_id)
+    full = client.get(job["download_url"]).content
+
+    partial = client.get(job["download_url"], headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 10-19/{len(full)}"
+    assert partial.content == full[10:20]
+
+    tail = client.get(job["download_url"], headers={"Range": "bytes=-5"})
+    assert tail.content == full[-5:]
+
+    invalid = client.get(job["download_url"], headers={"Range": f"bytes={len(full)}-"})
+    assert invalid.status_code == 416
+
+
+def test_export_download_range_is_not_compressed(manager):
+    """Content-Range описывает несжатые байты: сжатие не должно менять тело диапазона"""
+    job = wait_done(client.post("/api/v1/exports", json={"format": "csv"}).json()["job_id"])
+    full = client.get(job["download_url"], headers={"Accept-Encoding": "identity"}).content
+    assert len(full) >= COMPRESSION_MIN_SIZE
+
+    partial = client.get(job["download_url"], headers={"Range": "bytes=10-99", "Accept-Encoding": "gzip"})
+    assert partial.status_code == 206
+    assert "content-encoding" not in partial.headers
+    assert partial.headers["content-length"] == "90"
+    assert partial.headers["content-range"] == f"bytes 10-99/{len(full)}"
+    assert partial.content == full[10:100]
+
+    whole = client.get(job["download_url"], headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in whole.headers
+    assert whole.content == full
+
+
+def test_export_csv_content_type(manager):
+    job = wait_done(client.post("/api/v1/exports", json={"format": "csv"}).json()["job_id"])
+    assert client.get(job["download_url"]).headers["content-type"] == "text/csv; charset=utf-8"
+
+
+def test_export_key_follows_data_version(manager, monkeypatch):
+    """После новой загрузки данных те же фильтры дают новую выгрузку"""
+    version = {"value": "1"}
+    monkeypatch.setattr(manager, "version", lambda: version["value"])
+    first = wait_done(client.post("/api/v1/exports", json={"format": "csv"}).json()["job_id"])
+    assert client.post("/api/v1/exports", json={"format": "csv"}).json()["job_id"] == first["job_id"]
+
+    version["value"] = "2"
+    second = client.post("/api/v1/exports", json={"format": "csv"}).json()
+    assert second["job_id"] != first["job_id"]
+    assert wait_done(second["job_id"])["status"] == "done"
+
+
+def test_export_claimed_by_other_process_is_not_started(manager, tmp_path):
+    """Задачу выполняет тот процесс, который первым создал .part"""
+    other = ExportJobManager(session_factory=manager.session_factory, jobs_dir=manager.jobs_dir,
+                             version=lambda: "1")
+    job_id = export_key({}, "csv", "1")
+    os.makedirs(manager.jobs_dir, exist_ok=True)
+    part_path = os.path.join(manager.jobs_dir, f"{job_id}.csv.part")
+    open(part_path, "w").close()
+
+    job = other.submit({}, "csv")
+    assert job["job_id"] == job_id
+    assert job_id not in other._active
+    assert other.get_job(job_id) is None
+
+    # .part упавшего процесса: старый и без живой задачи — задачу забирают заново
+    stale = time.time() - 3600
+    os.utime(part_path, (stale, stale))
+    other.submit({}, "csv")
+    for _ in range(100):
+        if other.get_job(job_id)["status"] == "done":
+            break
+        time.sleep(0.05)
+    assert other.get_job(job_id)["status"] == "done"
+    assert not os.path.exists(part_path)
+
+
+def test_export_xlsx_continues_on_next_sheet(manager):
+    """Строки сверх предела листа xlsx попадают на следующий лист с тем же заголовком"""
+    from openpyxl import load_workbook
+
+    manager.xlsx_max_rows = 12
+    job = wait_done(client.post("/api/v1/exports", json={"format": "xlsx"}).json()["job_id"])
+    assert job["status"] == "done"
+    assert job["rows"] == 30
+
+    workbook = load_workbook(io.BytesIO(client.get(job["download_url"]).content), read_only=True)
+    assert workbook.sheetnames == ["Проекты", "Проекты 2", "Проекты 3"]
+    sheets = [list(sheet.values) for sheet in workbook.worksheets]
+    assert [len(rows) - 1 for rows in sheets] == [12, 12, 6]
+    assert all(rows[0][:2] == ("ID", "Название") for rows in sheets)
+    ids = [row[0] for rows in sheets for row in rows[1:]]
+    assert ids == sorted(ids) and len(set(ids)) == 30
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_export_job_arrow_formats(manager, format):
+    """Фоновая выгрузка в Parquet/Arrow: все поля, как у /projects/export"""
+    job = wait_done(client.post("/api/v1/exports", json={"region": "Тестовый регион", "format": format}).json()["job_id"])
+    assert job["status"] == "done"
+    assert job["rows"] == 15
+
+    content = io.BytesIO(client.get(job["download_url"]).content)
+    df = pd.read_parquet(content) if format == "parquet" else pd.read_feather(content)
+    assert len(df) == 15
+    assert "description" in df.columns
+
+
+def test_export_unknown_format_and_job(manager):
+    assert client.post("/api/v1/exports", json={"format": "pdf"}).status_code == 400
+    assert client.get("/api/v1/exports/unknown").status_code == 404
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_projects_export_arrow_formats(manager, format):
+    """Выгрузка для аналитиков: все поля, region/direction/contest словарем"""
+    response = client.get(f"/api/v1/projects/export?format={format}&region=Тестовый регион")
+    assert response.status_code == 200
+
+    content = io.BytesIO(response.content)
+    df = pd.read_parquet(content) if format == "parquet" else pd.read_feather(content)
+    assert len(df) == 15
+    assert "description" in df.columns
+    assert df["region"].dtype == "category"
+    assert set(df["region"]) == {"Тестовый регион"}
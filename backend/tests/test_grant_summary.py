@@ -0,0 +1,85 @@
+import os
+import sys
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "scripts"))
+SCHEMA = "test_grant_summary"
+
+
+@pytest.fixture
+def postgres_url():
+    """Схема с таблицами problems/solutions в PostgreSQL из POSTGRES_TEST_URL"""
+    url = os.getenv("POSTGRES_TEST_URL")
+    if not url:
+        pytest.skip("POSTGRES_TEST_URL не задан")
+    admin = psycopg2.connect(url)
+    admin.autocommit = True
+    with admin.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+        for table in ("problems", "solutions"):
+            cursor.execute(
+                f"CREATE TABLE {SCHEMA}.{table} (id SERIAL PRIMARY KEY, grant_id TEXT, "
+                f"{table[:-1]}_text TEXT, created_at TIMESTAMP DEFAULT NOW())"
+            )
+    yield url
+    with admin.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    admin.close()
+
+
+@pytest.fixture
+def manager(postgres_url, tmp_path, monkeypatch):
+    """PostgresManager, пишущий в тестовую схему (лог скрипта — во временный каталог)"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(SCRIPTS_DIR)
+    from postgres_manager import PostgresManager
+
+    manager = PostgresManager()
+    options = f"-csearch_path={SCHEMA} -clock_timeout=2s"
+    manager.get_connection = lambda: psycopg2.connect(postgres_url, options=options)
+    return manager
+
+
+def test_save_does_not_lock_problems_after_schema_setup(manager, postgres_url):
+    """
+    DDL сводки выполняется один раз: последующие сохранения не ждут
+    SHARE-блокировку на problems, пока открыта чужая пишущая транзакция
+    """
+    from grant_summary import summary_schema_ready
+
+    assert manager.save_analysis_results([{"grant_id": "G-1", "problems": ["a"], "solutions": ["b"]}])
+    assert manager.summary_schema_ready
+
+    writer = psycopg2.connect(postgres_url, options=f"-csearch_path={SCHEMA}")
+    try:
+        with writer.cursor() as cursor:
+            # Незавершенная вставка держит ROW EXCLUSIVE, несовместимую с CREATE INDEX
+            cursor.execute("INSERT INTO problems (grant_id, problem_text) VALUES ('G-2', 'x')")
+            assert summary_schema_ready(cursor)
+        assert manager.save_analysis_results([{"grant_id": "G-1", "problems": ["c"], "solutions": []}])
+    finally:
+        writer.rollback()
+        writer.close()
+
+    with manager.get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT problems_count, solutions_count, problems_text FROM grant_analysis_summary")
+        assert cursor.fetchall() == [(2, 1, "a | c")]
+    conn.close()
+
+
+def test_first_save_backfills_summary_for_earlier_grants(manager, postgres_url):
+    """Сводка, созданная при первом сохранении, содержит и гранты, проанализированные до нее"""
+    with psycopg2.connect(postgres_url, options=f"-csearch_path={SCHEMA}") as conn, conn.cursor() as cursor:
+        cursor.execute("INSERT INTO problems (grant_id, problem_text) VALUES ('OLD-1', 'p1'), ('OLD-2', 'p2')")
+        cursor.execute("INSERT INTO solutions (grant_id, solution_text) VALUES ('OLD-2', 's2')")
+    conn.close()
+
+    assert manager.save_analysis_results([{"grant_id": "NEW-1", "problems": ["n"], "solutions": []}])
+
+    with manager.get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT grant_id, problems_count, solutions_count FROM grant_analysis_summary ORDER BY grant_id")
+        assert cursor.fetchall() == [("NEW-1", 1, 0), ("OLD-1", 1, 0), ("OLD-2", 1, 1)]
+    conn.close()
@@ -0,0 +1,111 @@
+import os
+import subprocess
+import sys
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.caching import VersionedCache
+from app.core.database import ASYNC_AVAILABLE
+from app.core.warmup import Warmup
+
+client = TestClient(app)
+
+
+def test_health_reports_warming(monkeypatch):
+    """Пока база восстанавливается, /health отвечает warming, затем healthy"""
+    state = Warmup(command=[sys.executable, "-c", "import time; time.sleep(0.5)"])
+    monkeypatch.setattr("app.api.health.warmup", state)
+
+    state.start()
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["status"] == "warming"
+
+    state.wait()
+    assert client.get("/health").json()["status"] == "healthy"
+
+
+def test_health_reports_failed_restore(monkeypatch):
+    state = Warmup(command=[sys.executable, "-c", "raise SystemExit('нет дампа')"])
+    monkeypatch.setattr("app.api.health.warmup", state)
+
+    state.start()
+    state.wait()
+    body = client.get("/health").json()
+    assert body["status"] == "failed"
+    assert body["error"] == "нет дампа"
+
+
+def test_readiness_reports_database_and_pool():
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["database"]["status"] == "ok"
+    assert body["database"]["latency_ms"] >= 0
+    assert "pool" in body
+    if ASYNC_AVAILABLE:
+        assert "async_pool" in body
+
+
+def test_readiness_not_ready_while_warming(monkeypatch):
+    state = Warmup(command=[sys.executable, "-c", "import time; time.sleep(0.5)"])
+    monkeypatch.setattr("app.api.health.warmup", state)
+
+    state.start()
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["problems"] == ["warmup: warming"]
+    state.wait()
+
+
+class FixedVersion:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+def test_readiness_reports_columnar_snapshot_and_cube(monkeypatch):
+    """Собраны ли снимок и куб фасетов и для какой версии данных"""
+    version = FixedVersion("7")
+    snapshot_cache, cube_cache = VersionedCache(maxsize=1), VersionedCache(maxsize=1)
+    monkeypatch.setattr("app.core.caching.data_version", version)
+    monkeypatch.setattr("app.services.columnar_snapshot.snapshot_cache", snapshot_cache)
+    monkeypatch.setattr("app.services.facet_service.cube_cache", cube_cache)
+
+    columnar = client.get("/health/ready").json()["columnar"]
+    assert columnar["data_version"] == "7"
+    assert columnar["snapshot"] == {"built": False, "data_version": None, "stale": False}
+    assert columnar["cube"]["built"] is False
+
+    # Неудачная загрузка снимка кэшируется как None и собранным не считается
+    snapshot_cache.get("db", lambda: None)
+    assert client.get("/health/ready").json()["columnar"]["snapshot"]["built"] is False
+
+    snapshot_cache.items.clear()
+    snapshot_cache.get("db", lambda: object())
+    cube_cache.get("cube", lambda: object())
+    columnar = client.get("/health/ready").json()["columnar"]
+    assert columnar["snapshot"] == {"built": True, "data_version": "7", "stale": False}
+    assert columnar["cube"] == {"built": True, "data_version": "7", "stale": False}
+
+    version.value = "8"
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["columnar"]["cube"] == {"built": True, "data_version": "7", "stale": True}
+
+
+@pytest.mark.skipif(not ASYNC_AVAILABLE, reason="нет асинхронного драйвера")
+def test_sync_and_async_pools_share_worker_budget():
+    """Асинхронный пул берет свои соединения из DB_POOL_SIZE, а не добавляет их сверху"""
+    code = (
+        "from app.core.database import engine, async_engine; "
+        "print(engine.pool.size(), async_engine.pool.size())"
+    )
+    env = dict(os.environ, DATABASE_URL="postgresql://user@localhost/socfinder", ASYNC_POOL_SIZE="4")
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["16", "4"]
@@ -0,0 +1,60 @@
+import csv
+import os
+import sys
+import pytest
+
+pytest.importorskip("pyarrow")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "scripts")))
+
+import parquet_snapshot  # noqa: E402
+from ingest_pipeline import SOURCE_COLUMNS, iter_source_batches, normalize_batch  # noqa: E402
+from ingest_validation import build_project_schema  # noqa: E402
+
+
+def source_row(number: int, year: int, money: str) -> list:
+    row = dict.fromkeys(SOURCE_COLUMNS, "")
+    row.update(name=f"Проект {number}", year=str(year), req_num=f"REQ-{number}", money_req_grant=money)
+    return [row[column] for column in SOURCE_COLUMNS]
+
+
+def load(path: str, source_type: str = None):
+    """Корректные номера строк и отбракованные строки, как их видит загрузчик"""
+    schema = build_project_schema()
+    row_meta = source_type == "parquet" and parquet_snapshot.has_row_meta(path)
+    row_nums, rejects, start_row = [], [], 1
+    for batch in iter_source_batches(path, 2, source_type):
+        _, batch_nums, batch_rejects = normalize_batch(batch, start_row, {}, {}, schema, row_meta)
+        row_nums += batch_nums
+        rejects += batch_rejects
+        start_row += len(batch)
+    return sorted(row_nums), sorted(rejects, key=lambda reject: reject["row_num"])
+
+
+def test_snapshot_keeps_rejects_and_source_row_numbers(tmp_path, monkeypatch):
+    monkeypatch.setattr(parquet_snapshot, "SNAPSHOTS_DIR", str(tmp_path / "snapshots"))
+    source = tmp_path / "grants.csv"
+    with open(source, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(SOURCE_COLUMNS)
+        # Годы вперемешку: снимок разбит по годам, строки в нем идут не в порядке файла
+        writer.writerow(source_row(1, 2023, "1000"))
+        writer.writerow(source_row(2, 2021, "abc"))
+        writer.writerow(source_row(3, 2023, "2000"))
+        writer.writerow(source_row(4, 2021, "3000"))
+
+    snapshot = parquet_snapshot.build_snapshot(str(source))
+    assert parquet_snapshot.find_snapshot(str(source)) == snapshot
+
+    from_csv = load(str(source))
+    from_snapshot = load(snapshot, "parquet")
+    assert from_snapshot == from_csv
+    row_nums, rejects = from_snapshot
+    assert row_nums == [1, 3, 4]
+    assert [reject["row_num"] for reject in rejects] == [2]
+    assert "money_req_grant" in rejects[0]["reasons"][0]
+    assert rejects[0]["raw"]["money_req_grant"] == "abc"
+
+    # Выборки из снимка (create_test_data) видят только корректные строки
+    names = [row[0] for batch in parquet_snapshot.iter_snapshot_batches(snapshot, 10, columns=["name"]) for row in batch]
+    assert sorted(names) == ["Проект 1", "Проект 3", "Проект 4"]
@@ -0,0 +1,39 @@
+import re
+import logging
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from app.main import app
+from app.core.metrics import instrument_engine
+
+client = TestClient(app)
+
+
+def test_server_timing_header_counts_sql():
+    response = client.get("/health/ready")
+    timing = response.headers["server-timing"]
+    assert timing.startswith("app;dur=")
+    assert 'db;dur=' in timing
+    assert int(re.search(r'(\d+) queries', timing).group(1)) >= 1
+
+
+def test_metrics_prometheus_format():
+    client.get("/health/ready")
+    client.get("/api/v1/unknown-route")
+    text = client.get("/metrics").text
+    assert "# TYPE socfinder_http_request_duration_seconds histogram" in text
+    assert 'route="/health/ready",status="200",le="+Inf"' in text
+    assert 'socfinder_sql_queries_total{route="/health/ready"}' in text
+    # Несуществующие пути не плодят отдельные серии
+    assert 'route="unmatched",status="404"' in text
+
+
+def test_slow_cte_query_is_explained(monkeypatch, caplog):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    monkeypatch.setattr("app.core.metrics.SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+        with engine.connect() as conn:
+            conn.execute(text("WITH numbers(n) AS (SELECT 1) SELECT n FROM numbers")).all()
+    message = caplog.records[-1].getMessage()
+    assert "WITH numbers" in message
+    assert "План:\nNone" not in message
@@ -0,0 +1,61 @@
+import sqlite3
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.main import app
+from app.core.database import get_async_db
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Маршруты проблем и решений на отдельной SQLite-базе через aiosqlite"""
+    db_path = tmp_path / "async.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE projects (req_num TEXT PRIMARY KEY, name TEXT);
+        CREATE TABLE problems (id INTEGER PRIMARY KEY, grant_id TEXT, problem_text TEXT, created_at TIMESTAMP);
+        CREATE TABLE solutions (id INTEGER PRIMARY KEY, grant_id TEXT, solution_text TEXT, created_at TIMESTAMP);
+        INSERT INTO projects VALUES ('24-1-000001', 'Спорт для всех');
+        INSERT INTO problems VALUES (1, '24-1-000001', 'Нет тренеров', '2024-03-01 10:00:00');
+        INSERT INTO problems VALUES (2, '24-1-000002', 'Нет площадок', '2024-03-02 10:00:00');
+        INSERT INTO solutions VALUES (1, '24-1-000001', 'Пригласим тренеров', '2024-03-01 10:00:00');
+    """)
+    conn.commit()
+    conn.close()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Контекстный менеджер держит один event loop на все запросы теста
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.pop(get_async_db, None)
+
+
+def test_problems_are_served_by_async_session(client):
+    response = client.get("/api/problems")
+    assert response.status_code == 200
+    problems = response.json()
+    assert [p["id"] for p in problems] == [2, 1]
+    assert problems[1]["project_name"] == "Спорт для всех"
+
+    assert client.get("/api/problems/count").json() == {"count": 2}
+    by_grant = client.get("/api/problems/by-grant/24-1-000001").json()
+    assert [p["problem_text"] for p in by_grant] == ["Нет тренеров"]
+
+
+def test_solutions_stats_and_bulk_lookup(client):
+    stats = client.get("/api/solutions/stats").json()
+    assert stats["total_solutions"] == 1
+    assert stats["unique_grants"] == 1
+
+    response = client.post("/api/solutions/by-grants", json={"grant_ids": ["24-1-000001"]})
+    assert response.status_code == 200
+    assert response.json()[0]["solution_text"] == "Пригласим тренеров"
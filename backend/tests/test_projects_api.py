@@ -0,0 +1,248 @@
+import itertools
+import os
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.core.database import Base, get_db
+from app.models.project import Project
+from app.core.caching import DataVersion, VersionedCache
+from app.core.data_version import bump_data_version
+from app.services.project_service import (
+    ProjectService, SORT_FILTERS, SORTABLE_FIELDS, TABLE_FIELDS, select_fields, sort_columns
+)
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def projects_db(tmp_path):
+    """Списки проектов на отдельной тестовой базе"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'projects.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = TestingSessionLocal()
+    for i in range(5):
+        db.add(Project(
+            req_num=f"TEST-{i:03d}",
+            name=f"Проект {i}" if i else None,
+            region="Тестовый регион",
+            year=2024,
+            winner=None if i == 0 else i % 2 == 0,
+            money_req_grant=1000 * i,
+            description="Длинное описание проекта " * 100
+        ))
+    db.commit()
+    db.close()
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield engine
+    app.dependency_overrides.pop(get_db, None)
+
+
+def test_projects_list_returns_all_response_fields(projects_db):
+    projects = client.get("/api/v1/projects").json()
+    assert len(projects) == 5
+    assert set(projects[0]) == {
+        "id", "name", "contest", "year", "direction", "region", "org", "winner", "money_req_grant", "coordinates"
+    }
+    # NULL в name/winner заменяется значениями по умолчанию еще в SELECT
+    assert projects[0]["name"] == ""
+    assert projects[0]["winner"] is False
+
+
+def test_projects_fields_projection(projects_db):
+    projects = client.get("/api/v1/projects", params={"fields": "name,region"}).json()
+    assert set(projects[1]) == {"id", "name", "region"}
+
+    table = client.get(
+        "/api/v1/projects/table",
+        params={"fields": "money_req_grant", "sort_by": "money_req_grant", "sort_order": "desc"}
+    ).json()
+    assert [row["money_req_grant"] for row in table] == [4000, 3000, 2000, 1000, 0]
+    assert set(table[0]) == {"id", "money_req_grant"}
+
+
+def test_projects_unknown_field_is_rejected(projects_db):
+    response = client.get("/api/v1/projects", params={"fields": "name,description"})
+    assert response.status_code == 400
+    assert "description" in response.json()["detail"]
+
+
+def test_projects_table_sort_whitelist_and_id_tiebreaker(projects_db):
+    response = client.get("/api/v1/projects/table", params={"sort_by": "description"})
+    assert response.status_code == 400
+    assert "description" in response.json()["detail"]
+
+    # Регион у всех строк одинаковый: порядок задает id в направлении сортировки
+    ascending = client.get("/api/v1/projects/table", params={"sort_by": "region", "fields": "region"}).json()
+    descending = client.get(
+        "/api/v1/projects/table", params={"sort_by": "region", "sort_order": "desc", "fields": "region"}
+    ).json()
+    assert [row["id"] for row in ascending] == [1, 2, 3, 4, 5]
+    assert [row["id"] for row in descending] == [5, 4, 3, 2, 1]
+
+
+FILTER_VALUES = {"region": "Тестовый регион", "year": 2024, "direction": "Спорт", "winner": True}
+FILTER_SETS = [
+    combination for size in range(len(FILTER_VALUES) + 1)
+    for combination in itertools.combinations(FILTER_VALUES, size)
+]
+SORT_CASES = [(sort_by, filters) for sort_by in SORTABLE_FIELDS for filters in FILTER_SETS]
+
+
+def is_allowed(sort_by, filters):
+    return set(filters) in [set(combination) for combination in SORT_FILTERS[sort_by]]
+
+
+def table_query(sort_by, filters, sort_order):
+    query = ProjectService.apply_filters(
+        select(*select_fields(None, TABLE_FIELDS)), **{name: FILTER_VALUES[name] for name in filters}
+    )
+    return query.order_by(*sort_columns(sort_by, sort_order, filters)).limit(100)
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+@pytest.mark.parametrize("sort_by,filters", SORT_CASES)
+def test_projects_table_sort_uses_index(projects_db, sort_by, filters, sort_order):
+    """
+    Каждое сочетание сортировки и фильтров отдается и читается индексом
+
+    Сочетание из SORT_FILTERS сортируется по запрошенному полю, все фильтры —
+    условия поиска по индексу; прочие сортируются по id (X-Sort-By: id).
+    """
+    params = {"sort_by": sort_by, "sort_order": sort_order, **{name: FILTER_VALUES[name] for name in filters}}
+    response = client.get("/api/v1/projects/table", params=params)
+    assert response.status_code == 200
+    allowed = is_allowed(sort_by, filters)
+    assert response.headers["x-sort-by"] == (sort_by if allowed else "id")
+    ids = [row["id"] for row in response.json()]
+    if not allowed:
+        assert ids == sorted(ids, reverse=sort_order == "desc")
+
+    compiled = table_query(sort_by, filters, sort_order).compile(projects_db, compile_kwargs={"literal_binds": True})
+    with projects_db.connect() as conn:
+        plan = " | ".join(row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}"))
+    # Строки идут в порядке индекса (для id без фильтров — первичного ключа), фильтры — условия поиска по нему
+    assert "TEMP B-TREE" not in plan, plan
+    if allowed:
+        assert all(f"{name}=?" in plan for name in filters), plan
+    elif filters:
+        # Индекс (фильтр, id), остальные фильтры проверяются по строкам
+        assert any(f"{name}=?" in plan for name in filters), plan
+
+
+@pytest.fixture
+def postgres_engine():
+    """Пустая схема в PostgreSQL из POSTGRES_TEST_URL (без переменной тест пропускается)"""
+    url = os.getenv("POSTGRES_TEST_URL")
+    if not url:
+        pytest.skip("POSTGRES_TEST_URL не задан")
+    schema = "test_sort_plans"
+    admin = create_engine(url)
+    with admin.begin() as conn:
+        conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.exec_driver_sql(f"CREATE SCHEMA {schema}")
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+    Base.metadata.create_all(bind=engine, tables=[Project.__table__])
+    with engine.begin() as conn:
+        # Статистика, при которой каждое из FILTER_VALUES встречается в 1-4% строк, а их сочетания
+        # еще реже: чтение по фильтру выгоднее первичного ключа с Filter, а составной индекс —
+        # одноколоночного с Filter, так что выбор индекса не решает ничья по стоимости
+        conn.exec_driver_sql("""
+            INSERT INTO projects (name, region, year, direction, winner, money_req_grant)
+            SELECT 'Проект ' || i,
+                   CASE i %% 85 WHEN 0 THEN 'Тестовый регион' ELSE 'Регион ' || (i %% 85) END,
+                   2000 + i %% 25,
+                   CASE i %% 12 WHEN 0 THEN 'Спорт' ELSE 'Направление ' || (i %% 12) END,
+                   i %% 50 = 0, (i * 7919) %% 3000000
+            FROM generate_series(1, 20000) AS i
+        """)
+        conn.exec_driver_sql("ANALYZE projects")
+    yield engine
+    engine.dispose()
+    with admin.begin() as conn:
+        conn.exec_driver_sql(f"DROP SCHEMA {schema} CASCADE")
+    admin.dispose()
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def test_projects_table_sort_plans_on_postgres(postgres_engine):
+    """
+    В PostgreSQL у каждого сочетания есть план без Sort
+
+    У разрешенных сочетаний все фильтры в Index Cond, у прочих (сортировка
+    по id) — хотя бы один. Сортировка и прочие способы чтения выключены:
+    если такого индекса нет, планировщику остается только план с Sort.
+    """
+    with postgres_engine.connect() as conn:
+        for setting in ("enable_sort", "enable_seqscan", "enable_bitmapscan"):
+            conn.exec_driver_sql(f"SET {setting} = off")
+        conn.exec_driver_sql("SET random_page_cost = 1.1")
+        for sort_by, filters in SORT_CASES:
+            expected = all if is_allowed(sort_by, filters) else any
+            for sort_order in ("asc", "desc"):
+                # Без LIMIT: иначе ради первых строк дешевле прочитать первичный ключ с Filter
+                compiled = table_query(sort_by, filters, sort_order).limit(None).compile(
+                    postgres_engine, compile_kwargs={"literal_binds": True}
+                )
+                plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}").scalar()[0]["Plan"]
+                nodes = list(plan_nodes(plan))
+                assert not any("Sort" in node["Node Type"] for node in nodes), (sort_by, filters, plan)
+                scan = next(node for node in nodes if node["Node Type"] in ("Index Scan", "Index Only Scan"))
+                assert not filters or expected(name in scan.get("Index Cond", "") for name in filters), \
+                    (sort_by, filters, scan)
+
+
+def test_projects_schema_kept_in_openapi():
+    """Списки кодируются без Pydantic, но схема ответа в OpenAPI остается"""
+    schema = client.get("/openapi.json").json()
+    response = schema["paths"]["/api/v1/projects"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert response["items"]["$ref"].endswith("/ProjectResponse")
+
+
+def test_projects_count_is_cached_until_data_version_changes(projects_db, monkeypatch):
+    monkeypatch.setattr("app.core.caching.data_version", DataVersion(bind=projects_db, ttl=0))
+    params = {"region": "Тестовый регион", "winner": True}
+    assert client.get("/api/v1/projects/count", params=params).json() == {"count": 2, "exact": True}
+
+    conn = projects_db.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO projects (name, region, winner) VALUES ('Новый', 'Тестовый регион', 1)")
+        conn.commit()
+        # Без новой версии данных ответ берется из кэша
+        assert client.get("/api/v1/projects/count", params=params).json()["count"] == 2
+        bump_data_version(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+    assert client.get("/api/v1/projects/count", params=params).json()["count"] == 3
+
+
+def test_projects_facets_ignore_own_filter(projects_db, monkeypatch):
+    monkeypatch.setattr("app.services.facet_service.cube_cache", VersionedCache(maxsize=1))
+    body = client.get("/api/v1/projects/facets", params={"winner": True}).json()
+    assert body["total"] == 2
+    # Фасет winner считается без фильтра winner: видны все значения
+    assert {item["value"]: item["count"] for item in body["facets"]["winner"]} == {False: 2, True: 2, None: 1}
+    assert body["facets"]["region"] == [{"value": "Тестовый регион", "count": 2}]
+    assert body["facets"]["year"] == [{"value": 2024, "count": 2}]
+
+    empty = client.get("/api/v1/projects/facets", params={"region": "Нет такого"}).json()
+    assert empty["total"] == 0
+    assert empty["facets"]["region"] == [{"value": "Тестовый регион", "count": 5}]
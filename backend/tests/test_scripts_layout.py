@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "scripts"))
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app"))
+
+
+def test_restore_script_imports_in_container_layout(tmp_path):
+    """В образе app лежит в /app/app, скрипты — в /app/data/scripts, каталога backend нет"""
+    scripts = tmp_path / "data" / "scripts"
+    scripts.mkdir(parents=True)
+    # Ссылки на файлы, а не на каталог: иначе __file__ скриптов указывает в репозиторий
+    for name in os.listdir(SCRIPTS_DIR):
+        if name.endswith(".py"):
+            os.symlink(os.path.join(SCRIPTS_DIR, name), scripts / name)
+    os.symlink(APP_DIR, tmp_path / "app")
+
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONPATH"}
+    result = subprocess.run(
+        [sys.executable, "-c", "import restore_from_full_dump, db_dump; print(db_dump.DATA_VERSION_TABLE)"],
+        cwd=scripts,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "data_version"
+
+
+def test_loader_requires_database_url(tmp_path):
+    """Без --database-url и DATABASE_URL загрузчик не подключается к базе по умолчанию, а завершается с ошибкой"""
+    env = {key: value for key, value in os.environ.items() if key != "DATABASE_URL"}
+    result = subprocess.run(
+        [sys.executable, os.path.join(SCRIPTS_DIR, "ingest_pipeline.py"), str(tmp_path / "source.csv")],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    assert result.returncode == 2
+    assert "--database-url" in result.stderr and "DATABASE_URL" in result.stderr
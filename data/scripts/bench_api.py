@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный бенчмарк API: все маршруты FastAPI с заданной конкурентностью
+
+Каждый маршрут прогоняется отдельно: N запросов в C потоках, каждый поток
+держит свое keep-alive соединение. В отчете для каждого маршрута —
+p50/p95/p99, среднее, пропускная способность и число ошибок. Отчет пишется
+в JSON, чтобы сравнивать релизы (--compare).
+
+Без --url бенчмарк сам запускает uvicorn на свободном порту против базы
+--database-url (данные готовит bench_data.py).
+
+Использование:
+    python bench_data.py --database-url sqlite:///bench.db
+    python bench_api.py --database-url sqlite:///bench.db --concurrency 8 --requests 200
+    python bench_api.py --url http://localhost:8001 --routes stats --compare ../benchmarks/api_prev.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import logging
+import argparse
+import subprocess
+import statistics
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit, quote
+
+# Настройка логирования
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+REPORTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_REQUESTS = 200
+STARTUP_TIMEOUT = 60
+EXPORT_TIMEOUT = 120
+
+# Поисковые слова из словаря bench_data.py
+SEARCH_WORDS = ["волонтеров", "экологии", "музея", "реабилитации", "молодежи"]
+
+
+class Fixtures:
+    """Значения для параметров маршрутов, собранные из самого API перед прогоном"""
+
+    def __init__(self):
+        self.project_ids: List[int] = []
+        self.req_nums: List[str] = []
+        self.analyzed_grants: List[str] = []
+        self.regions: List[str] = []
+        self.export_job: Optional[str] = None
+
+
+# (имя, метод, функция (rng, fixtures) -> (путь, тело запроса или None))
+Route = Tuple[str, str, Callable[[random.Random, Fixtures], Tuple[str, Optional[dict]]]]
+
+
+def _path(path: str, **params) -> str:
+    params = {key: value for key, value in params.items() if value is not None}
+    return f"{path}?{urlencode(params)}" if params else path
+
+
+# Все маршруты API; полноту относительно app.routes проверяет backend/tests/test_bench_api.py
+ROUTES: List[Route] = [
+    ("root", "GET", lambda r, f: ("/", None)),
+    ("health", "GET", lambda r, f: ("/health", None)),
+    ("health_ready", "GET", lambda r, f: ("/health/ready", None)),
+    ("metrics", "GET", lambda r, f: ("/metrics", None)),
+    ("projects", "GET", lambda r, f: (_path("/api/v1/projects", limit=100, offset=r.randrange(0, 100) * 100), None)),
+    ("projects_region", "GET", lambda r, f: (_path("/api/v1/projects", region=r.choice(f.regions), limit=100), None)),
+    ("projects_filtered", "GET", lambda r, f: (_path(
+        "/api/v1/projects", region=r.choice(f.regions), year=r.randint(2017, 2025), winner="true", limit=100), None)),
+    ("projects_table", "GET", lambda r, f: (_path(
+        "/api/v1/projects/table", limit=50, offset=r.randrange(0, 50) * 50,
+        sort_by=r.choice(["id", "name", "year", "money_req_grant"]), sort_order=r.choice(["asc", "desc"])), None)),
+    ("projects_count", "GET", lambda r, f: (_path(
+        "/api/v1/projects/count", region=r.choice(f.regions), winner=r.choice(["true", "false", None])), None)),
+    ("projects_facets", "GET", lambda r, f: (_path(
+        "/api/v1/projects/facets", region=r.choice(f.regions + [None]), year=r.choice([r.randint(2017, 2025), None])), None)),
+    ("project_detail", "GET", lambda r, f: (f"/api/v1/projects/{r.choice(f.project_ids)}", None)),
+    ("project_by_grant", "GET", lambda r, f: (f"/api/v1/projects/by-grant/{quote(r.choice(f.req_nums))}", None)),
+    ("projects_export_csv", "GET", lambda r, f: (_path(
+        "/api/v1/projects/export", format="csv", region=r.choice(f.regions[-20:]), year=r.randint(2017, 2025)), None)),
+    ("regions", "GET", lambda r, f: ("/api/v1/regions", None)),
+    ("stats_overview", "GET", lambda r, f: ("/api/v1/stats/overview", None)),
+    ("stats_by_region", "GET", lambda r, f: ("/api/v1/stats/by-region", None)),
+    ("stats_by_year", "GET", lambda r, f: ("/api/v1/stats/by-year", None)),
+    ("exports_create", "POST", lambda r, f: ("/api/v1/exports", {"region": r.choice(f.regions), "format": "csv"})),
+    ("exports_status", "GET", lambda r, f: (f"/api/v1/exports/{f.export_job}", None)),
+    ("exports_download", "GET", lambda r, f: (f"/api/v1/exports/{f.export_job}/download", None)),
+    ("problems", "GET", lambda r, f: (_path("/api/problems", limit=100, skip=r.randrange(0, 20) * 100), None)),
+    ("problems_count", "GET", lambda r, f: ("/api/problems/count", None)),
+    ("problems_by_grant", "GET", lambda r, f: (f"/api/problems/by-grant/{quote(r.choice(f.analyzed_grants))}", None)),
+    ("problems_search", "GET", lambda r, f: (_path("/api/problems/search", query=r.choice(SEARCH_WORDS)), None)),
+    ("solutions", "GET", lambda r, f: (_path("/api/solutions", limit=100, skip=r.randrange(0, 20) * 100), None)),
+    ("solutions_count", "GET", lambda r, f: ("/api/solutions/count", None)),
+    ("solutions_by_grant", "GET", lambda r, f: (f"/api/solutions/by-grant/{quote(r.choice(f.analyzed_grants))}", None)),
+    ("solutions_by_grants", "POST", lambda r, f: ("/api/solutions/by-grants",
+                                                  {"grant_ids": r.sample(f.analyzed_grants, min(20, len(f.analyzed_grants)))})),
+    ("solutions_search", "GET", lambda r, f: (_path("/api/solutions/search", query=r.choice(SEARCH_WORDS)), None)),
+    ("solutions_stats", "GET", lambda r, f: ("/api/solutions/stats", None)),
+]
+
+
+class Client:
+    """Keep-alive HTTP-клиент одного потока"""
+
+    def __init__(self, base_url: str, timeout: float = 120):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.conn = None
+
+    def request(self, method: str, path: str, body: Optional[dict] = None) -> Tuple[int, bytes]:
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload else {}
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=payload, headers=headers)
+                response = self.conn.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # Сервер закрыл keep-alive соединение — переподключаемся один раз
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+
+
+def collect_fixtures(base_url: str, seed: int) -> Fixtures:
+    """Id проектов, номера заявок, регионы и гранты с анализом для параметров"""
+    rng = random.Random(seed)
+    client = Client(base_url)
+    fixtures = Fixtures()
+    try:
+        status, body = client.request("GET", "/api/v1/regions")
+        fixtures.regions = [region["name"] for region in json.loads(body)] if status == 200 else []
+
+        status, body = client.request("GET", "/api/v1/stats/overview")
+        total = json.loads(body)["total_projects"] if status == 200 else 0
+        fixtures.project_ids = rng.sample(range(1, total + 1), min(200, total)) if total else [1]
+
+        for project_id in fixtures.project_ids[:50]:
+            status, body = client.request("GET", f"/api/v1/projects/{project_id}")
+            if status == 200 and json.loads(body).get("req_num"):
+                fixtures.req_nums.append(json.loads(body)["req_num"])
+
+        status, body = client.request("GET", "/api/problems?limit=500")
+        if status == 200:
+            fixtures.analyzed_grants = sorted({problem["grant_id"] for problem in json.loads(body)})
+
+        status, body = client.request("POST", "/api/v1/exports", {"format": "csv", "year": 2017})
+        if status in (200, 202):
+            job = json.loads(body)
+            fixtures.export_job = job["job_id"]
+            # Скачивание замеряется на готовом файле
+            deadline = time.monotonic() + EXPORT_TIMEOUT
+            while job["status"] not in ("done", "failed") and time.monotonic() < deadline:
+                time.sleep(0.5)
+                status, body = client.request("GET", f"/api/v1/exports/{fixtures.export_job}")
+                if status != 200:
+                    break
+                job = json.loads(body)
+    finally:
+        client.close()
+
+    fixtures.regions = fixtures.regions or ["Москва"]
+    fixtures.req_nums = fixtures.req_nums or ["unknown"]
+    fixtures.analyzed_grants = fixtures.analyzed_grants or ["unknown"]
+    fixtures.export_job = fixtures.export_job or "unknown"
+    return fixtures
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Перцентиль методом ближайшего ранга"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def run_route(base_url: str, route: Route, fixtures: Fixtures, requests: int,
+              concurrency: int, seed: int) -> Dict:
+    """Прогон одного маршрута: requests запросов в concurrency потоках"""
+    name, method, make_request = route
+    rng = random.Random(f"{seed}:{name}")
+    plan = [make_request(rng, fixtures) for _ in range(requests)]
+
+    def worker(worker_idx: int) -> Tuple[List[float], int, int]:
+        client = Client(base_url)
+        latencies, errors, size = [], 0, 0
+        try:
+            for path, body in plan[worker_idx::concurrency]:
+                started = time.perf_counter()
+                try:
+                    status, content = client.request(method, path, body)
+                except Exception:
+                    status, content = 0, b""
+                latencies.append(time.perf_counter() - started)
+                size += len(content)
+                if status >= 400 or status == 0:
+                    errors += 1
+        finally:
+            client.close()
+        return latencies, errors, size
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(worker, range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    errors = sum(result[1] for result in results)
+    size = sum(result[2] for result in results)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        'rps': round(len(latencies) / wall, 1) if wall else 0.0,
+        'avg_bytes': int(size / len(latencies)) if latencies else 0,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str, workers: int) -> Tuple[subprocess.Popen, str]:
+    """Запускает uvicorn против базы бенчмарка и ждет /health/ready"""
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, STARTUP_RESTORE="off")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn завершился с кодом {process.returncode}")
+        try:
+            client = Client(base_url, timeout=2)
+            status, _ = client.request("GET", "/health/ready")
+            client.close()
+            if status == 200:
+                return process, base_url
+        except OSError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("API не стал готов за отведенное время")
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=BACKEND_DIR).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmark(base_url: str, routes: List[Route], requests: int, concurrency: int,
+                  seed: int, meta: Dict) -> Dict:
+    """Прогоняет маршруты и собирает отчет"""
+    fixtures = collect_fixtures(base_url, seed)
+    report = {
+        'meta': dict(meta, revision=git_revision(), started_at=datetime.now().isoformat(timespec='seconds'),
+                     concurrency=concurrency, requests=requests, seed=seed),
+        'routes': {},
+    }
+    for route in routes:
+        # Прогрев: первый запрос маршрута не попадает в статистику
+        run_route(base_url, route, fixtures, min(concurrency, requests), concurrency, seed)
+        result = run_route(base_url, route, fixtures, requests, concurrency, seed)
+        report['routes'][route[0]] = result
+        logger.info(f"📊 {route[0]:<22} p50 {result['p50_ms']:>8} мс  p95 {result['p95_ms']:>8} мс  "
+                    f"p99 {result['p99_ms']:>8} мс  {result['rps']:>7} rps  ошибок {result['errors']}")
+    return report
+
+
+def compare_reports(current: Dict, previous: Dict) -> List[str]:
+    """Строки сравнения p95 и rps с предыдущим отчетом"""
+    lines = [f"{'маршрут':<22} {'p95, мс':>20} {'rps':>20}"]
+    for name, result in current['routes'].items():
+        old = previous.get('routes', {}).get(name)
+        if not old:
+            lines.append(f"{name:<22} {'(новый)':>20}")
+            continue
+        p95_delta = (result['p95_ms'] / old['p95_ms'] - 1) * 100 if old['p95_ms'] else 0.0
+        rps_delta = (result['rps'] / old['rps'] - 1) * 100 if old['rps'] else 0.0
+        lines.append(f"{name:<22} {old['p95_ms']:>8} → {result['p95_ms']:<8} ({p95_delta:+.0f}%)"
+                     f" {old['rps']:>8} → {result['rps']:<8} ({rps_delta:+.0f}%)")
+    return lines
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Нагрузочный бенчмарк API SocFinder")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help="Уже запущенный API (http://localhost:8001)")
+    target.add_argument('--database-url', help="База для локального uvicorn (см. bench_data.py)")
+    parser.add_argument('--workers', type=int, default=1, help="Воркеры uvicorn (без --url)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Параллельных клиентов")
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS, help="Запросов на маршрут")
+    parser.add_argument('--routes', help="Только маршруты, в имени которых есть подстрока (через запятую)")
+    parser.add_argument('--seed', type=int, default=1, help="Зерно для параметров запросов")
+    parser.add_argument('--output', help="Файл отчета (по умолчанию data/benchmarks/api_<время>.json)")
+    parser.add_argument('--compare', help="Предыдущий отчет для сравнения")
+    args = parser.parse_args()
+
+    routes = ROUTES
+    if args.routes:
+        patterns = args.routes.split(',')
+        routes = [route for route in ROUTES if any(pattern in route[0] for pattern in patterns)]
+
+    process = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip('/')
+            meta = {'target': base_url}
+        else:
+            process, base_url = start_server(args.database_url, args.workers)
+            meta = {'target': args.database_url.split('@')[-1], 'workers': args.workers}
+        report = run_benchmark(base_url, routes, args.requests, args.concurrency, args.seed, meta)
+    except Exception as e:
+        logger.error(f"💥 Ошибка бенчмарка: {e}")
+        return 1
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    output = args.output or os.path.join(
+        REPORTS_DIR, f"api_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info(f"💾 Отчет сохранен: {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        for line in compare_reports(report, previous):
+            print(line)
+
+    errors = sum(result['errors'] for result in report['routes'].values())
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Детерминированный синтетический набор данных для нагрузочного тестирования
+
+Повторяет кардинальности продакшена: ~167 тыс. проектов, перекос по регионам
+(Москва и крупные регионы — основная доля), направлениям и годам, ~19%
+победителей, длинные русские тексты описаний, проблемы и решения для части
+грантов. При одном и том же seed набор получается одинаковым побайтно, поэтому
+отчеты bench_api.py разных релизов можно сравнивать.
+
+Строки генерируются в формате источника (даты "дд.мм.гггг", суммы с
+пробелами и запятой, "Да"/"Нет") и проходят через normalize_row конвейера
+загрузки — так же, как реальная выгрузка ПФКИ.
+
+Использование:
+    python bench_data.py --database-url sqlite:///bench.db
+    python bench_data.py --database-url postgresql://.../socfinder_bench --count 166849 --reset
+"""
+import sys
+import time
+import random
+import logging
+import argparse
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from ingest_pipeline import (
+    PROJECT_COLUMNS, copy_rows, ensure_schema, load_coordinates, normalize_row
+)
+from app.core.data_version import bump_data_version
+
+# Настройка логирования
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_COUNT = 166849
+DEFAULT_SEED = 20250313
+DEFAULT_BATCH_SIZE = 5000
+# Доля грантов, для которых есть результаты анализа (проблемы и решения)
+DEFAULT_ANALYZED_SHARE = 0.2
+
+WINNER_SHARE = 32107 / 166849
+
+# Направления конкурсов ПФКИ и их относительные доли
+DIRECTIONS = [
+    ("Социальное обслуживание, социальная поддержка и защита граждан", 24),
+    ("Охрана здоровья граждан, пропаганда здорового образа жизни", 12),
+    ("Поддержка молодежных проектов", 11),
+    ("Поддержка проектов в области культуры и искусства", 10),
+    ("Поддержка проектов в области науки, образования, просвещения", 10),
+    ("Сохранение исторической памяти", 8),
+    ("Охрана окружающей среды и защита животных", 6),
+    ("Развитие институтов гражданского общества", 6),
+    ("Укрепление межнационального и межрелигиозного согласия", 4),
+    ("Выявление и поддержка молодых талантов в области культуры и искусства", 4),
+    ("Защита прав и свобод человека и гражданина", 3),
+    ("Развитие общественной дипломатии и поддержка соотечественников", 2),
+]
+
+# Число заявок растет от года к году
+YEARS = [(2017, 5), (2018, 8), (2019, 10), (2020, 12), (2021, 13),
+         (2022, 14), (2023, 15), (2024, 14), (2025, 9)]
+
+CONTESTS = ["Первый конкурс", "Второй конкурс"]
+
+ORG_FORMS = ["АНО", "РОО", "МОО", "Фонд", "Ассоциация", "Благотворительный фонд", "Региональная общественная организация"]
+
+WORDS = (
+    "проект направлен на поддержку детей семей пожилых людей инвалидов молодежи ветеранов "
+    "социальной адаптации реабилитации волонтеров некоммерческих организаций регионе городе "
+    "сельских поселениях мероприятия программа обучение занятия консультации психологической "
+    "юридической помощи культурного наследия памяти истории краеведения экологии природы "
+    "спорта здорового образа жизни профилактики зависимостей образования просвещения науки "
+    "творчества театра музыки библиотеки музея выставки фестиваля конкурса форума семинаров "
+    "мастер-классов тренингов площадки центра ресурсного сообщества местного самоуправления "
+    "участников благополучателей специалистов наставников партнеров администрации школ "
+    "развитие создание организация проведение обеспечение повышение вовлечение укрепление "
+    "доступности качества жизни условий возможностей навыков компетенций инициатив граждан "
+    "территории муниципального района области края республики округа"
+).split()
+
+# Пул предложений: тексты собираются из готовых предложений, а не по слову, —
+# генерация 167 тыс. проектов занимает секунды, а не минуты
+SENTENCE_POOL_SIZE = 5000
+
+# (поле, минимум предложений, максимум предложений)
+TEXT_FIELDS = [
+    ('description', 6, 30),
+    ('goal', 1, 3),
+    ('tasks', 3, 10),
+    ('soc_signif', 4, 20),
+    ('pj_geo', 1, 2),
+    ('target_groups', 1, 4),
+]
+
+
+class SyntheticDataset:
+    """Генератор синтетических проектов, проблем и решений"""
+
+    def __init__(self, count: int = DEFAULT_COUNT, seed: int = DEFAULT_SEED,
+                 analyzed_share: float = DEFAULT_ANALYZED_SHARE):
+        self.count = count
+        self.seed = seed
+        self.analyzed_share = analyzed_share
+        self.coordinates = load_coordinates()
+
+        rng = random.Random(seed)
+        # Перекос по регионам: вес региона убывает с рангом (распределение Ципфа)
+        self.regions = sorted(self.coordinates) or ["Москва"]
+        rng.shuffle(self.regions)
+        if "Москва" in self.regions:
+            self.regions.remove("Москва")
+            self.regions.insert(0, "Москва")
+        self.region_weights = [1 / (rank + 1) ** 0.9 for rank in range(len(self.regions))]
+
+        self.sentences = [self._sentence(rng) for _ in range(SENTENCE_POOL_SIZE)]
+
+    @staticmethod
+    def _sentence(rng: random.Random) -> str:
+        words = rng.choices(WORDS, k=rng.randint(8, 22))
+        return words[0].capitalize() + " " + " ".join(words[1:]) + "."
+
+    def _text(self, rng: random.Random, min_sentences: int, max_sentences: int) -> str:
+        return " ".join(rng.choices(self.sentences, k=rng.randint(min_sentences, max_sentences)))
+
+    @staticmethod
+    def req_num(index: int, year: int, contest: int) -> str:
+        return f"{year % 100:02d}-{contest + 1}-{index + 1:06d}"
+
+    def iter_source_rows(self) -> Iterator[List]:
+        """Строки в формате источника (порядок SOURCE_COLUMNS)"""
+        rng = random.Random(self.seed + 1)
+        directions, direction_weights = zip(*DIRECTIONS)
+        years, year_weights = zip(*YEARS)
+
+        for index in range(self.count):
+            year = rng.choices(years, year_weights)[0]
+            contest = rng.randrange(len(CONTESTS))
+            region = rng.choices(self.regions, self.region_weights)[0]
+            winner = rng.random() < WINNER_SHARE
+            requested = round(rng.lognormvariate(14.2, 0.8), -3)
+            cofunding = round(requested * rng.uniform(0.1, 1.5), -3)
+            date_req = date(year, 1, 15) + timedelta(days=rng.randrange(300))
+            implem_start = date_req + timedelta(days=rng.randrange(60, 150))
+            implem_end = implem_start + timedelta(days=rng.randrange(180, 720))
+            inn = f"{rng.randrange(10 ** 9, 10 ** 10)}"
+            texts = {field: self._text(rng, lo, hi) for field, lo, hi in TEXT_FIELDS}
+
+            yield [
+                f"{rng.choice(self.sentences)[:-1]} — {rng.choice(WORDS)}",       # name
+                f"{CONTESTS[contest]} {year}",                                  # contest
+                str(year),                                                      # year
+                rng.choices(directions, direction_weights)[0],                  # direction
+                date_req.strftime('%d.%m.%Y'),                                  # date_req
+                region,                                                         # region
+                f"{rng.choice(ORG_FORMS)} \"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)}\"",  # org
+                inn,                                                            # inn
+                f"1{rng.randrange(10 ** 11, 10 ** 12)}",                        # ogrn
+                implem_start.strftime('%d.%m.%Y'),                              # implem_start
+                implem_end.strftime('%d.%m.%Y'),                                # implem_end
+                "Да" if winner else "Нет",                                      # winner
+                f"{rng.uniform(20, 100):.2f}".replace('.', ','),                # rate
+                f"{requested:,.2f}".replace(',', ' ').replace('.', ','),        # money_req_grant
+                f"{cofunding:,.2f}".replace(',', ' ').replace('.', ','),        # cofunding
+                f"{requested + cofunding:,.2f}".replace(',', ' ').replace('.', ','),  # total_money
+                texts['description'],
+                texts['goal'],
+                texts['tasks'],
+                texts['soc_signif'],
+                texts['pj_geo'],
+                texts['target_groups'],
+                f"{region}, ул. {rng.choice(WORDS).capitalize()}, д. {rng.randint(1, 200)}",  # address
+                f"https://{inn}.example.org" if rng.random() < 0.4 else None,   # web_site
+                self.req_num(index, year, contest),                             # req_num
+                f"https://президентскиегранты.рф/public/application/item?id={index + 1}",  # link
+                f"{rng.randrange(10 ** 10, 10 ** 11)}",                         # okato
+                f"{rng.randrange(10 ** 10, 10 ** 11)}",                         # oktmo
+                rng.choice(["региональный", "межрегиональный", "муниципальный", "федеральный"]),  # level
+            ]
+
+    def iter_project_batches(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Tuple]]:
+        """Нормализованные строки projects (порядок PROJECT_COLUMNS)"""
+        coordinates_cache: Dict = {}
+        batch = []
+        for row in self.iter_source_rows():
+            batch.append(normalize_row(row, self.coordinates, coordinates_cache))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def iter_analysis(self, req_nums: List[str]) -> Iterator[Tuple[List[Tuple], List[Tuple]]]:
+        """Проблемы и решения (grant_id, текст) для доли грантов, пачками по гранту"""
+        rng = random.Random(self.seed + 2)
+        for req_num in req_nums:
+            if rng.random() >= self.analyzed_share:
+                continue
+            problems = [(req_num, self._text(rng, 1, 2)) for _ in range(rng.randint(1, 5))]
+            solutions = [(req_num, self._text(rng, 1, 2)) for _ in range(rng.randint(1, 5))]
+            yield problems, solutions
+
+
+ANALYSIS_DDL = {
+    'postgresql': """
+        CREATE TABLE IF NOT EXISTS problems (
+            id SERIAL PRIMARY KEY, grant_id TEXT, problem_text TEXT, created_at TIMESTAMP DEFAULT NOW()
+        );
+        CREATE TABLE IF NOT EXISTS solutions (
+            id SERIAL PRIMARY KEY, grant_id TEXT, solution_text TEXT, created_at TIMESTAMP DEFAULT NOW()
+        );
+        CREATE INDEX IF NOT EXISTS idx_problems_grant_id ON problems (grant_id);
+        CREATE INDEX IF NOT EXISTS idx_solutions_grant_id ON solutions (grant_id);
+    """,
+    'sqlite': """
+        CREATE TABLE IF NOT EXISTS problems (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, grant_id TEXT, problem_text TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS solutions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, grant_id TEXT, solution_text TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_problems_grant_id ON problems (grant_id);
+        CREATE INDEX IF NOT EXISTS idx_solutions_grant_id ON solutions (grant_id);
+    """,
+}
+
+
+class _Writer:
+    """Пакетная запись: COPY для PostgreSQL, executemany для SQLite"""
+
+    def __init__(self, database_url: str):
+        self.dialect = 'sqlite' if database_url.startswith('sqlite') else 'postgresql'
+        if self.dialect == 'sqlite':
+            import sqlite3
+            self.conn = sqlite3.connect(database_url.split(':///', 1)[1])
+        else:
+            import psycopg2
+            if database_url.startswith("postgresql+"):
+                database_url = "postgresql://" + database_url.split("://", 1)[1]
+            self.conn = psycopg2.connect(database_url)
+
+    def execute_script(self, sql: str):
+        cursor = self.conn.cursor()
+        if self.dialect == 'sqlite':
+            cursor.executescript(sql)
+        else:
+            cursor.execute(sql)
+        self.conn.commit()
+
+    def count(self, table: str) -> int:
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+    def write(self, table: str, columns: List[str], rows: List[Tuple]):
+        cursor = self.conn.cursor()
+        if self.dialect == 'sqlite':
+            placeholders = ', '.join('?' for _ in columns)
+            cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+        else:
+            copy_rows(cursor, rows, table, columns)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def load_dataset(database_url: str, count: int = DEFAULT_COUNT, seed: int = DEFAULT_SEED,
+                 analyzed_share: float = DEFAULT_ANALYZED_SHARE, batch_size: int = DEFAULT_BATCH_SIZE,
+                 reset: bool = False) -> Dict:
+    """
+    Загружает синтетический набор в базу
+
+    Если в projects уже ровно count строк и reset не задан, загрузка пропускается.
+
+    Returns:
+        Сводка: число проектов, проблем, решений и время загрузки
+    """
+    started = time.time()
+    ensure_schema(database_url)
+    writer = _Writer(database_url)
+    try:
+        writer.execute_script(ANALYSIS_DDL[writer.dialect])
+        if reset:
+            if writer.dialect == 'sqlite':
+                writer.execute_script("DELETE FROM problems; DELETE FROM solutions; DELETE FROM projects;")
+            else:
+                writer.execute_script("TRUNCATE problems, solutions, projects RESTART IDENTITY")
+        elif writer.count('projects') == count:
+            logger.info(f"✅ Набор из {count} проектов уже загружен, пропускаем (--reset для перезагрузки)")
+            return {'projects': count, 'skipped': True}
+        elif writer.count('projects'):
+            raise RuntimeError("Таблица projects не пуста; используйте --reset или отдельную базу")
+
+        dataset = SyntheticDataset(count, seed, analyzed_share)
+        req_num_idx = PROJECT_COLUMNS.index('req_num')
+        req_nums = []
+        loaded = 0
+        for batch in dataset.iter_project_batches(batch_size):
+            writer.write('projects', PROJECT_COLUMNS, batch)
+            req_nums.extend(row[req_num_idx] for row in batch)
+            loaded += len(batch)
+            if loaded % (batch_size * 10) == 0:
+                logger.info(f"📊 Загружено проектов: {loaded}/{count}")
+
+        problems_count = solutions_count = 0
+        problems, solutions = [], []
+        for grant_problems, grant_solutions in dataset.iter_analysis(req_nums):
+            problems.extend(grant_problems)
+            solutions.extend(grant_solutions)
+            if len(problems) >= batch_size:
+                writer.write('problems', ['grant_id', 'problem_text'], problems)
+                writer.write('solutions', ['grant_id', 'solution_text'], solutions)
+                problems_count += len(problems)
+                solutions_count += len(solutions)
+                problems, solutions = [], []
+        if problems:
+            writer.write('problems', ['grant_id', 'problem_text'], problems)
+            writer.write('solutions', ['grant_id', 'solution_text'], solutions)
+            problems_count += len(problems)
+            solutions_count += len(solutions)
+
+        bump_data_version(writer.conn.cursor())
+        writer.conn.commit()
+
+        if writer.dialect == 'postgresql':
+            writer.conn.autocommit = True
+            writer.execute_script("ANALYZE projects; ANALYZE problems; ANALYZE solutions")
+    finally:
+        writer.close()
+
+    summary = {
+        'projects': loaded,
+        'problems': problems_count,
+        'solutions': solutions_count,
+        'seed': seed,
+        'seconds': round(time.time() - started, 1),
+    }
+    logger.info(f"✅ Синтетический набор загружен: {summary}")
+    return summary
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Синтетический набор данных для нагрузочного тестирования")
+    parser.add_argument('--database-url', required=True,
+                        help="Отдельная база для бенчмарка (sqlite:///bench.db или postgresql://...)")
+    parser.add_argument('--count', type=int, default=DEFAULT_COUNT, help="Количество проектов")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Зерно генератора")
+    parser.add_argument('--analyzed-share', type=float, default=DEFAULT_ANALYZED_SHARE,
+                        help="Доля грантов с проблемами и решениями")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Размер пачки записи")
+    parser.add_argument('--reset', action='store_true', help="Очистить таблицы перед загрузкой")
+    args = parser.parse_args()
+
+    try:
+        load_dataset(args.database_url, args.count, args.seed, args.analyzed_share,
+                     args.batch_size, args.reset)
+    except Exception as e:
+        logger.error(f"💥 Ошибка загрузки набора: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
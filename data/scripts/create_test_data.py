@@ -1,13 +1,56 @@
 #!/usr/bin/env python3
 """
 Создание тестовых данных для быстрой проверки API
+
+Использование:
+    python create_test_data.py          # 4 демонстрационных проекта
+    python create_test_data.py 1000     # 1000 реальных проектов из Parquet-снимка
 """
 import sqlite3
 import json
 import os
+import sys
 from datetime import datetime
 
-def create_test_database():
+# Добавляем путь к app для общего счетчика версии данных (backend/ в репозитории, /app в контейнере)
+SCRIPTS_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+for app_root in (os.path.join(SCRIPTS_ROOT, 'backend'), SCRIPTS_ROOT):
+    if os.path.isdir(os.path.join(app_root, 'app')):
+        sys.path.insert(0, app_root)
+        break
+
+from app.core.data_version import bump_data_version
+
+TEST_COLUMNS = [
+    'name', 'contest', 'year', 'direction', 'date_req', 'region', 'org', 'inn', 'ogrn',
+    'winner', 'money_req_grant', 'cofunding', 'total_money', 'description', 'goal'
+]
+
+def load_snapshot_projects(sample_size):
+    """Берет первые sample_size проектов из последнего Parquet-снимка"""
+    from parquet_snapshot import latest_snapshot, iter_snapshot_batches
+    from ingest_pipeline import load_coordinates, get_coordinates
+
+    snapshot = latest_snapshot()
+    if not snapshot:
+        print("⚠️ Parquet-снимок не найден (см. parquet_snapshot.py), используем демо-данные")
+        return None
+
+    coordinates_dict = load_coordinates()
+    projects = []
+    for batch in iter_snapshot_batches(snapshot, min(sample_size, 5000), columns=TEST_COLUMNS):
+        for row in batch:
+            project = dict(zip(TEST_COLUMNS, row))
+            if project['date_req'] is not None:
+                project['date_req'] = project['date_req'].isoformat()
+            coords = get_coordinates(project['region'], coordinates_dict)
+            project['coordinates'] = json.dumps(coords) if coords else None
+            projects.append(project)
+            if len(projects) >= sample_size:
+                return projects
+    return projects
+
+def create_test_database(sample_size=None):
     """Создает базу с тестовыми данными"""
     
     # Путь к базе данных
@@ -67,8 +110,11 @@ def create_test_database():
     for index in indexes:
         cursor.execute(index)
     
+    # Реальные проекты из снимка, если запрошены
+    test_projects = load_snapshot_projects(sample_size) if sample_size else None
+    
     # Тестовые данные
-    test_projects = [
+    test_projects = test_projects or [
         {
             'name': 'Развитие волонтерства в Москве',
             'contest': 'Первый конкурс 2023',
@@ -157,6 +203,8 @@ def create_test_database():
             project['total_money'], project['description'], project['goal'], project['coordinates']
         ))
     
+    # Новая версия данных: кэши и ETag API не отдают ответы по старой базе
+    bump_data_version(cursor)
     conn.commit()
     conn.close()
     
@@ -164,6 +212,6 @@ def create_test_database():
     return True
 
 if __name__ == "__main__":
-    create_test_database()
+    create_test_database(int(sys.argv[1]) if len(sys.argv) > 1 else None)
 
 
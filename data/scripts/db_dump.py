@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Параллельный дамп и восстановление базы (directory-формат pg_dump)
+
+Дамп пишется в каталог (pg_dump --format=directory --jobs N): каждая
+таблица — отдельный файл, поэтому и выгрузка, и восстановление идут в N
+потоков. Рядом с дампом сохраняется манифест с контрольными суммами каждой
+таблицы (число строк + хэш содержимого) и отпечатком схемы. После
+восстановления суммы пересчитываются и сверяются с манифестом.
+
+Если схема базы совпадает с дампом, восстановление идет по быстрому пути:
+таблицы очищаются и заливаются только данные (pg_restore --data-only), без
+пересоздания таблиц и индексов.
+
+Использование:
+    python db_dump.py dump    [каталог] [-j 4]
+    python db_dump.py restore [каталог] [-j 4] [--full] [--no-verify] [--if-stale]
+    python db_dump.py verify  [каталог]
+
+После восстановления версия дампа записывается в таблицу db_snapshot_version;
+с --if-stale восстановление пропускается, если база уже этой версии.
+
+Подключение к базе берется из --database-url или DATABASE_URL (обязательно).
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import logging
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from ingest_pipeline import add_database_url_argument, database_url_from_args, get_database_url
+from app.core.data_version import DATA_VERSION_TABLE, bump_data_version
+
+# Настройка логирования
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DUMPS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'dumps'))
+DEFAULT_DUMP_DIR = os.path.join(DUMPS_DIR, 'socfinder')
+MANIFEST_NAME = 'socfinder_manifest.json'
+DEFAULT_JOBS = min(4, os.cpu_count() or 1)
+
+# Маркер версии данных: какой дамп последним восстановлен в эту базу.
+# Сам маркер в дамп, контрольные суммы и отпечаток схемы не входит
+VERSION_TABLE = 'db_snapshot_version'
+# Служебные таблицы конкретной базы: не выгружаются и не восстанавливаются
+LOCAL_TABLES = f"'{VERSION_TABLE}', '{DATA_VERSION_TABLE}'"
+VERSION_DDL = f"""
+CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version TEXT NOT NULL,
+    source TEXT,
+    restored_at TIMESTAMP DEFAULT NOW()
+)
+"""
+
+# Ключ advisory-блокировки: два контейнера не восстанавливают базу одновременно
+RESTORE_LOCK_KEY = 5103
+
+TABLES_QUERY = f"""
+SELECT tablename FROM pg_tables
+WHERE schemaname = 'public' AND tablename NOT IN ({LOCAL_TABLES})
+ORDER BY tablename
+"""
+
+# Отпечаток схемы: колонки и индексы всех таблиц public
+SCHEMA_HASH_QUERY = f"""
+SELECT md5(COALESCE(string_agg(line, E'\\n' ORDER BY line), ''))
+FROM (
+    SELECT table_name || '.' || column_name || ':' || data_type || ':' || is_nullable
+    FROM information_schema.columns
+    WHERE table_schema = 'public' AND table_name NOT IN ({LOCAL_TABLES})
+    UNION ALL
+    SELECT indexdef FROM pg_indexes
+    WHERE schemaname = 'public' AND tablename NOT IN ({LOCAL_TABLES})
+) AS schema_lines(line)
+"""
+
+# Контрольная сумма таблицы, не зависящая от порядка строк (без сортировки)
+TABLE_CHECKSUM_QUERY = """
+SELECT count(*), COALESCE(sum(('x' || left(md5(t::text), 16))::bit(64)::bigint::numeric), 0)::text
+FROM {table} AS t
+"""
+
+
+# Внешние ключи снимаются на время data-only восстановления: pg_restore -j
+# заливает таблицы параллельно, и порядок родитель/потомок не гарантирован
+FOREIGN_KEYS_QUERY = """
+SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+FROM pg_constraint
+WHERE contype = 'f' AND connamespace = 'public'::regnamespace
+"""
+
+
+
+
+def _connect(database_url: str):
+    import psycopg2
+    return psycopg2.connect(database_url)
+
+
+def list_tables(database_url: str) -> List[str]:
+    """Таблицы схемы public"""
+    conn = _connect(database_url)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(TABLES_QUERY)
+            return [row[0] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def schema_hash(database_url: str) -> str:
+    """Отпечаток схемы базы (колонки и индексы)"""
+    conn = _connect(database_url)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(SCHEMA_HASH_QUERY)
+            return cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _table_checksum(database_url: str, table: str, snapshot: Optional[str] = None) -> Dict:
+    conn = _connect(database_url)
+    try:
+        with conn.cursor() as cursor:
+            if snapshot:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot,))
+            cursor.execute(TABLE_CHECKSUM_QUERY.format(table=f'"{table}"'))
+            rows, checksum = cursor.fetchone()
+        return {'rows': rows, 'checksum': checksum}
+    finally:
+        conn.close()
+
+
+def table_checksums(database_url: str, tables: List[str], jobs: int = DEFAULT_JOBS,
+                    snapshot: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    Контрольные суммы таблиц, считаются параллельно (отдельное соединение на таблицу)
+
+    snapshot — экспортированный снимок транзакции, чтобы суммы соответствовали
+    ровно тем данным, которые выгрузил pg_dump с тем же снимком.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = {table: executor.submit(_table_checksum, database_url, table, snapshot) for table in tables}
+        return {table: future.result() for table, future in futures.items()}
+
+
+def snapshot_version(tables: Dict[str, Dict], schema: str) -> str:
+    """Версия данных дампа: хэш контрольных сумм всех таблиц и схемы"""
+    payload = json.dumps({'tables': tables, 'schema': schema}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def read_manifest(dump_dir: str) -> Optional[Dict]:
+    """Манифест дампа или None"""
+    path = os.path.join(dump_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read_db_version(database_url: Optional[str] = None) -> Optional[str]:
+    """Версия данных, записанная в базу при последнем восстановлении"""
+    conn = _connect(database_url or get_database_url())
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", (VERSION_TABLE,))
+            if cursor.fetchone()[0] is None:
+                return None
+            cursor.execute(f"SELECT version FROM {VERSION_TABLE} WHERE id = 1")
+            row = cursor.fetchone()
+            return row[0] if row else None
+    finally:
+        conn.close()
+
+
+def write_db_version(version: str, source: str, database_url: Optional[str] = None):
+    """Записывает в базу версию восстановленных данных и увеличивает data_version"""
+    conn = _connect(database_url or get_database_url())
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(VERSION_DDL)
+            cursor.execute(
+                f"""
+                INSERT INTO {VERSION_TABLE} (id, version, source, restored_at) VALUES (1, %s, %s, NOW())
+                ON CONFLICT (id) DO UPDATE SET
+                    version = EXCLUDED.version, source = EXCLUDED.source, restored_at = NOW()
+                """,
+                (version, source)
+            )
+            bump_data_version(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def restore_lock(database_url: Optional[str] = None):
+    """
+    Берет advisory-блокировку восстановления (ждет, если восстанавливает другой процесс)
+
+    Returns:
+        Соединение, удерживающее блокировку (закрытие соединения ее снимает)
+    """
+    conn = _connect(database_url or get_database_url())
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", (RESTORE_LOCK_KEY,))
+    conn.commit()
+    return conn
+
+
+def _run(cmd: List[str]):
+    """Запускает pg_dump/pg_restore; ненулевой код возврата — ошибка"""
+    logger.info(f"▶️  {' '.join(cmd[:2])} ...")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{cmd[0]} завершился с кодом {result.returncode}: {result.stderr.strip()[-2000:]}")
+
+
+def dump(dump_dir: str = DEFAULT_DUMP_DIR, jobs: int = DEFAULT_JOBS,
+         database_url: Optional[str] = None) -> Dict:
+    """
+    Создает дамп в directory-формате и манифест с контрольными суммами
+
+    Returns:
+        Манифест дампа
+    """
+    database_url = database_url or get_database_url()
+    started = time.time()
+
+    # pg_dump требует, чтобы каталога не было; старый дамп заменяется целиком
+    tmp_dir = dump_dir.rstrip('/') + '.tmp'
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(os.path.dirname(os.path.abspath(tmp_dir)), exist_ok=True)
+
+    logger.info(f"📦 Дамп в {dump_dir} ({jobs} потоков)...")
+    # Дамп и контрольные суммы читают один и тот же снимок базы
+    snapshot_conn = _connect(database_url)
+    try:
+        snapshot_conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+        with snapshot_conn.cursor() as cursor:
+            cursor.execute("SELECT pg_export_snapshot()")
+            snapshot = cursor.fetchone()[0]
+
+        _run([
+            'pg_dump', f'--dbname={database_url}', f'--snapshot={snapshot}',
+            '--format=directory', f'--jobs={jobs}', f'--file={tmp_dir}',
+            f'--exclude-table={VERSION_TABLE}', f'--exclude-table={DATA_VERSION_TABLE}',
+            '--no-owner', '--no-privileges', '--compress=6'
+        ])
+        dump_seconds = time.time() - started
+
+        with snapshot_conn.cursor() as cursor:
+            cursor.execute(TABLES_QUERY)
+            tables = [row[0] for row in cursor.fetchall()]
+            cursor.execute(SCHEMA_HASH_QUERY)
+            schema = cursor.fetchone()[0]
+        checksums = table_checksums(database_url, tables, jobs, snapshot)
+    finally:
+        snapshot_conn.close()
+
+    manifest = {
+        'version': snapshot_version(checksums, schema),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'schema_hash': schema,
+        'tables': checksums,
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    if os.path.exists(dump_dir):
+        shutil.rmtree(dump_dir)
+    os.replace(tmp_dir, dump_dir)
+
+    total_rows = sum(table['rows'] for table in checksums.values())
+    logger.info(f"✅ Дамп готов за {time.time() - started:.1f} сек (pg_dump {dump_seconds:.1f} сек): "
+                f"{len(tables)} таблиц, {total_rows} строк, версия {manifest['version']}")
+    return manifest
+
+
+def verify(dump_dir: str = DEFAULT_DUMP_DIR, jobs: int = DEFAULT_JOBS,
+           database_url: Optional[str] = None) -> List[str]:
+    """
+    Сверяет содержимое базы с манифестом дампа
+
+    Returns:
+        Список расхождений (пустой, если все таблицы совпадают)
+    """
+    database_url = database_url or get_database_url()
+    manifest = read_manifest(dump_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"Манифест не найден в {dump_dir}")
+
+    actual = table_checksums(database_url, list(manifest['tables']), jobs)
+    mismatches = []
+    for table, expected in manifest['tables'].items():
+        if actual[table] != expected:
+            mismatches.append(f"{table}: ожидалось {expected['rows']} строк, "
+                              f"в базе {actual[table]['rows']} (или не совпал хэш)")
+    return mismatches
+
+
+def restore(dump_dir: str = DEFAULT_DUMP_DIR, jobs: int = DEFAULT_JOBS,
+            full: bool = False, check: bool = True,
+            database_url: Optional[str] = None) -> Dict:
+    """
+    Восстанавливает базу из дампа в directory-формате
+
+    Args:
+        dump_dir: каталог дампа
+        jobs: количество параллельных потоков pg_restore
+        full: всегда пересоздавать схему (без быстрого пути data-only)
+        check: сверить контрольные суммы после восстановления
+
+    Returns:
+        {'mode': 'data-only'|'full', 'seconds': t, 'version': ...}
+    """
+    database_url = database_url or get_database_url()
+    manifest = read_manifest(dump_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"Манифест не найден в {dump_dir}")
+
+    started = time.time()
+    data_only = not full and schema_hash(database_url) == manifest['schema_hash']
+
+    if data_only:
+        logger.info(f"⚡ Схема совпадает с дампом: восстанавливаю только данные ({jobs} потоков)")
+        tables = ', '.join(f'"{table}"' for table in manifest['tables'])
+        conn = _connect(database_url)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(FOREIGN_KEYS_QUERY)
+                foreign_keys = cursor.fetchall()
+                for table, name, _ in foreign_keys:
+                    cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+                cursor.execute(f"TRUNCATE {tables} CASCADE")
+            conn.commit()
+
+            try:
+                _run([
+                    'pg_restore', f'--dbname={database_url}', '--data-only',
+                    f'--jobs={jobs}', '--no-owner', '--no-privileges', dump_dir
+                ])
+            finally:
+                with conn.cursor() as cursor:
+                    for table, name, definition in foreign_keys:
+                        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+                conn.commit()
+        finally:
+            conn.close()
+    else:
+        logger.info(f"🔄 Полное восстановление схемы и данных ({jobs} потоков)")
+        _run([
+            'pg_restore', f'--dbname={database_url}', '--clean', '--if-exists',
+            f'--jobs={jobs}', '--no-owner', '--no-privileges', dump_dir
+        ])
+
+    restore_seconds = time.time() - started
+    if check:
+        mismatches = verify(dump_dir, jobs, database_url)
+        if mismatches:
+            raise RuntimeError("Контрольные суммы не совпали: " + '; '.join(mismatches))
+        logger.info(f"✅ Контрольные суммы {len(manifest['tables'])} таблиц совпали")
+
+    write_db_version(manifest['version'], os.path.basename(os.path.normpath(dump_dir)), database_url)
+
+    result = {
+        'mode': 'data-only' if data_only else 'full',
+        'seconds': round(time.time() - started, 2),
+        'restore_seconds': round(restore_seconds, 2),
+        'version': manifest['version'],
+    }
+    logger.info(f"✅ База восстановлена ({result['mode']}) за {result['seconds']} сек, "
+                f"версия {result['version']}")
+    return result
+
+
+def restore_if_stale(dump_dir: str = DEFAULT_DUMP_DIR, jobs: int = DEFAULT_JOBS,
+                     database_url: Optional[str] = None) -> Dict:
+    """
+    Восстанавливает дамп, только если в базе другая версия данных
+
+    Returns:
+        {'mode': 'skipped', 'version': ...} или результат restore
+    """
+    database_url = database_url or get_database_url()
+    manifest = read_manifest(dump_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"Манифест не найден в {dump_dir}")
+
+    lock = restore_lock(database_url)
+    try:
+        # Проверяем под блокировкой: параллельный запуск мог уже все восстановить
+        if read_db_version(database_url) == manifest['version']:
+            logger.info(f"✅ База уже версии {manifest['version']}, восстановление не требуется")
+            return {'mode': 'skipped', 'version': manifest['version']}
+        return restore(dump_dir, jobs, database_url=database_url)
+    finally:
+        lock.close()
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Параллельный дамп и восстановление базы")
+    parser.add_argument('command', choices=['dump', 'restore', 'verify'])
+    parser.add_argument('dump_dir', nargs='?', default=DEFAULT_DUMP_DIR, help="Каталог дампа")
+    parser.add_argument('-j', '--jobs', type=int, default=DEFAULT_JOBS, help="Количество параллельных потоков")
+    parser.add_argument('--full', action='store_true',
+                        help="Пересоздать схему, даже если она совпадает с дампом")
+    parser.add_argument('--no-verify', action='store_true',
+                        help="Не сверять контрольные суммы после восстановления")
+    parser.add_argument('--if-stale', action='store_true',
+                        help="Восстанавливать, только если версия данных в базе отличается от дампа")
+    add_database_url_argument(parser)
+    args = parser.parse_args()
+    database_url = database_url_from_args(parser, args)
+
+    try:
+        if args.command == 'dump':
+            dump(args.dump_dir, args.jobs, database_url=database_url)
+        elif args.command == 'restore' and args.if_stale:
+            restore_if_stale(args.dump_dir, args.jobs, database_url=database_url)
+        elif args.command == 'restore':
+            restore(args.dump_dir, args.jobs, full=args.full, check=not args.no_verify,
+                    database_url=database_url)
+        else:
+            mismatches = verify(args.dump_dir, args.jobs, database_url=database_url)
+            for mismatch in mismatches:
+                logger.error(f"❌ {mismatch}")
+            if mismatches:
+                return 1
+            logger.info("✅ База совпадает с дампом")
+    except Exception as e:
+        logger.error(f"💥 Ошибка: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,10 +7,26 @@ import psycopg2
 import psycopg2.extras
 import pandas as pd
 import logging
+import argparse
+import itertools
+import sys
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import os
 
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+# Добавляем путь к app: запись Parquet/Arrow общая с API (app/services/arrow_export.py)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend')))
+
+try:
+    import pyarrow as pa
+    from app.services.arrow_export import DICTIONARY_COLUMNS, iter_arrow_export
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +38,90 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Лимит строк листа Excel (включая строку заголовка)
+EXCEL_MAX_ROWS = 1048576
+
+PROJECTS_QUERY = """
+    SELECT 
+        id, req_num, name, contest, year, direction, 
+        date_req, region, org, inn, ogrn,
+        implem_start, implem_end, winner, rate,
+        money_req_grant, cofunding, total_money,
+        description, goal, tasks, soc_signif, pj_geo, target_groups,
+        address, web_site, link, okato, oktmo, level
+    FROM projects 
+    ORDER BY id
+"""
+
+PROBLEMS_QUERY = """
+    SELECT 
+        p.id,
+        p.grant_id,
+        p.problem_text,
+        pr.name as project_name,
+        pr.region,
+        pr.year,
+        pr.direction
+    FROM problems p
+    JOIN projects pr ON p.grant_id = pr.req_num
+    ORDER BY p.grant_id, p.id
+"""
+
+SOLUTIONS_QUERY = """
+    SELECT 
+        s.id,
+        s.grant_id,
+        s.solution_text,
+        pr.name as project_name,
+        pr.region,
+        pr.year,
+        pr.direction
+    FROM solutions s
+    JOIN projects pr ON s.grant_id = pr.req_num
+    ORDER BY s.grant_id, s.id
+"""
+
+
+# OID типов PostgreSQL -> типы Arrow (остальное пишется строками)
+PG_ARROW_TYPES = {
+    16: 'bool_',
+    20: 'int64', 21: 'int64', 23: 'int64',
+    700: 'float64', 701: 'float64', 1700: 'float64',
+    1082: 'date32',
+    1114: 'timestamp', 1184: 'timestamp',
+}
+
+# Файлы выгрузки для аналитиков: имя -> запрос
+ARROW_EXPORT_TABLES = {
+    'projects': PROJECTS_QUERY,
+    'problems': PROBLEMS_QUERY,
+    'solutions': SOLUTIONS_QUERY,
+}
+
+
+def arrow_schema_from_cursor(description) -> 'pa.Schema':
+    """Схема Arrow по описанию колонок курсора psycopg2"""
+    fields = []
+    for column in description:
+        name = column[0]
+        type_name = PG_ARROW_TYPES.get(column[1], 'string')
+        if name in DICTIONARY_COLUMNS:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        elif type_name == 'timestamp':
+            arrow_type = pa.timestamp('us')
+        else:
+            arrow_type = getattr(pa, type_name)()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def _excel_value(value):
+    """Значение ячейки без управляющих символов, которые openpyxl не пишет"""
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub('', value)
+    return value
+
+
 class ExcelExporter:
     def __init__(self, host: str = None, port: int = 5432, 
                  database: str = "socfinder", user: str = "socfinder_user", 
@@ -89,19 +189,7 @@ class ExcelExporter:
             if not conn:
                 return pd.DataFrame()
             
-            query = """
-                SELECT 
-                    id, req_num, name, contest, year, direction, 
-                    date_req, region, org, inn, ogrn,
-                    implem_start, implem_end, winner, rate,
-                    money_req_grant, cofunding, total_money,
-                    description, goal, tasks, soc_signif, pj_geo, target_groups,
-                    address, web_site, link, okato, oktmo, level
-                FROM projects 
-                ORDER BY id
-            """
-            
-            df = pd.read_sql_query(query, conn)
+            df = pd.read_sql_query(PROJECTS_QUERY, conn)
             logger.info(f"✅ Получено {len(df)} проектов")
             conn.close()
             return df
@@ -117,21 +205,7 @@ class ExcelExporter:
             if not conn:
                 return pd.DataFrame()
             
-            query = """
-                SELECT 
-                    p.id,
-                    p.grant_id,
-                    p.problem_text,
-                    pr.name as project_name,
-                    pr.region,
-                    pr.year,
-                    pr.direction
-                FROM problems p
-                JOIN projects pr ON p.grant_id = pr.req_num
-                ORDER BY p.grant_id, p.id
-            """
-            
-            df = pd.read_sql_query(query, conn)
+            df = pd.read_sql_query(PROBLEMS_QUERY, conn)
             logger.info(f"✅ Получено {len(df)} социальных проблем")
             conn.close()
             return df
@@ -147,21 +221,7 @@ class ExcelExporter:
             if not conn:
                 return pd.DataFrame()
             
-            query = """
-                SELECT 
-                    s.id,
-                    s.grant_id,
-                    s.solution_text,
-                    pr.name as project_name,
-                    pr.region,
-                    pr.year,
-                    pr.direction
-                FROM solutions s
-                JOIN projects pr ON s.grant_id = pr.req_num
-                ORDER BY s.grant_id, s.id
-            """
-            
-            df = pd.read_sql_query(query, conn)
+            df = pd.read_sql_query(SOLUTIONS_QUERY, conn)
             logger.info(f"✅ Получено {len(df)} решений")
             conn.close()
             return df
@@ -170,6 +230,12 @@ class ExcelExporter:
             logger.error(f"❌ Ошибка получения данных решений: {e}")
             return pd.DataFrame()
     
+    def ensure_grant_summary(self, conn):
+        """Сводка по грантам поддерживается PostgresManager; при первом запуске собираем ее целиком"""
+        from grant_summary import ensure_summary_schema
+        
+        ensure_summary_schema(conn)
+    
     def get_problems_solutions_summary(self) -> pd.DataFrame:
         """Получение сводной таблицы проблем и решений по проектам"""
         try:
@@ -177,29 +243,9 @@ class ExcelExporter:
             if not conn:
                 return pd.DataFrame()
             
-            query = """
-                SELECT 
-                    pr.id as project_id,
-                    pr.req_num,
-                    pr.name as project_name,
-                    pr.region,
-                    pr.year,
-                    pr.direction,
-                    pr.winner,
-                    pr.total_money,
-                    COUNT(DISTINCT p.id) as problems_count,
-                    COUNT(DISTINCT s.id) as solutions_count,
-                    STRING_AGG(DISTINCT p.problem_text, ' | ' ORDER BY p.problem_text) as problems_text,
-                    STRING_AGG(DISTINCT s.solution_text, ' | ' ORDER BY s.solution_text) as solutions_text
-                FROM projects pr
-                LEFT JOIN problems p ON pr.id = p.grant_id
-                LEFT JOIN solutions s ON pr.id = s.grant_id
-                GROUP BY pr.id, pr.req_num, pr.name, pr.region, pr.year, pr.direction, pr.winner, pr.total_money
-                HAVING COUNT(DISTINCT p.id) > 0 OR COUNT(DISTINCT s.id) > 0
-                ORDER BY pr.id
-            """
-            
-            df = pd.read_sql_query(query, conn)
+            from grant_summary import SUMMARY_QUERY
+            self.ensure_grant_summary(conn)
+            df = pd.read_sql_query(SUMMARY_QUERY, conn)
             logger.info(f"✅ Получена сводная таблица для {len(df)} проектов")
             conn.close()
             return df
@@ -208,16 +254,205 @@ class ExcelExporter:
             logger.error(f"❌ Ошибка получения сводной таблицы: {e}")
             return pd.DataFrame()
     
-    def export_to_excel(self, output_dir: str = "exports") -> str:
+    def iter_query_batches(self, conn, query: str, batch_size: int = 10000) -> Iterator[Tuple[tuple, List[tuple]]]:
+        """
+        Читаем результат запроса пачками через серверный (именованный) курсор
+        
+        В памяти одновременно находится только одна пачка строк.
+        
+        Yields:
+            (описание колонок курсора, пачка строк)
+        """
+        with conn.cursor(name='excel_export') as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(query)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield cursor.description, rows
+        conn.commit()
+    
+    def write_sheet_streaming(self, workbook, conn, query: str, sheet_name: str,
+                              batch_size: int = 10000) -> int:
+        """
+        Пишем результат запроса в write-only книгу, разбивая на листы по лимиту Excel
+        
+        Листы называются sheet_name, sheet_name_2, sheet_name_3 и т.д.
+        
+        Returns:
+            Количество записанных строк
+        """
+        rows_per_sheet = EXCEL_MAX_ROWS - 1
+        total = 0
+        sheet = None
+        sheet_rows = 0
+        
+        for description, rows in self.iter_query_batches(conn, query, batch_size):
+            for row in rows:
+                if sheet is None or sheet_rows >= rows_per_sheet:
+                    part = total // rows_per_sheet + 1
+                    title = sheet_name if part == 1 else f"{sheet_name}_{part}"
+                    sheet = workbook.create_sheet(title=title)
+                    sheet.append([column[0] for column in description])
+                    sheet_rows = 0
+                    if part > 1:
+                        logger.info(f"📄 Лимит строк Excel: продолжаю на листе '{title}'")
+                sheet.append([_excel_value(value) for value in row])
+                sheet_rows += 1
+                total += 1
+            logger.info(f"   {sheet_name}: записано {total} строк")
+        
+        return total
+    
+    def export_to_excel_streaming(self, output_dir: str = "exports", batch_size: int = 10000) -> str:
+        """
+        Потоковый экспорт проблем и решений с постоянным потреблением памяти
+        
+        Строки читаются серверным курсором пачками и сразу пишутся в
+        write-only книгу openpyxl, без DataFrame и без дерева всей книги.
+        Листы больше 1 048 576 строк автоматически делятся на несколько.
+        
+        Args:
+            output_dir: директория для сохранения файла
+            batch_size: размер пачки строк, читаемой из базы
+            
+        Returns:
+            Путь к созданному файлу
+        """
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"socfinder_problems_solutions_{timestamp}.xlsx"
+            filepath = os.path.join(output_dir, filename)
+            
+            conn = self.get_connection()
+            if not conn:
+                return ""
+            
+            logger.info("📊 Потоковая выгрузка проблем и решений...")
+            workbook = Workbook(write_only=True)
+            try:
+                problems_count = self.write_sheet_streaming(
+                    workbook, conn, PROBLEMS_QUERY, 'Социальные_проблемы', batch_size
+                )
+                logger.info("✅ Лист 'Социальные_проблемы' записан")
+                
+                solutions_count = self.write_sheet_streaming(
+                    workbook, conn, SOLUTIONS_QUERY, 'Решения', batch_size
+                )
+                logger.info("✅ Лист 'Решения' записан")
+                
+                from grant_summary import SUMMARY_QUERY
+                self.ensure_grant_summary(conn)
+                self.write_sheet_streaming(
+                    workbook, conn, SUMMARY_QUERY, 'Сводка_проблем_и_решений', batch_size
+                )
+                logger.info("✅ Лист 'Сводка_проблем_и_решений' записан")
+            finally:
+                conn.close()
+            
+            stats_sheet = workbook.create_sheet(title='Статистика')
+            stats_sheet.append(['Метрика', 'Значение'])
+            stats_sheet.append(['Всего проблем', problems_count])
+            stats_sheet.append(['Всего решений', solutions_count])
+            stats_sheet.append(['Дата экспорта', datetime.now().strftime("%Y-%m-%d %H:%M:%S")])
+            logger.info("✅ Лист 'Статистика' записан")
+            
+            workbook.save(filepath)
+            logger.info(f"✅ Экспорт завершен: {filepath}")
+            return filepath
+            
+        except Exception as e:
+            logger.error(f"❌ Ошибка потокового экспорта в Excel: {e}")
+            return ""
+    
+    def write_arrow_file(self, conn, query: str, filepath: str, format: str = "parquet",
+                         batch_size: int = 10000) -> int:
+        """
+        Пишем результат запроса в Parquet/Arrow IPC пачками из серверного курсора
+        
+        Returns:
+            Количество записанных строк
+        """
+        batches = self.iter_query_batches(conn, query, batch_size)
+        first = next(batches, None)
+        if first is None:
+            return 0
+        
+        schema = arrow_schema_from_cursor(first[0])
+        counter = {'rows': 0}
+        
+        def row_batches():
+            for _, batch in itertools.chain([first], batches):
+                counter['rows'] += len(batch)
+                yield batch
+        
+        with open(filepath, 'wb') as f:
+            for chunk in iter_arrow_export(row_batches(), schema, format):
+                f.write(chunk)
+        return counter['rows']
+    
+    def export_to_arrow(self, output_dir: str = "exports", format: str = "parquet",
+                        batch_size: int = 10000) -> str:
+        """
+        Экспорт проектов, проблем и решений в Parquet или Arrow IPC (Feather)
+        
+        Для аналитиков, которые читают выгрузку в pandas: без кодирования XLSX,
+        region/direction/contest хранятся словарем (категории в pandas).
+        
+        Args:
+            output_dir: директория для сохранения
+            format: parquet или arrow
+            batch_size: размер пачки строк, читаемой из базы
+            
+        Returns:
+            Путь к каталогу с файлами projects/problems/solutions
+        """
+        if not PYARROW_AVAILABLE:
+            logger.error("❌ pyarrow не установлен. Используйте: pip install pyarrow")
+            return ""
+        
+        try:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            export_dir = os.path.join(output_dir, f"socfinder_{format}_{timestamp}")
+            os.makedirs(export_dir, exist_ok=True)
+            
+            conn = self.get_connection()
+            if not conn:
+                return ""
+            
+            try:
+                for name, query in ARROW_EXPORT_TABLES.items():
+                    filepath = os.path.join(export_dir, f"{name}.{format}")
+                    rows = self.write_arrow_file(conn, query, filepath, format, batch_size)
+                    logger.info(f"✅ {name}: {rows} строк -> {filepath}")
+            finally:
+                conn.close()
+            
+            logger.info(f"✅ Экспорт завершен: {export_dir}")
+            return export_dir
+            
+        except Exception as e:
+            logger.error(f"❌ Ошибка экспорта в {format}: {e}")
+            return ""
+    
+    def export_to_excel(self, output_dir: str = "exports", streaming: bool = False) -> str:
         """
         Экспорт только проблем и решений в Excel файл
         
         Args:
             output_dir: директория для сохранения файла
+            streaming: потоковый режим с постоянным потреблением памяти
+                       (см. export_to_excel_streaming)
             
         Returns:
             Путь к созданному файлу
         """
+        if streaming:
+            return self.export_to_excel_streaming(output_dir)
+        
         try:
             # Создаем директорию если не существует
             os.makedirs(output_dir, exist_ok=True)
@@ -324,6 +559,14 @@ class ExcelExporter:
 
 def main():
     """Основная функция"""
+    parser = argparse.ArgumentParser(description="Выгрузка проблем и решений в Excel")
+    parser.add_argument('--output-dir', default='exports', help="Директория для файла")
+    parser.add_argument('--format', choices=['xlsx', 'parquet', 'arrow'], default='xlsx',
+                        help="xlsx — книга Excel; parquet/arrow — файлы для pandas (проекты, проблемы, решения)")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Потоковый экспорт с постоянным потреблением памяти (для больших таблиц)")
+    args = parser.parse_args()
+    
     exporter = ExcelExporter()
     
     # Проверяем подключение
@@ -340,16 +583,24 @@ def main():
         logger.info(f"   Всего проблем: {stats.get('total_problems', 0)}")
         logger.info(f"   Всего решений: {stats.get('total_solutions', 0)}")
     
-    # Экспортируем в Excel
-    logger.info("📤 Начинаю экспорт проблем и решений в Excel...")
-    output_file = exporter.export_to_excel()
+    if args.format != 'xlsx':
+        logger.info(f"📤 Начинаю экспорт в {args.format}...")
+        output_file = exporter.export_to_arrow(args.output_dir, format=args.format)
+    else:
+        # Экспортируем в Excel
+        logger.info("📤 Начинаю экспорт проблем и решений в Excel...")
+        output_file = exporter.export_to_excel(args.output_dir, streaming=args.streaming)
     
     if output_file:
         logger.info(f"🎉 Экспорт успешно завершен!")
         logger.info(f"📁 Файл сохранен: {output_file}")
         
-        # Показываем размер файла
-        file_size = os.path.getsize(output_file) / (1024 * 1024)  # в МБ
+        # Показываем размер файла (для parquet/arrow — суммарно по каталогу)
+        if os.path.isdir(output_file):
+            size = sum(os.path.getsize(os.path.join(output_file, name)) for name in os.listdir(output_file))
+        else:
+            size = os.path.getsize(output_file)
+        file_size = size / (1024 * 1024)  # в МБ
         logger.info(f"📏 Размер файла: {file_size:.2f} МБ")
     else:
         logger.error("❌ Экспорт не удался")
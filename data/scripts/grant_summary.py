@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Сводка анализа по грантам: таблица grant_analysis_summary
+
+Для каждого гранта (projects.req_num = problems/solutions.grant_id) хранит
+количество проблем и решений и их склеенные тексты. Проблемы и решения
+агрегируются каждая отдельно и только потом соединяются, поэтому нет
+размножения строк проблемы × решения. Таблица обновляется инкрементально
+по grant_id при сохранении результатов анализа (PostgresManager), так что
+сводный лист выгрузки и дашборды читают готовые строки.
+
+Таблица и индексы по grant_id создаются один раз (ensure_summary_schema,
+отдельной транзакцией): DDL в транзакции сохранения держал бы SHARE-блокировку
+на problems/solutions до ее конца.
+
+Использование:
+    python grant_summary.py [--database-url postgresql://...]   # создать схему и полностью пересобрать сводку
+
+Без --database-url подключение берется из DATABASE_URL.
+"""
+import sys
+import logging
+import argparse
+from typing import Iterable, Optional
+
+# Настройка логирования
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SUMMARY_TABLE = 'grant_analysis_summary'
+
+SUMMARY_DDL = f"""
+CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+    grant_id TEXT PRIMARY KEY,
+    problems_count INTEGER NOT NULL DEFAULT 0,
+    solutions_count INTEGER NOT NULL DEFAULT 0,
+    problems_text TEXT,
+    solutions_text TEXT,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+"""
+
+SUMMARY_INDEXES = ('idx_problems_grant_id', 'idx_solutions_grant_id')
+
+SUMMARY_INDEXES_DDL = """
+CREATE INDEX IF NOT EXISTS idx_problems_grant_id ON problems (grant_id);
+CREATE INDEX IF NOT EXISTS idx_solutions_grant_id ON solutions (grant_id);
+"""
+
+# {grants} — подзапрос со списком grant_id, {where} — условие отбора по grant_id
+REFRESH_SQL = f"""
+INSERT INTO {SUMMARY_TABLE} AS s
+    (grant_id, problems_count, solutions_count, problems_text, solutions_text, updated_at)
+SELECT
+    g.grant_id,
+    COALESCE(p.problems_count, 0),
+    COALESCE(sol.solutions_count, 0),
+    p.problems_text,
+    sol.solutions_text,
+    NOW()
+FROM ({{grants}}) AS g
+LEFT JOIN (
+    SELECT grant_id,
+           COUNT(*) AS problems_count,
+           STRING_AGG(DISTINCT problem_text, ' | ' ORDER BY problem_text) AS problems_text
+    FROM problems {{where}}
+    GROUP BY grant_id
+) AS p ON p.grant_id = g.grant_id
+LEFT JOIN (
+    SELECT grant_id,
+           COUNT(*) AS solutions_count,
+           STRING_AGG(DISTINCT solution_text, ' | ' ORDER BY solution_text) AS solutions_text
+    FROM solutions {{where}}
+    GROUP BY grant_id
+) AS sol ON sol.grant_id = g.grant_id
+ON CONFLICT (grant_id) DO UPDATE SET
+    problems_count = EXCLUDED.problems_count,
+    solutions_count = EXCLUDED.solutions_count,
+    problems_text = EXCLUDED.problems_text,
+    solutions_text = EXCLUDED.solutions_text,
+    updated_at = EXCLUDED.updated_at
+"""
+
+# Сводка с атрибутами проектов для выгрузки (соединение по req_num)
+SUMMARY_QUERY = f"""
+SELECT
+    pr.id as project_id,
+    pr.req_num,
+    pr.name as project_name,
+    pr.region,
+    pr.year,
+    pr.direction,
+    pr.winner,
+    pr.total_money,
+    g.problems_count,
+    g.solutions_count,
+    g.problems_text,
+    g.solutions_text
+FROM {SUMMARY_TABLE} g
+JOIN projects pr ON pr.req_num = g.grant_id
+ORDER BY pr.id
+"""
+
+
+def ensure_summary_table(cursor):
+    """Создает таблицу сводки и индексы по grant_id"""
+    cursor.execute(SUMMARY_DDL)
+    cursor.execute(SUMMARY_INDEXES_DDL)
+
+
+def summary_schema_ready(cursor) -> bool:
+    """Есть ли таблица сводки и индексы по grant_id (без блокировок таблиц)"""
+    cursor.execute(
+        "SELECT to_regclass(name) IS NOT NULL FROM unnest(%s::text[]) AS name",
+        ([SUMMARY_TABLE, *SUMMARY_INDEXES],)
+    )
+    return all(ready for ready, in cursor.fetchall())
+
+
+def ensure_summary_schema(conn) -> bool:
+    """
+    Однократная подготовка схемы сводки отдельной транзакцией
+
+    Если таблица и индексы уже есть, DDL не выполняется вовсе,
+    так что SHARE-блокировка на problems/solutions не берется. Новая
+    таблица в той же транзакции заполняется полной пересборкой: иначе
+    гранты, проанализированные до ее появления, не попали бы в сводку.
+
+    Returns:
+        True если схема создавалась
+    """
+    with conn.cursor() as cursor:
+        if summary_schema_ready(cursor):
+            conn.commit()
+            return False
+        cursor.execute("SELECT to_regclass(%s)", (SUMMARY_TABLE,))
+        table_missing = cursor.fetchone()[0] is None
+        ensure_summary_table(cursor)
+        rows = refresh_grant_summary(cursor) if table_missing else None
+    conn.commit()
+    if rows is None:
+        logger.info(f"📦 Созданы индексы сводки {SUMMARY_TABLE}")
+    else:
+        logger.info(f"📦 Создана сводка {SUMMARY_TABLE}: {rows} грантов")
+    return True
+
+
+def refresh_grant_summary(cursor, grant_ids: Optional[Iterable[str]] = None) -> int:
+    """
+    Пересчитывает сводку в транзакции вызывающего
+
+    Args:
+        cursor: курсор psycopg2
+        grant_ids: гранты, у которых изменились проблемы/решения
+                   (None — полная пересборка)
+
+    Returns:
+        Количество обновленных строк сводки
+    """
+    if grant_ids is None:
+        cursor.execute(f"TRUNCATE {SUMMARY_TABLE}")
+        grants = "SELECT grant_id FROM problems UNION SELECT grant_id FROM solutions"
+        cursor.execute(REFRESH_SQL.format(grants=grants, where=""))
+        return cursor.rowcount
+
+    grant_ids = sorted({str(grant_id) for grant_id in grant_ids})
+    if not grant_ids:
+        return 0
+    cursor.execute(
+        REFRESH_SQL.format(
+            grants="SELECT unnest(%(ids)s::text[]) AS grant_id",
+            where="WHERE grant_id = ANY(%(ids)s)"
+        ),
+        {'ids': grant_ids}
+    )
+    updated = cursor.rowcount
+    # Гранты, у которых не осталось ни проблем, ни решений
+    cursor.execute(
+        f"DELETE FROM {SUMMARY_TABLE} WHERE grant_id = ANY(%s) "
+        f"AND problems_count = 0 AND solutions_count = 0",
+        (grant_ids,)
+    )
+    return updated
+
+
+def main():
+    """Полная пересборка сводки"""
+    import psycopg2
+    from ingest_pipeline import add_database_url_argument, database_url_from_args
+
+    parser = argparse.ArgumentParser(description=f"Полная пересборка сводки {SUMMARY_TABLE}")
+    add_database_url_argument(parser)
+    args = parser.parse_args()
+    database_url = database_url_from_args(parser, args)
+
+    try:
+        conn = psycopg2.connect(database_url)
+        try:
+            ensure_summary_schema(conn)
+            with conn.cursor() as cursor:
+                rows = refresh_grant_summary(cursor)
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info(f"✅ Сводка {SUMMARY_TABLE} пересобрана: {rows} грантов")
+    except Exception as e:
+        logger.error(f"💥 Ошибка пересборки сводки: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
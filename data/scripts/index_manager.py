@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Отложенное построение индексов и ограничений при массовой загрузке
+
+Перед загрузкой вторичные индексы и ограничения (кроме первичного ключа)
+снимаются, их определения сохраняются в таблицу deferred_indexes. После
+загрузки они строятся заново параллельно (несколько соединений, каждое с
+увеличенным maintenance_work_mem и параллельным построением индекса), затем
+выполняется ANALYZE. Определения лежат в базе, поэтому после прерванной
+загрузки индексы восстановятся при следующем запуске.
+
+Использование:
+    python index_manager.py rebuild [--table projects] [--jobs 4]   # восстановить индексы
+    python index_manager.py status  [--table projects]              # что сейчас снято
+    python index_manager.py ensure  [--jobs 4]                      # привести индексы к модели: достроить новые, удалить убранные
+
+Подключение к базе берется из --database-url или DATABASE_URL (обязательно).
+"""
+import sys
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from ingest_pipeline import add_database_url_argument, database_url_from_args
+
+# Настройка логирования
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFERRED_DDL = """
+CREATE TABLE IF NOT EXISTS deferred_indexes (
+    table_name TEXT NOT NULL,
+    object_name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    definition TEXT NOT NULL,
+    dropped_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (table_name, object_name)
+)
+"""
+
+# Ограничения кроме первичного ключа: unique, foreign key, check, exclusion
+CONSTRAINTS_QUERY = """
+SELECT conname, pg_get_constraintdef(oid)
+FROM pg_constraint
+WHERE conrelid = %s::regclass AND contype IN ('u', 'f', 'c', 'x')
+"""
+
+# Индексы, не являющиеся первичным ключом и не обслуживающие ограничения
+INDEXES_QUERY = """
+SELECT c.relname, pg_get_indexdef(i.indexrelid)
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+WHERE i.indrelid = %s::regclass
+  AND NOT i.indisprimary
+  AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.indexrelid)
+"""
+
+
+def deferred_objects(conn, table: str) -> List[Dict]:
+    """Снятые, но еще не восстановленные индексы и ограничения таблицы"""
+    with conn.cursor() as cursor:
+        cursor.execute(DEFERRED_DDL)
+        cursor.execute(
+            "SELECT object_name, kind, definition FROM deferred_indexes WHERE table_name = %s",
+            (table,)
+        )
+        rows = cursor.fetchall()
+    conn.commit()
+    return [{'name': name, 'kind': kind, 'definition': definition} for name, kind, definition in rows]
+
+
+def drop_secondary_indexes(conn, table: str = 'projects') -> Dict:
+    """
+    Снимает вторичные индексы и ограничения, сохраняя их определения
+
+    Повторный вызов после прерванной загрузки ничего не теряет: уже
+    сохраненные определения остаются в deferred_indexes.
+
+    Returns:
+        {'indexes': N, 'constraints': M, 'seconds': t}
+    """
+    started = time.perf_counter()
+    with conn.cursor() as cursor:
+        cursor.execute(DEFERRED_DDL)
+
+        cursor.execute(CONSTRAINTS_QUERY, (table,))
+        constraints = cursor.fetchall()
+        cursor.execute(INDEXES_QUERY, (table,))
+        indexes = cursor.fetchall()
+
+        for name, definition in constraints:
+            cursor.execute(
+                """
+                INSERT INTO deferred_indexes (table_name, object_name, kind, definition)
+                VALUES (%s, %s, 'constraint', %s) ON CONFLICT DO NOTHING
+                """,
+                (table, name, definition)
+            )
+            cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+
+        for name, definition in indexes:
+            cursor.execute(
+                """
+                INSERT INTO deferred_indexes (table_name, object_name, kind, definition)
+                VALUES (%s, %s, 'index', %s) ON CONFLICT DO NOTHING
+                """,
+                (table, name, definition)
+            )
+            cursor.execute(f'DROP INDEX "{name}"')
+    conn.commit()
+
+    result = {
+        'indexes': len(indexes),
+        'constraints': len(constraints),
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+    logger.info(f"🔧 Снято индексов: {result['indexes']}, ограничений: {result['constraints']} "
+                f"(таблица {table})")
+    return result
+
+
+def _model_indexes(table: str) -> List:
+    """Индексы таблицы в модели backend (Index в __table_args__ и index=True)"""
+    from app.models.project import Project
+    return sorted(Project.metadata.tables[table].indexes, key=lambda index: index.name)
+
+
+def missing_model_indexes(conn, table: str = 'projects') -> List[Dict]:
+    """Индексы модели, которых еще нет в базе"""
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateIndex
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", (table,))
+        existing = {name for (name,) in cursor.fetchall()}
+    return [
+        {'name': index.name, 'kind': 'index',
+         'definition': str(CreateIndex(index).compile(dialect=postgresql.dialect()))}
+        for index in _model_indexes(table)
+        if index.name not in existing
+    ]
+
+
+def obsolete_model_indexes(conn, table: str = 'projects') -> List[str]:
+    """
+    Индексы с именами по схеме модели (ix_<table>_...), которых в модели больше нет
+
+    Учитываются и построенные, и снятые на время загрузки (deferred_indexes).
+    Индексы с другими именами (созданные вручную) не трогаются.
+    """
+    model = {index.name for index in _model_indexes(table)}
+    with conn.cursor() as cursor:
+        cursor.execute(DEFERRED_DDL)
+        cursor.execute(
+            """
+            SELECT indexname FROM pg_indexes WHERE tablename = %s
+            UNION
+            SELECT object_name FROM deferred_indexes WHERE table_name = %s AND kind = 'index'
+            """,
+            (table, table)
+        )
+        names = sorted(name for (name,) in cursor.fetchall())
+    return [name for name in names if name.startswith(f'ix_{table}_') and name not in model]
+
+
+def ensure_model_indexes(database_url: str, table: str = 'projects', jobs: int = 4,
+                         maintenance_work_mem: str = '512MB', parallel_workers: int = 2) -> Dict:
+    """
+    Приводит индексы существующей таблицы к модели
+
+    create_all не трогает существующие таблицы, поэтому новые индексы модели
+    (например, индексы сортировок /projects/table) попадают в deferred_indexes
+    и строятся тем же параллельным rebuild_indexes, а убранные из модели
+    удаляются вместе с их сохраненными определениями.
+    """
+    import psycopg2
+
+    conn = psycopg2.connect(database_url)
+    try:
+        obsolete = obsolete_model_indexes(conn, table)
+        missing = missing_model_indexes(conn, table)
+        with conn.cursor() as cursor:
+            for name in obsolete:
+                cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+                cursor.execute(
+                    "DELETE FROM deferred_indexes WHERE table_name = %s AND object_name = %s",
+                    (table, name)
+                )
+                logger.info(f"   🗑️ {name}: больше нет в модели, удален")
+            for index in missing:
+                cursor.execute(
+                    """
+                    INSERT INTO deferred_indexes (table_name, object_name, kind, definition)
+                    VALUES (%s, %s, 'index', %s) ON CONFLICT DO NOTHING
+                    """,
+                    (table, index['name'], index['definition'])
+                )
+        conn.commit()
+    finally:
+        conn.close()
+    if not missing:
+        logger.info(f"✅ Все индексы модели для {table} уже построены")
+    return rebuild_indexes(database_url, table, jobs, maintenance_work_mem, parallel_workers)
+
+
+def _build_index(database_url: str, table: str, index: Dict, maintenance_work_mem: str,
+                 parallel_workers: int) -> float:
+    """Строит один индекс в отдельном соединении, возвращает время в секундах"""
+    import psycopg2
+
+    started = time.perf_counter()
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET maintenance_work_mem = %s", (maintenance_work_mem,))
+            cursor.execute("SET max_parallel_maintenance_workers = %s", (parallel_workers,))
+            cursor.execute(index['definition'])
+            cursor.execute(
+                "DELETE FROM deferred_indexes WHERE table_name = %s AND object_name = %s",
+                (table, index['name'])
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return time.perf_counter() - started
+
+
+def rebuild_indexes(database_url: str, table: str = 'projects', jobs: int = 4,
+                    maintenance_work_mem: str = '512MB', parallel_workers: int = 2) -> Dict:
+    """
+    Восстанавливает снятые индексы параллельно, затем ограничения и ANALYZE
+
+    Args:
+        database_url: URL базы PostgreSQL
+        table: таблица
+        jobs: сколько индексов строить одновременно (отдельные соединения)
+        maintenance_work_mem: память на построение одного индекса
+        parallel_workers: max_parallel_maintenance_workers для каждого построения
+
+    Returns:
+        Словарь с временем по этапам и по каждому индексу
+    """
+    import psycopg2
+
+    started = time.perf_counter()
+    conn = psycopg2.connect(database_url)
+    try:
+        pending = deferred_objects(conn, table)
+        indexes = [obj for obj in pending if obj['kind'] == 'index']
+        constraints = [obj for obj in pending if obj['kind'] == 'constraint']
+
+        timings = {}
+        if indexes:
+            logger.info(f"🔨 Строим {len(indexes)} индексов ({jobs} параллельно, "
+                        f"maintenance_work_mem={maintenance_work_mem})...")
+            with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+                futures = {
+                    index['name']: executor.submit(_build_index, database_url, table, index,
+                                                   maintenance_work_mem, parallel_workers)
+                    for index in indexes
+                }
+                for name, future in futures.items():
+                    timings[name] = round(future.result(), 2)
+                    logger.info(f"   ✅ {name}: {timings[name]} сек")
+        indexes_seconds = time.perf_counter() - started
+
+        constraints_started = time.perf_counter()
+        with conn.cursor() as cursor:
+            cursor.execute("SET maintenance_work_mem = %s", (maintenance_work_mem,))
+            for constraint in constraints:
+                cursor.execute(
+                    f'ALTER TABLE {table} ADD CONSTRAINT "{constraint["name"]}" {constraint["definition"]}'
+                )
+                cursor.execute(
+                    "DELETE FROM deferred_indexes WHERE table_name = %s AND object_name = %s",
+                    (table, constraint['name'])
+                )
+        conn.commit()
+        constraints_seconds = time.perf_counter() - constraints_started
+
+        analyze_started = time.perf_counter()
+        with conn.cursor() as cursor:
+            cursor.execute(f"ANALYZE {table}")
+        conn.commit()
+        analyze_seconds = time.perf_counter() - analyze_started
+    finally:
+        conn.close()
+
+    result = {
+        'indexes': timings,
+        'indexes_seconds': round(indexes_seconds, 2),
+        'constraints': len(constraints),
+        'constraints_seconds': round(constraints_seconds, 2),
+        'analyze_seconds': round(analyze_seconds, 2),
+        'total_seconds': round(time.perf_counter() - started, 2)
+    }
+    logger.info(f"✅ Индексы: {result['indexes_seconds']} сек, ограничения: "
+                f"{result['constraints_seconds']} сек, ANALYZE: {result['analyze_seconds']} сек")
+    return result
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Отложенные индексы таблицы после массовой загрузки")
+    parser.add_argument('command', choices=['rebuild', 'status', 'ensure'])
+    parser.add_argument('--table', default='projects')
+    parser.add_argument('--jobs', type=int, default=4, help="Индексов строится одновременно")
+    parser.add_argument('--maintenance-work-mem', default='512MB')
+    parser.add_argument('--parallel-workers', type=int, default=2,
+                        help="max_parallel_maintenance_workers для каждого индекса")
+    add_database_url_argument(parser)
+    args = parser.parse_args()
+    database_url = database_url_from_args(parser, args)
+
+    import psycopg2
+
+    try:
+        if args.command == 'status':
+            conn = psycopg2.connect(database_url)
+            try:
+                pending = deferred_objects(conn, args.table)
+            finally:
+                conn.close()
+            if not pending:
+                logger.info(f"✅ У таблицы {args.table} нет снятых индексов")
+            for obj in pending:
+                logger.info(f"   {obj['kind']}: {obj['name']} — {obj['definition']}")
+        elif args.command == 'ensure':
+            ensure_model_indexes(database_url, args.table, args.jobs,
+                                 args.maintenance_work_mem, args.parallel_workers)
+        else:
+            rebuild_indexes(database_url, args.table, args.jobs,
+                            args.maintenance_work_mem, args.parallel_workers)
+    except Exception as e:
+        logger.error(f"💥 Ошибка: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
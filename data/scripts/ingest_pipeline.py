@@ -0,0 +1,775 @@
+#!/usr/bin/env python3
+"""
+Конвейерная загрузка проектов в PostgreSQL с параллельной нормализацией строк
+
+Схема конвейера:
+    reader (1 процесс) -> очередь -> N воркеров (нормализация) -> очередь -> writer (COPY)
+
+Очереди ограничены по размеру, поэтому быстрый reader не раздувает память,
+если воркеры или запись в базу не успевают (backpressure).
+
+Использование:
+    python ingest_pipeline.py <путь к xlsx/csv/снимку> [--workers N] [--batch-size 2000] [--truncate]
+
+Если для XLSX/CSV уже создан Parquet-снимок (parquet_snapshot.py), читается он.
+
+Подключение к базе берется из --database-url или DATABASE_URL (обязательно).
+
+Примеры:
+    python ingest_pipeline.py ../raw/data_114_pres_grants_v20250313.xlsx --workers 6
+    python ingest_pipeline.py ../raw/data_114_pres_grants_v20250313.csv --truncate
+"""
+import os
+import sys
+import io
+import csv
+import json
+import time
+import logging
+import queue
+import argparse
+import multiprocessing as mp
+from datetime import datetime, date
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+# Настройка логирования
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Добавляем путь к app для импорта моделей: backend/ в репозитории, корень образа (/app/app) в контейнере
+SCRIPTS_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+for app_root in (os.path.join(SCRIPTS_ROOT, 'backend'), SCRIPTS_ROOT):
+    if os.path.isdir(os.path.join(app_root, 'app')):
+        sys.path.insert(0, app_root)
+        break
+
+COORDINATES_PATH = os.path.join(os.path.dirname(__file__), '..', 'regions_coordinates.json')
+
+# Колонки исходного набора данных в порядке следования в XLSX/CSV (29 атрибутов)
+SOURCE_COLUMNS = [
+    'name', 'contest', 'year', 'direction', 'date_req', 'region', 'org', 'inn', 'ogrn',
+    'implem_start', 'implem_end', 'winner', 'rate', 'money_req_grant', 'cofunding',
+    'total_money', 'description', 'goal', 'tasks', 'soc_signif', 'pj_geo',
+    'target_groups', 'address', 'web_site', 'req_num', 'link', 'okato', 'oktmo', 'level'
+]
+
+# Служебные колонки Parquet-снимка после SOURCE_COLUMNS: номер строки источника и итог проверки
+SNAPSHOT_META_COLUMNS = ['row_num', 'reject_reasons', 'reject_raw']
+
+# Колонки, которые пишет writer (исходные + вычисляемые координаты)
+PROJECT_COLUMNS = SOURCE_COLUMNS + ['coordinates']
+
+DATE_COLUMNS = {'date_req', 'implem_start', 'implem_end'}
+MONEY_COLUMNS = {'money_req_grant', 'cofunding', 'total_money'}
+
+TRUE_VALUES = {'true', '1', 'да', 'yes', 'победитель', 'winner', '+'}
+FALSE_VALUES = {'false', '0', 'нет', 'no', 'проигравший', '-'}
+
+DATE_FORMATS = ['%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S']
+
+# Сентинел, которым стадии сообщают об окончании потока
+_DONE = None
+
+
+def get_database_url(database_url: Optional[str] = None) -> str:
+    """
+    URL базы в формате, понятном psycopg2
+
+    Args:
+        database_url: явно переданный URL (--database-url); без него берется DATABASE_URL
+
+    Raises:
+        ValueError: URL не задан ни аргументом, ни в окружении
+    """
+    url = database_url or os.getenv("DATABASE_URL")
+    if not url:
+        raise ValueError("не задан URL базы: передайте --database-url или переменную окружения DATABASE_URL")
+    # SQLAlchemy-URL вида postgresql+psycopg2:// psycopg2 не понимает
+    if url.startswith("postgresql+"):
+        url = "postgresql://" + url.split("://", 1)[1]
+    return url
+
+
+def add_database_url_argument(parser: argparse.ArgumentParser):
+    """Аргумент --database-url для скриптов, работающих с базой"""
+    parser.add_argument('--database-url', default=None,
+                        help="URL PostgreSQL (по умолчанию из переменной окружения DATABASE_URL)")
+
+
+def database_url_from_args(parser: argparse.ArgumentParser, args) -> str:
+    """URL базы из аргументов или окружения; без него скрипт завершается с понятной ошибкой"""
+    try:
+        return get_database_url(args.database_url)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def load_coordinates() -> Dict:
+    """Загружаем координаты регионов"""
+    try:
+        with open(COORDINATES_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Ошибка загрузки координат: {e}")
+        return {}
+
+
+# ---------------------------------------------------------------------------
+# Нормализация значений
+# ---------------------------------------------------------------------------
+
+def clean_value(value):
+    """Очищаем значение от пустых строк и пробелов"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def parse_date(value) -> Optional[date]:
+    """Парсим дату из строки или datetime"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+
+    value_str = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value_str, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_boolean(value) -> Optional[bool]:
+    """Парсим булево значение (None, если значение не распознано)"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        return value
+
+    value_str = str(value).lower().strip()
+    if value_str in TRUE_VALUES:
+        return True
+    if value_str in FALSE_VALUES:
+        return False
+    return None
+
+
+def parse_number(value) -> Optional[float]:
+    """Парсим числовое значение"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        try:
+            # Убираем пробелы (в т.ч. неразрывные) и заменяем запятые на точки
+            value_str = str(value).replace(' ', '').replace('\xa0', '').replace(',', '.')
+            number = float(value_str)
+        except (ValueError, TypeError):
+            return None
+
+    # NaN (пустые ячейки pandas) считаем отсутствующим значением
+    return None if number != number else number
+
+
+def parse_money(value) -> Optional[int]:
+    """Парсим денежное значение в целые рубли"""
+    number = parse_number(value)
+    return int(number) if number is not None else None
+
+
+def parse_year(value) -> Optional[int]:
+    """Парсим год"""
+    number = parse_number(value)
+    return int(number) if number is not None else None
+
+
+def get_coordinates(region_name, coordinates_dict: Dict) -> Optional[Dict]:
+    """Получаем координаты для региона (точное, затем частичное совпадение)"""
+    if not region_name:
+        return None
+
+    region_name = str(region_name)
+
+    # Ищем точное совпадение
+    if region_name in coordinates_dict:
+        coords = coordinates_dict[region_name]
+        return {"lat": coords["lat"], "lng": coords["lng"]}
+
+    # Ищем частичное совпадение
+    region_lower = region_name.lower()
+    for region, coords in coordinates_dict.items():
+        if region_lower in region.lower() or region.lower() in region_lower:
+            return {"lat": coords["lat"], "lng": coords["lng"]}
+
+    return None
+
+
+def normalize_row(row, coordinates_dict: Dict, coordinates_cache: Optional[Dict] = None) -> Tuple:
+    """
+    Приводим сырую строку источника к кортежу значений в порядке PROJECT_COLUMNS
+
+    Args:
+        row: последовательность значений в порядке SOURCE_COLUMNS
+        coordinates_dict: словарь координат регионов
+        coordinates_cache: кэш region -> координаты (частичный поиск дорогой)
+
+    Returns:
+        Кортеж значений для записи в projects
+    """
+    values = []
+    for idx, column in enumerate(SOURCE_COLUMNS):
+        raw = row[idx] if idx < len(row) else None
+        if column in DATE_COLUMNS:
+            values.append(parse_date(raw))
+        elif column in MONEY_COLUMNS:
+            values.append(parse_money(raw))
+        elif column == 'year':
+            values.append(parse_year(raw))
+        elif column == 'winner':
+            values.append(parse_boolean(raw))
+        elif column == 'rate':
+            values.append(parse_number(raw))
+        else:
+            value = clean_value(raw)
+            values.append(str(value) if value is not None else None)
+
+    region = values[SOURCE_COLUMNS.index('region')]
+    if coordinates_cache is not None:
+        if region not in coordinates_cache:
+            coordinates_cache[region] = get_coordinates(region, coordinates_dict)
+        coords = coordinates_cache[region]
+    else:
+        coords = get_coordinates(region, coordinates_dict)
+    values.append(json.dumps(coords) if coords else None)
+
+    return tuple(values)
+
+
+# ---------------------------------------------------------------------------
+# Источники
+# ---------------------------------------------------------------------------
+
+def iter_xlsx_batches(path: str, batch_size: int) -> Iterator[List[tuple]]:
+    """Читаем XLSX потоково (read_only) и отдаем пачки сырых строк"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        batch = []
+        for row in sheet.iter_rows(min_row=2, values_only=True):
+            if not any(row):
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        workbook.close()
+
+
+def iter_csv_batches(path: str, batch_size: int, delimiter: str = ';') -> Iterator[List[list]]:
+    """Читаем CSV (UTF-8, разделитель ';') и отдаем пачки сырых строк"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        next(reader, None)  # Пропускаем заголовок
+        batch = []
+        for row in reader:
+            if not any(row):
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def iter_parquet_batches(path: str, batch_size: int) -> Iterator[List[tuple]]:
+    """Читаем Parquet-снимок (каталог) или отдельный .parquet файл"""
+    from parquet_snapshot import iter_snapshot_rows
+    return iter_snapshot_rows(path, batch_size)
+
+
+# Читатели источников: тип -> функция (path, batch_size) -> пачки сырых строк
+SOURCE_READERS = {
+    'xlsx': iter_xlsx_batches,
+    'csv': iter_csv_batches,
+    'parquet': iter_parquet_batches,
+}
+
+
+def detect_source_type(path: str) -> str:
+    """Определяем тип источника по расширению (каталог = Parquet-снимок)"""
+    ext = os.path.splitext(path)[1].lower()
+    if os.path.isdir(path) or ext == '.parquet':
+        return 'parquet'
+    if ext in ('.xlsx', '.xlsm'):
+        return 'xlsx'
+    if ext == '.csv':
+        return 'csv'
+    raise ValueError(f"Неподдерживаемый формат источника: {ext}")
+
+
+def iter_source_batches(path: str, batch_size: int, source_type: Optional[str] = None) -> Iterator[list]:
+    """Пачки сырых строк источника выбранного (или определенного по файлу) типа"""
+    source_type = source_type or detect_source_type(path)
+    if source_type not in SOURCE_READERS:
+        raise ValueError(f"Неизвестный тип источника: {source_type}")
+    return SOURCE_READERS[source_type](path, batch_size)
+
+
+def resolve_source(path: str, source_type: Optional[str] = None,
+                   use_snapshot: bool = True) -> Tuple[str, str]:
+    """
+    Подменяем XLSX/CSV готовым Parquet-снимком, если он есть
+
+    Снимок ищется по хэшу файла, поэтому устаревшим он быть не может.
+
+    Returns:
+        (путь, тип источника), которые надо читать
+    """
+    source_type = source_type or detect_source_type(path)
+    if not use_snapshot or source_type == 'parquet':
+        return path, source_type
+
+    from parquet_snapshot import find_snapshot
+    snapshot = find_snapshot(path)
+    if snapshot:
+        logger.info(f"📦 Используем Parquet-снимок: {snapshot}")
+        return snapshot, 'parquet'
+    return path, source_type
+
+
+# ---------------------------------------------------------------------------
+# Запись в базу
+# ---------------------------------------------------------------------------
+
+def rows_to_copy_buffer(rows: List[Tuple]) -> io.StringIO:
+    """Сериализуем пачку строк в CSV-буфер для COPY (пустое поле = NULL)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['' if value is None else value for value in row])
+    buffer.seek(0)
+    return buffer
+
+
+def copy_rows(cursor, rows: List[Tuple], table: str = 'projects', columns: List[str] = None):
+    """Записываем пачку строк одним COPY FROM STDIN"""
+    columns = columns or PROJECT_COLUMNS
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        rows_to_copy_buffer(rows)
+    )
+
+
+def _copy_isolating_errors(cursor, rows: List[Tuple], row_nums: List[int]) -> Tuple[int, List[Dict]]:
+    """
+    COPY пачки с поиском виновных строк делением пополам (через SAVEPOINT)
+
+    Returns:
+        (число записанных строк, строки, отвергнутые базой)
+    """
+    import psycopg2
+    from ingest_validation import make_reject
+
+    written = 0
+    db_rejects = []
+    pending = [(rows, row_nums)]
+    while pending:
+        part, part_nums = pending.pop()
+        cursor.execute("SAVEPOINT copy_part")
+        try:
+            copy_rows(cursor, part)
+            cursor.execute("RELEASE SAVEPOINT copy_part")
+            written += len(part)
+            continue
+        except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT copy_part")
+            error = str(e).strip().splitlines()[0]
+
+        if len(part) == 1:
+            db_rejects.append(make_reject(part_nums[0], part[0], [f"ошибка записи в БД: {error}"]))
+        else:
+            middle = len(part) // 2
+            pending.append((part[middle:], part_nums[middle:]))
+            pending.append((part[:middle], part_nums[:middle]))
+    return written, db_rejects
+
+
+def write_batch(conn, rows: List[Tuple], row_nums: List[int], rejects: List[Dict],
+                sink, before_commit: Optional[Callable] = None) -> Tuple[int, List[Dict]]:
+    """
+    Записываем пачку, ее отбракованные строки и чекпойнт в одной транзакции
+
+    Если COPY падает на данных (ограничение, переполнение и т.п.), пачка
+    делится пополам до тех пор, пока виновные строки не будут найдены;
+    они уходят в карантин, остальные строки записываются.
+
+    Args:
+        conn: соединение psycopg2
+        rows: нормализованные строки
+        row_nums: номера строк в источнике
+        rejects: строки, отбракованные при проверке
+        sink: RejectsSink
+        before_commit: вызывается как before_commit(cursor, written, rejected) перед commit
+
+    Returns:
+        (число записанных строк, все отбракованные строки пачки)
+    """
+    with conn.cursor() as cursor:
+        try:
+            written, db_rejects = _copy_isolating_errors(cursor, rows, row_nums) if rows else (0, [])
+            all_rejects = rejects + db_rejects
+            sink.stage(cursor, all_rejects)
+            if before_commit:
+                before_commit(cursor, written, len(all_rejects))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    sink.committed(all_rejects)
+    return written, all_rejects
+
+
+def ensure_schema(database_url: str):
+    """Создаем таблицы по моделям backend, если их еще нет"""
+    from sqlalchemy import create_engine
+    from app.models.project import Project
+    from app.core.database import Base
+
+    engine = create_engine(database_url)
+    try:
+        Base.metadata.create_all(bind=engine, tables=[Project.__table__])
+    finally:
+        engine.dispose()
+
+
+# ---------------------------------------------------------------------------
+# Стадии конвейера
+# ---------------------------------------------------------------------------
+
+class StageStats:
+    """Счетчики одной стадии: строки и время полезной работы (без ожидания очередей)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.busy = 0.0
+
+    def add(self, rows: int, seconds: float):
+        self.rows += rows
+        self.busy += seconds
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.busy if self.busy > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'stage': self.name,
+            'rows': self.rows,
+            'busy_seconds': round(self.busy, 2),
+            'rows_per_sec': round(self.rows_per_sec, 1)
+        }
+
+
+def _reader_stage(path: str, source_type: str, batch_size: int, skip_batches: Set[int],
+                  raw_queue, workers: int, stats_queue):
+    """Процесс чтения: пачки сырых строк -> raw_queue (уже записанные пачки пропускаются)"""
+    stats = StageStats('reader')
+    batches = iter_source_batches(path, batch_size, source_type)
+    seq = 0
+    next_row = 1  # Номер строки данных в источнике (без заголовка и пустых строк)
+    while True:
+        started = time.perf_counter()
+        batch = next(batches, _DONE)
+        stats.add(len(batch) if batch else 0, time.perf_counter() - started)
+        if batch is _DONE:
+            break
+        if seq not in skip_batches:
+            raw_queue.put((seq, next_row, batch))
+        seq += 1
+        next_row += len(batch)
+
+    for _ in range(workers):
+        raw_queue.put(_DONE)
+    stats_queue.put(stats.to_dict())
+
+
+def normalize_batch(batch: List, start_row: int, coordinates_dict: Dict,
+                    coordinates_cache: Dict, schema: Dict,
+                    row_meta: bool = False) -> Tuple[List, List[int], List[Dict]]:
+    """
+    Нормализация и проверка пачки: ни одна строка не теряется молча
+
+    Args:
+        row_meta: строки снимка с SNAPSHOT_META_COLUMNS — номер строки и
+            итог проверки берутся из снимка, проверенного по исходным значениям
+
+    Returns:
+        (корректные строки, их номера в источнике, отбракованные строки)
+    """
+    from ingest_validation import validate_row, make_reject
+
+    rows, row_nums, rejects = [], [], []
+    for offset, raw_row in enumerate(batch):
+        row_num = start_row + offset
+        if row_meta:
+            row_num, stored_reasons, stored_raw = raw_row[len(SOURCE_COLUMNS):]
+            if stored_reasons:
+                rejects.append({'row_num': row_num, 'reasons': list(stored_reasons),
+                                'raw': json.loads(stored_raw)})
+                continue
+            raw_row = raw_row[:len(SOURCE_COLUMNS)]
+        try:
+            values = normalize_row(raw_row, coordinates_dict, coordinates_cache)
+            reasons = validate_row(raw_row, values, schema)
+        except Exception as e:
+            values, reasons = None, [f"ошибка нормализации: {e}"]
+
+        if reasons:
+            rejects.append(make_reject(row_num, raw_row, reasons))
+        else:
+            rows.append(values)
+            row_nums.append(row_num)
+    return rows, row_nums, rejects
+
+
+def _worker_stage(raw_queue, normalized_queue, stats_queue, row_meta: bool):
+    """Процесс-воркер: нормализация и проверка пачек raw_queue -> normalized_queue"""
+    from ingest_validation import build_project_schema
+
+    stats = StageStats(f'worker-{os.getpid()}')
+    coordinates_dict = load_coordinates()
+    coordinates_cache = {}
+    schema = build_project_schema()
+
+    while True:
+        item = raw_queue.get()
+        if item is _DONE:
+            break
+        seq, start_row, batch = item
+
+        started = time.perf_counter()
+        rows, row_nums, rejects = normalize_batch(batch, start_row, coordinates_dict,
+                                                  coordinates_cache, schema, row_meta)
+        stats.add(len(batch), time.perf_counter() - started)
+
+        normalized_queue.put((seq, start_row, rows, row_nums, rejects))
+
+    normalized_queue.put(_DONE)
+    stats_queue.put(stats.to_dict())
+
+
+def run_pipeline(source_path: str, database_url: str, workers: int = None,
+                 batch_size: int = 2000, queue_size: int = None,
+                 truncate: bool = False, use_snapshot: bool = True,
+                 rejects_table: bool = True, rejects_file: Optional[str] = None,
+                 source_type: Optional[str] = None, source_name: Optional[str] = None,
+                 checkpoint=None) -> Dict:
+    """
+    Запуск конвейера reader -> workers -> writer
+
+    Args:
+        source_path: путь к XLSX или CSV файлу
+        database_url: URL базы PostgreSQL
+        workers: количество процессов нормализации (по умолчанию cpu_count - 2)
+        batch_size: размер пачки строк
+        queue_size: емкость очередей между стадиями (по умолчанию 2 * workers)
+        truncate: очистить таблицу projects перед загрузкой
+        use_snapshot: читать Parquet-снимок вместо XLSX/CSV, если он есть
+        rejects_table: сохранять отбракованные строки в projects_rejects
+        rejects_file: путь к JSONL-файлу для отбракованных строк
+        source_type: тип источника (xlsx/csv/parquet), по умолчанию по расширению
+        source_name: имя источника для карантина (по умолчанию имя файла)
+        checkpoint: объект с done_batches (уже записанные пачки) и методом
+            stage(cursor, seq, start_row, written, rejected), который фиксирует
+            пачку в той же транзакции, что и ее данные
+
+    Returns:
+        Словарь со статистикой по стадиям
+    """
+    import psycopg2
+    from ingest_validation import RejectsSink
+    from app.core.data_version import bump_data_version
+
+    source_name = source_name or os.path.basename(os.path.normpath(source_path))
+    source_path, source_type = resolve_source(source_path, source_type, use_snapshot)
+    row_meta = False
+    if source_type == 'parquet':
+        from parquet_snapshot import has_row_meta
+        row_meta = has_row_meta(source_path)
+    skip_batches = set(checkpoint.done_batches) if checkpoint else set()
+    workers = workers or max(1, (os.cpu_count() or 2) - 2)
+    queue_size = queue_size or workers * 2
+
+    ensure_schema(database_url)
+
+    raw_queue = mp.Queue(maxsize=queue_size)
+    normalized_queue = mp.Queue(maxsize=queue_size)
+    stats_queue = mp.Queue()
+
+    logger.info(f"🚀 Запуск конвейера: {workers} воркеров, пачка {batch_size}, очередь {queue_size}")
+    started = time.perf_counter()
+
+    processes = [mp.Process(target=_reader_stage, name='reader',
+                            args=(source_path, source_type, batch_size, skip_batches,
+                                  raw_queue, workers, stats_queue))]
+    processes += [mp.Process(target=_worker_stage, name=f'worker-{i}',
+                             args=(raw_queue, normalized_queue, stats_queue, row_meta))
+                  for i in range(workers)]
+    for process in processes:
+        process.start()
+
+    writer_stats = StageStats('writer')
+    sink = RejectsSink(source_name, use_table=rejects_table, file_path=rejects_file)
+    completed = False
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn.cursor() as cursor:
+            sink.prepare(cursor)
+            if truncate:
+                cursor.execute("TRUNCATE projects RESTART IDENTITY")
+        conn.commit()
+
+        finished_workers = 0
+        batches_written = 0
+        while finished_workers < workers:
+            try:
+                item = normalized_queue.get(timeout=5)
+            except queue.Empty:
+                failed = [p for p in processes if p.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError(f"Стадия {failed[0].name} завершилась с кодом {failed[0].exitcode}")
+                continue
+            if item is _DONE:
+                finished_workers += 1
+                continue
+            seq, start_row, rows, row_nums, rejects = item
+
+            before_commit = None
+            if checkpoint:
+                def before_commit(cursor, written, rejected, seq=seq, start_row=start_row):
+                    checkpoint.stage(cursor, seq, start_row, written, rejected)
+
+            write_started = time.perf_counter()
+            written, _ = write_batch(conn, rows, row_nums, rejects, sink, before_commit)
+            writer_stats.add(written, time.perf_counter() - write_started)
+
+            batches_written += 1
+            if batches_written % 10 == 0:
+                logger.info(f"✅ Записано строк: {writer_stats.rows}, в карантине: {sink.count}")
+
+        # Новая версия данных: ETag ответов API меняется после загрузки
+        with conn.cursor() as cursor:
+            bump_data_version(cursor)
+        conn.commit()
+        completed = True
+    finally:
+        conn.close()
+        sink.close()
+        for process in processes:
+            # При ошибке writer остальные стадии висят на полных очередях
+            if not completed:
+                process.terminate()
+            process.join()
+
+    wall = time.perf_counter() - started
+    stage_stats = [stats_queue.get() for _ in processes]
+    stage_stats.append(writer_stats.to_dict())
+
+    report = {
+        'rows': writer_stats.rows,
+        'rejected': sink.count,
+        'wall_seconds': round(wall, 2),
+        'rows_per_sec': round(writer_stats.rows / wall, 1) if wall > 0 else 0.0,
+        'stages': stage_stats
+    }
+    log_report(report)
+    return report
+
+
+def log_report(report: Dict):
+    """Печатаем rows/sec по стадиям"""
+    logger.info(f"🎉 Загружено {report['rows']} строк за {report['wall_seconds']} сек "
+                f"({report['rows_per_sec']} строк/сек)")
+    if report['rejected']:
+        logger.warning(f"⚠️ Отбраковано строк: {report['rejected']} (см. projects_rejects)")
+
+    workers = [s for s in report['stages'] if s['stage'].startswith('worker')]
+    for stage in report['stages']:
+        if stage['stage'].startswith('worker'):
+            continue
+        logger.info(f"   {stage['stage']:>8}: {stage['rows']} строк, "
+                    f"{stage['busy_seconds']} сек работы, {stage['rows_per_sec']} строк/сек")
+    if workers:
+        rows = sum(s['rows'] for s in workers)
+        rate = sum(s['rows_per_sec'] for s in workers)
+        logger.info(f"   {'workers':>8}: {rows} строк, {len(workers)} процессов, "
+                    f"суммарно {rate:.1f} строк/сек")
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Конвейерная загрузка проектов в PostgreSQL")
+    parser.add_argument('source', help="Путь к XLSX/CSV файлу или каталогу Parquet-снимка")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Количество процессов нормализации (по умолчанию cpu_count - 2)")
+    parser.add_argument('--batch-size', type=int, default=2000, help="Размер пачки строк")
+    parser.add_argument('--queue-size', type=int, default=None,
+                        help="Емкость очередей между стадиями (по умолчанию 2 * workers)")
+    parser.add_argument('--truncate', action='store_true', help="Очистить projects перед загрузкой")
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help="Не использовать Parquet-снимок, читать исходный файл")
+    parser.add_argument('--rejects-file', default=None,
+                        help="JSONL-файл для отбракованных строк (дополнительно к projects_rejects)")
+    parser.add_argument('--no-rejects-table', action='store_true',
+                        help="Не писать отбракованные строки в таблицу projects_rejects")
+    add_database_url_argument(parser)
+    args = parser.parse_args()
+    database_url = database_url_from_args(parser, args)
+
+    if not os.path.exists(args.source):
+        logger.error(f"❌ Файл не найден: {args.source}")
+        return 1
+
+    logger.info(f"Подключение к базе: {database_url.split('@')[-1]}")
+
+    try:
+        run_pipeline(
+            args.source,
+            database_url,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            queue_size=args.queue_size,
+            truncate=args.truncate,
+            use_snapshot=not args.no_snapshot,
+            rejects_table=not args.no_rejects_table,
+            rejects_file=args.rejects_file
+        )
+    except Exception as e:
+        logger.error(f"💥 Критическая ошибка: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
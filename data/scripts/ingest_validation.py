@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Валидация строк при загрузке и карантин отбракованных записей
+
+Схема проверки выводится из модели Project (тип и допустимость NULL
+каждой колонки) и дополняется предметными правилами (обязательные поля,
+диапазоны). Строки, не прошедшие проверку, не теряются: вместе с
+причинами и исходными значениями они попадают в таблицу projects_rejects
+и/или в JSONL-файл.
+"""
+import os
+import sys
+import json
+import numbers
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ingest_pipeline import SOURCE_COLUMNS, clean_value
+
+# Добавляем путь к app для импорта моделей
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend')))
+
+# Поля без пропусков в исходном наборе (см. sources/pres_grants_data_description.md);
+# req_num используется как grant_id для problems/solutions
+REQUIRED_COLUMNS = {'name', 'year', 'req_num'}
+
+MIN_YEAR = 2017
+MAX_YEAR = datetime.now().year + 1
+
+NON_NEGATIVE_COLUMNS = {'money_req_grant', 'cofunding', 'total_money', 'rate'}
+
+REJECTS_TABLE = 'projects_rejects'
+REJECTS_DDL = f"""
+CREATE TABLE IF NOT EXISTS {REJECTS_TABLE} (
+    id SERIAL PRIMARY KEY,
+    source TEXT,
+    row_num INTEGER,
+    reasons TEXT NOT NULL,
+    raw_data JSONB,
+    created_at TIMESTAMP DEFAULT NOW()
+)
+"""
+
+
+class FieldSpec:
+    """Описание одной колонки: допустимые python-типы и обязательность"""
+
+    def __init__(self, name: str, types: Tuple[type, ...], nullable: bool = True,
+                 max_length: Optional[int] = None):
+        self.name = name
+        self.types = types
+        self.nullable = nullable
+        self.max_length = max_length
+
+
+def _python_types(column) -> Tuple[type, ...]:
+    """Допустимые значения после нормализации для типа колонки SQLAlchemy"""
+    python_type = column.type.python_type
+    if python_type in (float, Decimal):
+        # Numeric/Float принимают любые числа (bool отсекается отдельно)
+        return (numbers.Number,)
+    return (python_type,)
+
+
+def build_project_schema() -> Dict[str, FieldSpec]:
+    """Схема проверки исходных колонок, построенная по модели Project"""
+    from app.models.project import Project
+
+    schema = {}
+    for column in Project.__table__.columns:
+        if column.name not in SOURCE_COLUMNS:
+            continue
+        schema[column.name] = FieldSpec(
+            name=column.name,
+            types=_python_types(column),
+            nullable=column.nullable and column.name not in REQUIRED_COLUMNS,
+            max_length=getattr(column.type, 'length', None)
+        )
+    return schema
+
+
+def validate_row(raw_row: Sequence, values: Sequence, schema: Dict[str, FieldSpec]) -> List[str]:
+    """
+    Проверяем нормализованную строку
+
+    Args:
+        raw_row: исходные значения (для поиска молча потерянных значений)
+        values: нормализованные значения в порядке PROJECT_COLUMNS
+        schema: схема из build_project_schema
+
+    Returns:
+        Список причин отбраковки (пустой, если строка корректна)
+    """
+    reasons = []
+    for idx, column in enumerate(SOURCE_COLUMNS):
+        spec = schema.get(column)
+        if spec is None:
+            continue
+        value = values[idx]
+        raw = raw_row[idx] if idx < len(raw_row) else None
+
+        if value is None:
+            if clean_value(raw) is not None and str(raw).strip().lower() != 'nan':
+                reasons.append(f"{column}: не удалось разобрать значение {str(raw)[:50]!r}")
+            elif not spec.nullable:
+                reasons.append(f"{column}: обязательное поле пустое")
+            continue
+
+        if isinstance(value, bool) and bool not in spec.types:
+            reasons.append(f"{column}: неверный тип bool")
+        elif not isinstance(value, spec.types):
+            reasons.append(f"{column}: неверный тип {type(value).__name__}")
+        elif spec.max_length and isinstance(value, str) and len(value) > spec.max_length:
+            reasons.append(f"{column}: длина {len(value)} больше {spec.max_length}")
+
+    year = values[SOURCE_COLUMNS.index('year')]
+    if isinstance(year, int) and not MIN_YEAR <= year <= MAX_YEAR:
+        reasons.append(f"year: {year} вне диапазона {MIN_YEAR}-{MAX_YEAR}")
+
+    for column in NON_NEGATIVE_COLUMNS:
+        value = values[SOURCE_COLUMNS.index(column)]
+        if isinstance(value, numbers.Number) and value < 0:
+            reasons.append(f"{column}: отрицательное значение {value}")
+
+    return reasons
+
+
+def _jsonable(value):
+    """Значение в виде, пригодном для JSON"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if value is not None and not isinstance(value, (str, int, float, bool)):
+        return str(value)
+    return value
+
+
+def make_reject(row_num: int, row: Sequence, reasons: List[str]) -> Dict:
+    """Запись карантина: номер строки источника, причины и значения строки"""
+    raw = {
+        column: _jsonable(row[idx] if idx < len(row) else None)
+        for idx, column in enumerate(SOURCE_COLUMNS)
+    }
+    return {'row_num': row_num, 'reasons': reasons, 'raw': raw}
+
+
+class RejectsSink:
+    """Приемник отбракованных строк: таблица projects_rejects и/или JSONL-файл"""
+
+    def __init__(self, source: str, use_table: bool = True, file_path: Optional[str] = None):
+        self.source = source
+        self.use_table = use_table
+        self.file_path = file_path
+        self.count = 0
+        self._file = None
+
+    def prepare(self, cursor):
+        """Создает таблицу карантина и открывает файл"""
+        if self.use_table:
+            cursor.execute(REJECTS_DDL)
+        if self.file_path:
+            self._file = open(self.file_path, 'a', encoding='utf-8')
+
+    def stage(self, cursor, rejects: List[Dict]):
+        """Пишет пачку в projects_rejects в транзакции вызывающего"""
+        if not rejects or not self.use_table:
+            return
+        from ingest_pipeline import copy_rows
+        rows = [
+            (self.source, reject['row_num'], '; '.join(reject['reasons']),
+             json.dumps(reject['raw'], ensure_ascii=False))
+            for reject in rejects
+        ]
+        copy_rows(cursor, rows, table=REJECTS_TABLE,
+                  columns=['source', 'row_num', 'reasons', 'raw_data'])
+
+    def committed(self, rejects: List[Dict]):
+        """Вызывается после commit: учитывает пачку и дописывает ее в файл"""
+        self.count += len(rejects)
+        if self._file and rejects:
+            for reject in rejects:
+                record = dict(reject, source=self.source)
+                self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
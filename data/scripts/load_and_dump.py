@@ -19,6 +19,7 @@ logger = logging.getLogger(__name__)
 # Добавляем путь к app для импорта моделей
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend')))
 from app.models.project import Project, Base
+from app.core.data_version import DATA_VERSION_DDL, BUMP_DATA_VERSION_SQL
 
 def load_coordinates():
     """Загружаем координаты регионов"""
@@ -182,6 +183,10 @@ def load_data_to_postgres():
                 session.commit()
                 projects_added += len(batch)
             
+            session.execute(text(DATA_VERSION_DDL))
+            session.execute(text(BUMP_DATA_VERSION_SQL))
+            session.commit()
+            
             logger.info(f"✅ Загрузка завершена!")
             logger.info(f"Всего проектов добавлено: {projects_added}")
             
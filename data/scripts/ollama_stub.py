@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Локальная заглушка ollama API для бенчмарков и тестов анализа
+
+Отвечает на /api/tags и /api/generate готовым JSON с проблемами и решениями
+после заданной задержки, имитируя время генерации модели. Обрабатывает
+запросы параллельно, поэтому годится для замера анализа при разной
+конкурентности.
+
+Использование:
+    python ollama_stub.py --port 11435 --latency 200
+    python ollama_analyzer.py  # с base_url="http://localhost:11435"
+"""
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+# Настройка логирования
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 11435
+DEFAULT_LATENCY_MS = 200
+
+CANNED_ANALYSIS = {
+    "grant_id": "",
+    "problems": [
+        "Пенсионеры сельских районов области не имеют доступа к спортивным занятиям из-за отсутствия тренеров",
+        "Дети с ограниченными возможностями здоровья в районном центре не вовлечены в творческие кружки",
+        "Жители малых поселений не знают о существующих программах социальной поддержки",
+    ],
+    "solutions": [
+        "Организуем еженедельные занятия скандинавской ходьбой для пенсионеров в 12 поселениях с привлечением 5 тренеров",
+        "Откроем инклюзивную творческую студию для 40 детей на базе районного дома культуры",
+        "Проведем 30 выездных консультаций специалистов соцзащиты в малых поселениях",
+    ],
+    "summary": "Проект повышает доступность социальных услуг и досуга для жителей сельских районов",
+}
+
+
+class OllamaStubHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов заглушки; задержка берется из сервера"""
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": self.server.model_name}]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.requests += 1
+        self._send_json({
+            "model": payload.get("model", self.server.model_name),
+            "response": json.dumps(CANNED_ANALYSIS, ensure_ascii=False),
+            "done": True,
+        })
+
+    def _send_json(self, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class OllamaStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], latency_ms: float = DEFAULT_LATENCY_MS,
+                 model_name: str = "llama3.1:8b"):
+        super().__init__(address, OllamaStubHandler)
+        self.latency = latency_ms / 1000
+        self.model_name = model_name
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub(latency_ms: float = DEFAULT_LATENCY_MS, port: int = 0) -> OllamaStubServer:
+    """Запускает заглушку в фоновом потоке (port=0 — свободный порт)"""
+    server = OllamaStubServer(("127.0.0.1", port), latency_ms)
+    threading.Thread(target=server.serve_forever, name="ollama-stub", daemon=True).start()
+    return server
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Заглушка ollama API с настраиваемой задержкой")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Порт")
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY_MS, help="Задержка ответа, мс")
+    args = parser.parse_args()
+
+    server = OllamaStubServer(("127.0.0.1", args.port), args.latency)
+    logger.info(f"🤖 Заглушка ollama на {server.base_url}, задержка {args.latency:.0f} мс")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Parquet-снимок исходного набора данных (кэш для загрузчиков)
+
+Исходный XLSX декодируется openpyxl один раз: строки нормализуются и
+сохраняются в типизированный сжатый Parquet, разбитый по годам
+(data/snapshots/<sha256>/year=YYYY/*.parquet). Снимок идентифицируется
+хэшем исходного файла, поэтому новая выгрузка автоматически получает
+новый снимок, а повторные загрузки читают уже готовый (memory-mapped).
+
+Проверка ingest_validation выполняется при построении снимка, пока под
+рукой исходные значения: в снимке хранится номер строки источника, а для
+отбракованных строк — причины и исходные значения. Загрузка из снимка
+отправляет в карантин те же строки с теми же номерами, что и из XLSX/CSV.
+
+Использование:
+    python parquet_snapshot.py <путь к xlsx/csv> [--force]
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from ingest_pipeline import SNAPSHOT_META_COLUMNS, SOURCE_COLUMNS, iter_source_batches, normalize_batch
+
+# Настройка логирования
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'snapshots'))
+MANIFEST_NAME = '_manifest.json'
+HASH_CACHE_NAME = '_hash_cache.json'
+# Версия формата: снимки без результатов проверки (версия 1) пересоздаются
+SNAPSHOT_FORMAT = 2
+
+# Колонки с небольшим числом различных значений хранятся словарем
+DICTIONARY_COLUMNS = {'contest', 'direction', 'region', 'level'}
+
+
+def snapshot_schema() -> 'pa.Schema':
+    """Типизированная схема снимка: SOURCE_COLUMNS, затем SNAPSHOT_META_COLUMNS"""
+    types = {
+        'year': pa.int32(),
+        'date_req': pa.date32(),
+        'implem_start': pa.date32(),
+        'implem_end': pa.date32(),
+        'winner': pa.bool_(),
+        'rate': pa.float64(),
+        'money_req_grant': pa.int64(),
+        'cofunding': pa.int64(),
+        'total_money': pa.int64(),
+    }
+    fields = []
+    for column in SOURCE_COLUMNS:
+        if column in types:
+            fields.append(pa.field(column, types[column]))
+        elif column in DICTIONARY_COLUMNS:
+            fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    fields += [
+        pa.field('row_num', pa.int64()),
+        pa.field('reject_reasons', pa.list_(pa.string())),
+        pa.field('reject_raw', pa.string()),
+    ]
+    return pa.schema(fields)
+
+
+def file_sha256(path: str) -> str:
+    """
+    SHA-256 исходного файла
+
+    Хэш кэшируется по (путь, размер, mtime), чтобы не перечитывать
+    гигабайтный XLSX при каждом запуске загрузчика.
+    """
+    stat = os.stat(path)
+    cache_key = f"{os.path.abspath(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+    cache_path = os.path.join(SNAPSHOTS_DIR, HASH_CACHE_NAME)
+
+    cache = {}
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+    if cache_key in cache:
+        return cache[cache_key]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    source_hash = digest.hexdigest()
+
+    os.makedirs(SNAPSHOTS_DIR, exist_ok=True)
+    cache[cache_key] = source_hash
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    return source_hash
+
+
+def snapshot_path(source_hash: str) -> str:
+    """Каталог снимка для хэша исходного файла"""
+    return os.path.join(SNAPSHOTS_DIR, source_hash)
+
+
+def find_snapshot(source_path: str) -> Optional[str]:
+    """Путь к готовому снимку для исходного файла или None"""
+    if not PYARROW_AVAILABLE or not os.path.exists(source_path):
+        return None
+    path = snapshot_path(file_sha256(source_path))
+    if is_current(path):
+        return path
+    return None
+
+
+def is_current(path: str) -> bool:
+    """Снимок готов и построен в текущем формате"""
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return False
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('format', 1) >= SNAPSHOT_FORMAT
+
+
+def latest_snapshot() -> Optional[str]:
+    """Самый свежий готовый снимок (когда исходного файла под рукой нет)"""
+    if not PYARROW_AVAILABLE or not os.path.isdir(SNAPSHOTS_DIR):
+        return None
+    manifests = [
+        os.path.join(SNAPSHOTS_DIR, name, MANIFEST_NAME)
+        for name in os.listdir(SNAPSHOTS_DIR)
+    ]
+    manifests = [path for path in manifests if is_current(os.path.dirname(path))]
+    if not manifests:
+        return None
+    return os.path.dirname(max(manifests, key=os.path.getmtime))
+
+
+def _record_batches(source_path: str, batch_size: int, schema: 'pa.Schema',
+                    counter: Dict) -> Iterator['pa.RecordBatch']:
+    """
+    Нормализованные и проверенные пачки исходного файла в виде RecordBatch
+
+    Корректные строки хранят значения и номер строки источника; у
+    отбракованных значения пустые, а причины и исходные значения лежат в
+    reject_reasons и reject_raw.
+    """
+    from ingest_validation import build_project_schema
+
+    project_schema = build_project_schema()
+    empty = (None,) * len(SOURCE_COLUMNS)
+    start_row = 1  # Нумерация как у загрузчика: строки данных без заголовка и пустых строк
+    for batch in iter_source_batches(source_path, batch_size):
+        # Координаты в снимок не пишем: они вычисляются при загрузке в базу
+        values, row_nums, rejects = normalize_batch(batch, start_row, {}, {}, project_schema)
+        rows = [row[:len(SOURCE_COLUMNS)] + (row_num, None, None) for row, row_num in zip(values, row_nums)]
+        rows += [
+            empty + (reject['row_num'], reject['reasons'], json.dumps(reject['raw'], ensure_ascii=False))
+            for reject in rejects
+        ]
+        start_row += len(batch)
+        columns = list(zip(*rows))
+        arrays = [pa.array(columns[idx], type=field.type) for idx, field in enumerate(schema)]
+        counter['rows'] += len(values)
+        counter['rejected'] += len(rejects)
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def build_snapshot(source_path: str, batch_size: int = 5000, force: bool = False) -> str:
+    """
+    Конвертирует исходный XLSX/CSV в Parquet-снимок
+
+    Args:
+        source_path: путь к исходному файлу
+        batch_size: размер пачки строк при конвертации
+        force: пересоздать снимок, даже если он уже есть
+
+    Returns:
+        Путь к каталогу снимка
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow не установлен. Используйте: pip install pyarrow")
+
+    source_hash = file_sha256(source_path)
+    path = snapshot_path(source_hash)
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+
+    if is_current(path) and not force:
+        logger.info(f"✅ Снимок уже существует: {path}")
+        return path
+
+    logger.info(f"📦 Создаю Parquet-снимок для {source_path}...")
+    started = time.time()
+
+    schema = snapshot_schema()
+    counter = {'rows': 0, 'rejected': 0}
+    ds.write_dataset(
+        _record_batches(source_path, batch_size, schema, counter),
+        path,
+        schema=schema,
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([('year', pa.int32())]), flavor='hive'),
+        file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'),
+        existing_data_behavior='delete_matching'
+    )
+
+    # Манифест пишется последним: его наличие означает, что снимок готов
+    manifest = {
+        'source_file': os.path.basename(source_path),
+        'source_sha256': source_hash,
+        'format': SNAPSHOT_FORMAT,
+        'rows': counter['rows'],
+        'rejected': counter['rejected'],
+        'columns': SOURCE_COLUMNS,
+        'created_at': datetime.now().isoformat(timespec='seconds')
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"✅ Снимок создан за {time.time() - started:.1f} сек: {counter['rows']} строк, "
+                f"отбраковано {counter['rejected']} -> {path}")
+    return path
+
+
+def open_snapshot(path: str) -> 'ds.Dataset':
+    """Открывает снимок как memory-mapped датасет"""
+    return ds.dataset(
+        path,
+        format='parquet',
+        partitioning='hive',
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+        exclude_invalid_files=True
+    )
+
+
+def iter_snapshot_batches(path: str, batch_size: int, columns: List[str] = None,
+                          filter=None) -> Iterator[List[tuple]]:
+    """
+    Читаем корректные строки снимка пачками в порядке SOURCE_COLUMNS (или columns)
+
+    Args:
+        path: каталог снимка
+        batch_size: размер пачки
+        columns: список колонок (по умолчанию все исходные)
+        filter: выражение pyarrow.dataset для отбора строк (например, по году)
+    """
+    columns = columns or SOURCE_COLUMNS
+    dataset = open_snapshot(path)
+    if 'reject_reasons' in dataset.schema.names:
+        valid = ds.field('reject_reasons').is_null()
+        filter = valid if filter is None else filter & valid
+    return _iter_rows(dataset, batch_size, columns, filter)
+
+
+def has_row_meta(path: str) -> bool:
+    """В снимке есть номера строк источника и результаты проверки (SNAPSHOT_META_COLUMNS)"""
+    return set(SNAPSHOT_META_COLUMNS) <= set(open_snapshot(path).schema.names)
+
+
+def iter_snapshot_rows(path: str, batch_size: int) -> Iterator[List[tuple]]:
+    """
+    Все строки снимка для загрузчика, включая отбракованные
+
+    Если has_row_meta, строки — SOURCE_COLUMNS, затем SNAPSHOT_META_COLUMNS.
+    Порядок строк — порядок партиций по годам, номер строки источника
+    хранится в row_num.
+    """
+    columns = SOURCE_COLUMNS + SNAPSHOT_META_COLUMNS if has_row_meta(path) else SOURCE_COLUMNS
+    return _iter_rows(open_snapshot(path), batch_size, columns)
+
+
+def _iter_rows(dataset: 'ds.Dataset', batch_size: int, columns: List[str], filter=None) -> Iterator[List[tuple]]:
+    for record_batch in dataset.to_batches(columns=columns, filter=filter, batch_size=batch_size):
+        if record_batch.num_rows == 0:
+            continue
+        data = record_batch.to_pydict()
+        yield list(zip(*(data[column] for column in columns)))
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Parquet-снимок исходного набора данных")
+    parser.add_argument('source', help="Путь к XLSX или CSV файлу")
+    parser.add_argument('--batch-size', type=int, default=5000, help="Размер пачки строк")
+    parser.add_argument('--force', action='store_true', help="Пересоздать существующий снимок")
+    args = parser.parse_args()
+
+    if not PYARROW_AVAILABLE:
+        logger.error("❌ pyarrow не установлен. Используйте: pip install pyarrow")
+        return 1
+    if not os.path.exists(args.source):
+        logger.error(f"❌ Файл не найден: {args.source}")
+        return 1
+
+    try:
+        build_snapshot(args.source, batch_size=args.batch_size, force=args.force)
+    except Exception as e:
+        logger.error(f"💥 Ошибка создания снимка: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,11 +10,20 @@ try:
 except ImportError:
     POSTGRES_AVAILABLE = False
     print("⚠️ psycopg2 не установлен. Используйте: pip install psycopg2-binary")
+import os
+import sys
 import logging
 import json
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+# Добавляем путь к app для общего счетчика версии данных (backend/ в репозитории, /app в контейнере)
+SCRIPTS_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+for app_root in (os.path.join(SCRIPTS_ROOT, 'backend'), SCRIPTS_ROOT):
+    if os.path.isdir(os.path.join(app_root, 'app')):
+        sys.path.insert(0, app_root)
+        break
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -45,6 +54,7 @@ class PostgresManager:
         self.database = database
         self.user = user
         self.password = password or "Ant1$1ngleoe"  # дефолтный пароль из проекта
+        self.summary_schema_ready = False
         
         # Поля для чтения из таблицы projects
         self.project_fields = [
@@ -162,6 +172,11 @@ class PostgresManager:
         """
         Сохранение результатов анализа в базу данных
         
+        В той же транзакции инкрементально обновляется сводка
+        grant_analysis_summary по затронутым грантам (см. grant_summary.py)
+        и увеличивается версия данных для ETag API. Схема сводки создается
+        один раз на менеджер, до транзакции сохранения.
+        
         Args:
             analysis_results: список результатов анализа от LLM
             
@@ -173,8 +188,16 @@ class PostgresManager:
             if not conn:
                 return False
             
+            from grant_summary import ensure_summary_schema, refresh_grant_summary
+            from app.core.data_version import bump_data_version
+            
+            if not self.summary_schema_ready:
+                ensure_summary_schema(conn)
+                self.summary_schema_ready = True
+            
             with conn.cursor() as cursor:
                 saved_count = 0
+                saved_grants = set()
                 
                 for analysis in analysis_results:
                     grant_id = analysis.get('grant_id')
@@ -218,7 +241,10 @@ class PostgresManager:
                                 )
                     
                     saved_count += 1
+                    saved_grants.add(grant_id)
                 
+                refresh_grant_summary(cursor, saved_grants)
+                bump_data_version(cursor)
                 conn.commit()
                 logger.info(f"✅ Результаты анализа сохранены: {saved_count} грантов")
                 return True
@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 """
 Скрипт для восстановления базы данных из полного дампа
+
+С --if-stale восстановление пропускается, если версия данных в базе
+(таблица db_snapshot_version, см. db_dump.py) совпадает с версией дампа.
+Так его запускает backend при старте (STARTUP_RESTORE=background).
 """
 import os
 import sys
+import argparse
 import subprocess
 import logging
 import time
@@ -12,17 +17,68 @@ import time
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def restore_from_dump():
+SQL_DUMP_PATH = '/app/data/dumps/socfinder_full_dump_29_fields.sql'
+
+def restore_from_directory_dump(if_stale: bool = False) -> bool:
+    """Параллельное восстановление из дампа в directory-формате (db_dump.py)"""
+    from db_dump import DEFAULT_DUMP_DIR, read_manifest, restore, restore_if_stale
+
+    if read_manifest(DEFAULT_DUMP_DIR) is None:
+        return False
+    jobs = int(os.getenv('RESTORE_JOBS', '4'))
+    logger.info(f"🔄 Восстанавливаем базу из {DEFAULT_DUMP_DIR}...")
+    if if_stale:
+        restore_if_stale(DEFAULT_DUMP_DIR, jobs)
+    else:
+        restore(DEFAULT_DUMP_DIR, jobs)
+    return True
+
+def sql_dump_version(dump_path: str) -> str:
+    """Версия текстового дампа: размер и время изменения файла"""
+    stat = os.stat(dump_path)
+    return f"sql:{stat.st_size}:{int(stat.st_mtime)}"
+
+def restore_from_dump(if_stale: bool = False):
     """Восстанавливаем базу данных из дампа"""
-    logger.info("🔄 Восстанавливаем базу данных из полного дампа...")
-    
-    # Путь к дампу
-    dump_path = '/app/data/dumps/socfinder_full_dump_29_fields.sql'
+    # Дамп в directory-формате восстанавливается параллельно и с проверкой контрольных сумм
+    try:
+        if restore_from_directory_dump(if_stale):
+            return True
+    except Exception as e:
+        logger.error(f"❌ Ошибка параллельного восстановления: {e}")
+        return False
     
+    dump_path = SQL_DUMP_PATH
     if not os.path.exists(dump_path):
         logger.error(f"❌ Дамп не найден: {dump_path}")
         return False
     
+    from db_dump import read_db_version, restore_lock, write_db_version
+    
+    version = sql_dump_version(dump_path)
+    lock = None
+    try:
+        if if_stale:
+            try:
+                lock = restore_lock()
+                if read_db_version() == version:
+                    logger.info(f"✅ База уже восстановлена из этого дампа ({version}), пропускаем")
+                    return True
+            except Exception as e:
+                logger.warning(f"⚠️ Не удалось проверить версию базы, восстанавливаем: {e}")
+        
+        success = restore_from_sql_dump(dump_path)
+        if success:
+            write_db_version(version, os.path.basename(dump_path))
+        return success
+    finally:
+        if lock:
+            lock.close()
+
+def restore_from_sql_dump(dump_path: str) -> bool:
+    """Восстанавливаем базу данных из текстового дампа через psql"""
+    logger.info("🔄 Восстанавливаем базу данных из полного дампа...")
+    
     try:
         # Проверяем размер дампа
         dump_size = os.path.getsize(dump_path) / (1024 * 1024)  # в МБ
@@ -80,10 +136,15 @@ def restore_from_dump():
 
 def main():
     """Основная функция"""
+    parser = argparse.ArgumentParser(description="Восстановление базы из полного дампа")
+    parser.add_argument('--if-stale', action='store_true',
+                        help="Пропустить восстановление, если база уже этой версии")
+    args = parser.parse_args()
+    
     start_time = time.time()
     
     # Восстанавливаем из дампа
-    success = restore_from_dump()
+    success = restore_from_dump(if_stale=args.if_stale)
     
     end_time = time.time()
     logger.info(f"⏱️ Общее время выполнения: {end_time - start_time:.2f} секунд")
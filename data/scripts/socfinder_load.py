@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+socfinder-load — единый загрузчик проектов в PostgreSQL
+
+Заменяет набор load_*.py скриптов: один конвейер (ingest_pipeline.py)
+с источниками xlsx/csv/parquet, быстрой записью через COPY, карантином
+отбракованных строк и чекпойнтами в базе. Каждая пачка коммитится вместе
+со своим чекпойнтом, поэтому прерванная загрузка при повторном запуске
+продолжается с последней записанной пачки, а не с начала.
+
+Использование:
+    ./socfinder-load <источник> [--type xlsx|csv|parquet] [--workers N] [--batch-size 2000]
+                     [--restart] [--force] [--append] [--no-snapshot]
+                     [--defer-indexes] [--index-jobs 4] [--maintenance-work-mem 512MB]
+
+Примеры:
+    ./socfinder-load ../raw/data_114_pres_grants_v20250313.xlsx
+    ./socfinder-load ../raw/data_114_pres_grants_v20250313.csv --workers 6
+    ./socfinder-load ../snapshots/<sha256> --restart
+    ./socfinder-load ../raw/data_114_pres_grants_v20250313.csv --defer-indexes
+
+С --defer-indexes вторичные индексы projects снимаются перед загрузкой и
+строятся параллельно после нее (см. index_manager.py), затем ANALYZE.
+
+Подключение к базе берется из --database-url или DATABASE_URL (обязательно).
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+from typing import Dict, Optional, Set
+
+from ingest_pipeline import (
+    SOURCE_READERS, add_database_url_argument, database_url_from_args,
+    ensure_schema, resolve_source, run_pipeline
+)
+
+# Настройка логирования
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CHECKPOINTS_DDL = """
+CREATE TABLE IF NOT EXISTS load_runs (
+    load_id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    source_type TEXT NOT NULL,
+    source_sha256 TEXT NOT NULL,
+    batch_size INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running',
+    rows_loaded BIGINT DEFAULT 0,
+    rows_rejected BIGINT DEFAULT 0,
+    started_at TIMESTAMP DEFAULT NOW(),
+    finished_at TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS load_checkpoints (
+    load_id TEXT NOT NULL REFERENCES load_runs(load_id) ON DELETE CASCADE,
+    batch_seq INTEGER NOT NULL,
+    start_row INTEGER NOT NULL,
+    rows_loaded INTEGER NOT NULL,
+    rows_rejected INTEGER NOT NULL,
+    committed_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (load_id, batch_seq)
+);
+"""
+
+
+class LoadCheckpoint:
+    """Чекпойнты одной загрузки: какие пачки источника уже записаны в базу"""
+
+    def __init__(self, load_id: str, done_batches: Set[int]):
+        self.load_id = load_id
+        self.done_batches = done_batches
+
+    def stage(self, cursor, seq: int, start_row: int, written: int, rejected: int):
+        """Фиксирует пачку в транзакции, в которой пишутся ее данные"""
+        cursor.execute(
+            """
+            INSERT INTO load_checkpoints (load_id, batch_seq, start_row, rows_loaded, rows_rejected)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            (self.load_id, seq, start_row, written, rejected)
+        )
+
+
+def source_sha256(path: str, source_type: str) -> str:
+    """Хэш исходных данных: для снимка берется хэш исходного файла из манифеста"""
+    from parquet_snapshot import MANIFEST_NAME, file_sha256
+
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if source_type == 'parquet' and os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)['source_sha256']
+    if os.path.isdir(path):
+        raise ValueError(f"Каталог без манифеста снимка: {path}")
+    return file_sha256(path)
+
+
+def start_run(conn, load_id: str, source_name: str, source_type: str, source_hash: str,
+              batch_size: int, restart: bool, force: bool, append: bool) -> Optional[Dict]:
+    """
+    Создает или возобновляет загрузку
+
+    Returns:
+        {'checkpoint': LoadCheckpoint, 'batch_size': int, 'resumed': bool}
+        или None, если этот источник уже полностью загружен
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(CHECKPOINTS_DDL)
+        cursor.execute("SELECT status, batch_size FROM load_runs WHERE load_id = %s", (load_id,))
+        existing = cursor.fetchone()
+
+        if existing and not (restart or force):
+            status, stored_batch_size = existing
+            if status == 'done':
+                conn.commit()
+                return None
+
+            # Номера пачек зависят от их размера, поэтому при возобновлении берем сохраненный
+            cursor.execute("SELECT batch_seq FROM load_checkpoints WHERE load_id = %s", (load_id,))
+            done_batches = {row[0] for row in cursor.fetchall()}
+            conn.commit()
+            return {
+                'checkpoint': LoadCheckpoint(load_id, done_batches),
+                'batch_size': stored_batch_size,
+                'resumed': True
+            }
+
+        # Новая загрузка: прошлые попытки этого источника и незавершенные чужие больше не нужны
+        cursor.execute("DELETE FROM load_runs WHERE load_id = %s", (load_id,))
+        cursor.execute("UPDATE load_runs SET status = 'abandoned' WHERE status = 'running'")
+        cursor.execute(
+            """
+            INSERT INTO load_runs (load_id, source, source_type, source_sha256, batch_size)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            (load_id, source_name, source_type, source_hash, batch_size)
+        )
+        if not append:
+            cursor.execute("TRUNCATE projects RESTART IDENTITY")
+            cursor.execute("DELETE FROM projects_rejects WHERE source = %s", (source_name,))
+    conn.commit()
+    return {'checkpoint': LoadCheckpoint(load_id, set()), 'batch_size': batch_size, 'resumed': False}
+
+
+def finish_run(conn, load_id: str) -> Dict:
+    """Отмечает загрузку завершенной и возвращает итоги по всем ее пачкам"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE load_runs SET
+                status = 'done',
+                finished_at = NOW(),
+                rows_loaded = totals.loaded,
+                rows_rejected = totals.rejected
+            FROM (
+                SELECT COALESCE(SUM(rows_loaded), 0) AS loaded,
+                       COALESCE(SUM(rows_rejected), 0) AS rejected
+                FROM load_checkpoints WHERE load_id = %s
+            ) AS totals
+            WHERE load_id = %s
+            RETURNING rows_loaded, rows_rejected
+            """,
+            (load_id, load_id)
+        )
+        loaded, rejected = cursor.fetchone()
+    conn.commit()
+    return {'rows_loaded': loaded, 'rows_rejected': rejected}
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(
+        prog='socfinder-load',
+        description="Единый загрузчик проектов в PostgreSQL (возобновляемый)"
+    )
+    parser.add_argument('source', help="Путь к XLSX/CSV файлу или каталогу Parquet-снимка")
+    parser.add_argument('--type', dest='source_type', choices=sorted(SOURCE_READERS),
+                        default=None, help="Тип источника (по умолчанию по расширению)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Количество процессов нормализации (по умолчанию cpu_count - 2)")
+    parser.add_argument('--batch-size', type=int, default=2000,
+                        help="Размер пачки строк (при возобновлении берется сохраненный)")
+    parser.add_argument('--restart', action='store_true',
+                        help="Начать прерванную загрузку заново, игнорируя чекпойнты")
+    parser.add_argument('--force', action='store_true',
+                        help="Перезагрузить источник, даже если он уже загружен")
+    parser.add_argument('--append', action='store_true',
+                        help="Не очищать projects перед новой загрузкой")
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help="Не использовать Parquet-снимок, читать исходный файл")
+    parser.add_argument('--rejects-file', default=None,
+                        help="JSONL-файл для отбракованных строк (дополнительно к projects_rejects)")
+    parser.add_argument('--defer-indexes', action='store_true',
+                        help="Снять вторичные индексы на время загрузки и построить их после")
+    parser.add_argument('--index-jobs', type=int, default=4,
+                        help="Сколько индексов строить одновременно")
+    parser.add_argument('--maintenance-work-mem', default='512MB',
+                        help="maintenance_work_mem для построения индексов")
+    add_database_url_argument(parser)
+    args = parser.parse_args()
+    database_url = database_url_from_args(parser, args)
+
+    if not os.path.exists(args.source):
+        logger.error(f"❌ Источник не найден: {args.source}")
+        return 1
+
+    import psycopg2
+    from ingest_validation import REJECTS_DDL
+    from index_manager import deferred_objects, drop_secondary_indexes, rebuild_indexes
+
+    logger.info(f"Подключение к базе: {database_url.split('@')[-1]}")
+
+    try:
+        source_path, source_type = resolve_source(args.source, args.source_type,
+                                                  use_snapshot=not args.no_snapshot)
+        source_hash = source_sha256(source_path, source_type)
+        # Разбиение на пачки у XLSX и у снимка разное, поэтому тип входит в идентификатор
+        load_id = f"{source_hash[:16]}-{source_type}"
+        source_name = os.path.basename(os.path.normpath(args.source))
+
+        ensure_schema(database_url)
+        conn = psycopg2.connect(database_url)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(REJECTS_DDL)
+            conn.commit()
+
+            run = start_run(conn, load_id, source_name, source_type, source_hash,
+                            args.batch_size, args.restart, args.force, args.append)
+            if run is None:
+                logger.info(f"✅ Источник {source_name} уже загружен (load_id={load_id}). "
+                            f"Для перезагрузки используйте --force")
+                return 0
+
+            checkpoint = run['checkpoint']
+            if run['resumed']:
+                logger.info(f"🔁 Возобновляем загрузку {load_id}: "
+                            f"уже записано пачек {len(checkpoint.done_batches)}")
+            else:
+                logger.info(f"🆕 Новая загрузка {load_id} ({source_type})")
+
+            if args.defer_indexes:
+                drop_secondary_indexes(conn)
+
+            report = run_pipeline(
+                source_path,
+                database_url,
+                workers=args.workers,
+                batch_size=run['batch_size'],
+                use_snapshot=False,
+                rejects_file=args.rejects_file,
+                source_type=source_type,
+                source_name=source_name,
+                checkpoint=checkpoint
+            )
+
+            # Индексы, снятые этим или прерванным прошлым запуском, восстанавливаем всегда
+            if deferred_objects(conn, 'projects'):
+                index_report = rebuild_indexes(database_url, 'projects', args.index_jobs,
+                                               args.maintenance_work_mem)
+                logger.info(f"⏱️  Загрузка: {report['wall_seconds']} сек, индексы и ANALYZE: "
+                            f"{index_report['total_seconds']} сек")
+
+            totals = finish_run(conn, load_id)
+            logger.info(f"🎉 Загрузка {load_id} завершена: {totals['rows_loaded']} строк, "
+                        f"в карантине {totals['rows_rejected']}")
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.error(f"💥 Критическая ошибка: {e}")
+        logger.error("Повторный запуск с теми же параметрами продолжит загрузку с последней пачки")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
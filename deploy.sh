@@ -32,7 +32,12 @@ docker-compose -f docker-compose.yml -f docker-compose.prod.yml --env-file .env.
 
 # 6. Проверить что API работает
 echo '🔍 Проверка API...'
-sleep 10  # Дать время на запуск
+# Ждем готовности: база доступна, пул не исчерпан, данные восстановлены
+for i in $(seq 1 60); do
+    curl -sf 'http://localhost:8001/health/ready' > /dev/null && break
+    sleep 5
+done
+curl -s 'http://localhost:8001/health/ready'; echo
 if curl -s 'http://localhost:8001/api/v1/stats/overview' > /dev/null; then
     echo '✅ API работает'
 else